@@ -69,6 +69,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
@@ -97,6 +98,8 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            # Each revision runs in its own transaction so SET LOCAL tuning is scoped to it
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,289 @@
+-- Initial railway traffic management schema (revision 001).
+-- Executed as a single batch by 001_initial_railway_schema.py after the
+-- timescaledb/postgis extensions have been created.
+
+-- Enum types
+CREATE TYPE train_type AS ENUM ('express', 'local', 'freight', 'maintenance');
+
+CREATE TYPE conflict_severity AS ENUM ('low', 'medium', 'high', 'critical');
+
+CREATE TYPE controller_auth_level AS ENUM ('operator', 'supervisor', 'manager', 'admin');
+
+CREATE TYPE decision_action AS ENUM ('reroute', 'delay', 'priority_change', 'emergency_stop', 'speed_limit', 'manual_override');
+
+CREATE TYPE section_type AS ENUM ('track', 'junction', 'station', 'yard');
+
+CREATE TYPE operational_status AS ENUM ('active', 'maintenance', 'out_of_service', 'emergency');
+
+CREATE TYPE fuel_type AS ENUM ('diesel', 'electric', 'hybrid');
+
+CREATE TYPE conflict_type AS ENUM ('collision_risk', 'section_overload', 'speed_violation', 'signal_violation', 'maintenance_conflict', 'priority_conflict', 'route_conflict');
+
+-- Core tables
+CREATE TABLE controllers (
+    id SERIAL NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    employee_id VARCHAR(20) NOT NULL,
+    section_responsibility INTEGER[],
+    auth_level controller_auth_level NOT NULL,
+    active BOOLEAN NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    UNIQUE (employee_id)
+);
+
+CREATE TABLE sections (
+    id SERIAL NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    section_code VARCHAR(20) NOT NULL,
+    section_type section_type NOT NULL,
+    length_meters NUMERIC(10, 2) NOT NULL,
+    max_speed_kmh INTEGER NOT NULL,
+    capacity INTEGER NOT NULL,
+    junction_ids INTEGER[],
+    coordinates geometry(LINESTRING,4326),
+    elevation_start NUMERIC(8, 2),
+    elevation_end NUMERIC(8, 2),
+    gradient NUMERIC(5, 3),
+    electrified BOOLEAN NOT NULL,
+    signaling_system VARCHAR(50),
+    maintenance_window_start TIME WITHOUT TIME ZONE,
+    maintenance_window_end TIME WITHOUT TIME ZONE,
+    active BOOLEAN NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    UNIQUE (section_code)
+);
+
+CREATE INDEX idx_sections_coordinates ON sections USING SPGIST (coordinates);
+
+CREATE TABLE trains (
+    id SERIAL NOT NULL,
+    train_number VARCHAR(20) NOT NULL,
+    type train_type NOT NULL,
+    current_section_id INTEGER,
+    speed_kmh REAL NOT NULL,
+    max_speed_kmh INTEGER NOT NULL,
+    capacity INTEGER NOT NULL,
+    current_load INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    destination_section_id INTEGER,
+    origin_section_id INTEGER,
+    scheduled_departure TIMESTAMP WITH TIME ZONE,
+    scheduled_arrival TIMESTAMP WITH TIME ZONE,
+    actual_departure TIMESTAMP WITH TIME ZONE,
+    estimated_arrival TIMESTAMP WITH TIME ZONE,
+    driver_id VARCHAR(20),
+    conductor_id VARCHAR(20),
+    length_meters NUMERIC(8, 2) NOT NULL,
+    weight_tons NUMERIC(10, 2) NOT NULL,
+    engine_power_kw INTEGER,
+    fuel_type fuel_type,
+    operational_status operational_status NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY(current_section_id) REFERENCES sections (id),
+    FOREIGN KEY(destination_section_id) REFERENCES sections (id),
+    FOREIGN KEY(origin_section_id) REFERENCES sections (id),
+    UNIQUE (train_number)
+);
+
+CREATE TABLE positions (
+    train_id INTEGER NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    section_id INTEGER NOT NULL,
+    coordinates geometry(POINT,4326),
+    speed_kmh REAL NOT NULL,
+    direction SMALLINT,
+    distance_from_start NUMERIC(10, 2),
+    signal_strength SMALLINT,
+    gps_accuracy SMALLINT,
+    altitude REAL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (train_id, timestamp),
+    FOREIGN KEY(section_id) REFERENCES sections (id),
+    FOREIGN KEY(train_id) REFERENCES trains (id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_positions_coordinates ON positions USING SPGIST (coordinates);
+
+CREATE TABLE conflicts (
+    id SERIAL NOT NULL,
+    conflict_type conflict_type NOT NULL,
+    severity conflict_severity NOT NULL,
+    trains_involved INTEGER[] NOT NULL,
+    sections_involved INTEGER[] NOT NULL,
+    detection_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    resolution_time TIMESTAMP WITH TIME ZONE,
+    estimated_impact_minutes INTEGER,
+    description TEXT NOT NULL,
+    auto_resolved BOOLEAN NOT NULL,
+    resolved_by_controller_id INTEGER,
+    resolution_notes TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY(resolved_by_controller_id) REFERENCES controllers (id)
+);
+
+CREATE TABLE decisions (
+    id SERIAL NOT NULL,
+    controller_id INTEGER NOT NULL,
+    conflict_id INTEGER,
+    train_id INTEGER,
+    section_id INTEGER,
+    action_taken decision_action NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+    rationale TEXT NOT NULL,
+    parameters JSONB,
+    executed BOOLEAN NOT NULL,
+    execution_time TIMESTAMP WITH TIME ZONE,
+    execution_result TEXT,
+    override_reason TEXT,
+    approval_required BOOLEAN NOT NULL,
+    approved_by_controller_id INTEGER,
+    approval_time TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY(approved_by_controller_id) REFERENCES controllers (id),
+    FOREIGN KEY(conflict_id) REFERENCES conflicts (id),
+    FOREIGN KEY(controller_id) REFERENCES controllers (id),
+    FOREIGN KEY(section_id) REFERENCES sections (id),
+    FOREIGN KEY(train_id) REFERENCES trains (id)
+);
+
+CREATE TABLE train_schedules (
+    id SERIAL NOT NULL,
+    train_id INTEGER NOT NULL,
+    route_sections INTEGER[] NOT NULL,
+    scheduled_times TIMESTAMP WITH TIME ZONE[] NOT NULL,
+    actual_times TIMESTAMP WITH TIME ZONE[],
+    delays_minutes INTEGER[],
+    active BOOLEAN NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY(train_id) REFERENCES trains (id) ON DELETE CASCADE
+);
+
+CREATE TABLE section_occupancy (
+    section_id INTEGER NOT NULL,
+    train_id INTEGER NOT NULL,
+    entry_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    exit_time TIMESTAMP WITH TIME ZONE,
+    expected_exit_time TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (section_id, train_id, entry_time),
+    FOREIGN KEY(section_id) REFERENCES sections (id),
+    FOREIGN KEY(train_id) REFERENCES trains (id)
+);
+
+CREATE TABLE maintenance_windows (
+    id SERIAL NOT NULL,
+    section_id INTEGER NOT NULL,
+    start_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    end_time TIMESTAMP WITH TIME ZONE NOT NULL,
+    maintenance_type VARCHAR(50) NOT NULL,
+    description TEXT,
+    affects_traffic BOOLEAN NOT NULL,
+    created_by_controller_id INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (id),
+    FOREIGN KEY(created_by_controller_id) REFERENCES controllers (id),
+    FOREIGN KEY(section_id) REFERENCES sections (id)
+);
+
+-- CHECK constraints, one ALTER TABLE per table
+ALTER TABLE controllers
+    ADD CONSTRAINT controllers_name_check CHECK (LENGTH(name) >= 2),
+    ADD CONSTRAINT controllers_employee_id_check CHECK (LENGTH(employee_id) >= 3);
+
+ALTER TABLE sections
+    ADD CONSTRAINT sections_name_check CHECK (LENGTH(name) >= 2),
+    ADD CONSTRAINT sections_code_check CHECK (LENGTH(section_code) >= 2),
+    ADD CONSTRAINT sections_length_check CHECK (length_meters > 0),
+    ADD CONSTRAINT sections_max_speed_check CHECK (max_speed_kmh > 0 AND max_speed_kmh <= 300),
+    ADD CONSTRAINT sections_capacity_check CHECK (capacity > 0),
+    ADD CONSTRAINT sections_gradient_check CHECK (gradient BETWEEN -10.0 AND 10.0);
+
+ALTER TABLE trains
+    ADD CONSTRAINT trains_number_check CHECK (LENGTH(train_number) >= 2),
+    ADD CONSTRAINT trains_speed_check CHECK (speed_kmh >= 0),
+    ADD CONSTRAINT trains_max_speed_check CHECK (max_speed_kmh > 0 AND max_speed_kmh <= 300),
+    ADD CONSTRAINT trains_capacity_check CHECK (capacity > 0),
+    ADD CONSTRAINT trains_load_check CHECK (current_load >= 0),
+    ADD CONSTRAINT trains_load_capacity_check CHECK (current_load <= capacity),
+    ADD CONSTRAINT trains_priority_check CHECK (priority BETWEEN 1 AND 10),
+    ADD CONSTRAINT trains_length_check CHECK (length_meters > 0),
+    ADD CONSTRAINT trains_weight_check CHECK (weight_tons > 0),
+    ADD CONSTRAINT trains_schedule_check CHECK (scheduled_departure IS NULL OR scheduled_arrival IS NULL OR scheduled_departure < scheduled_arrival);
+
+ALTER TABLE positions
+    ADD CONSTRAINT positions_speed_check CHECK (speed_kmh >= 0),
+    ADD CONSTRAINT positions_direction_check CHECK (direction BETWEEN 0 AND 3600 OR direction IS NULL),
+    ADD CONSTRAINT positions_distance_check CHECK (distance_from_start >= 0 OR distance_from_start IS NULL),
+    ADD CONSTRAINT positions_signal_check CHECK (signal_strength BETWEEN 0 AND 100 OR signal_strength IS NULL),
+    ADD CONSTRAINT positions_coordinates_check CHECK (coordinates IS NOT NULL OR section_id IS NOT NULL);
+
+ALTER TABLE conflicts
+    ADD CONSTRAINT conflicts_trains_check CHECK (array_length(trains_involved, 1) >= 1),
+    ADD CONSTRAINT conflicts_sections_check CHECK (array_length(sections_involved, 1) >= 1),
+    ADD CONSTRAINT conflicts_resolution_check CHECK ((resolution_time IS NULL AND resolved_by_controller_id IS NULL) OR (resolution_time IS NOT NULL AND resolution_time >= detection_time));
+
+ALTER TABLE decisions
+    ADD CONSTRAINT decisions_rationale_check CHECK (LENGTH(rationale) >= 10),
+    ADD CONSTRAINT decisions_execution_check CHECK ((executed = false AND execution_time IS NULL) OR (executed = true AND execution_time IS NOT NULL AND execution_time >= timestamp)),
+    ADD CONSTRAINT decisions_approval_check CHECK ((approval_required = false) OR (approval_required = true AND approved_by_controller_id IS NOT NULL AND approval_time IS NOT NULL));
+
+ALTER TABLE train_schedules
+    ADD CONSTRAINT schedules_route_times_match CHECK (array_length(route_sections, 1) = array_length(scheduled_times, 1));
+
+ALTER TABLE section_occupancy
+    ADD CONSTRAINT occupancy_exit_check CHECK (exit_time IS NULL OR exit_time > entry_time);
+
+ALTER TABLE maintenance_windows
+    ADD CONSTRAINT maintenance_time_check CHECK (end_time > start_time);
+
+-- TimescaleDB hypertable for positions, space-partitioned by train_id
+SELECT create_hypertable('positions', 'timestamp', chunk_time_interval => INTERVAL '1 hour');
+
+SELECT add_dimension('positions', 'train_id', number_partitions => 16);
+
+CREATE INDEX idx_positions_train_time ON positions (train_id, timestamp DESC);
+
+-- Native compression for chunks older than a day
+ALTER TABLE positions SET (timescaledb.compress, timescaledb.compress_segmentby = 'train_id', timescaledb.compress_orderby = 'timestamp DESC');
+
+SELECT add_compression_policy('positions', INTERVAL '1 day');
+
+-- Latest position per train per minute
+CREATE MATERIALIZED VIEW positions_1min WITH (timescaledb.continuous) AS
+SELECT train_id,
+       time_bucket('1 minute', timestamp) AS bucket,
+       last(section_id, timestamp) AS section_id,
+       last(speed_kmh, timestamp) AS speed_kmh,
+       last(coordinates, timestamp) AS coordinates
+FROM positions
+GROUP BY train_id, bucket
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('positions_1min',
+    start_offset => INTERVAL '5 minutes',
+    end_offset => INTERVAL '1 minute',
+    schedule_interval => INTERVAL '30 seconds');
+
+-- BRIN indexes
+CREATE INDEX idx_positions_timestamp_brin ON positions USING BRIN (timestamp) WITH (pages_per_range = 32);
+
+CREATE INDEX idx_positions_section_time_brin ON positions USING BRIN (section_id, timestamp);
+
+-- updated_at maintenance
+CREATE EXTENSION IF NOT EXISTS moddatetime;
+
+CREATE TRIGGER update_trains_updated_at BEFORE UPDATE ON trains FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
+
+CREATE TRIGGER update_conflicts_updated_at BEFORE UPDATE ON conflicts FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
+
+CREATE TRIGGER update_train_schedules_updated_at BEFORE UPDATE ON train_schedules FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
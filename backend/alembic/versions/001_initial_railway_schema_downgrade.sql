@@ -0,0 +1,40 @@
+-- Reverts 001_initial_railway_schema.sql.
+
+-- Drop the continuous aggregate and remove compression policy before the hypertable goes away
+SELECT remove_continuous_aggregate_policy('positions_1min', if_exists => true);
+DROP MATERIALIZED VIEW IF EXISTS positions_1min;
+SELECT remove_compression_policy('positions', if_exists => true);
+
+-- Drop triggers
+DROP TRIGGER IF EXISTS update_train_schedules_updated_at ON train_schedules;
+DROP TRIGGER IF EXISTS update_conflicts_updated_at ON conflicts;
+DROP TRIGGER IF EXISTS update_trains_updated_at ON trains;
+DROP EXTENSION IF EXISTS moddatetime;
+
+-- Drop positions and spatial indexes
+DROP INDEX IF EXISTS idx_positions_coordinates;
+DROP INDEX IF EXISTS idx_sections_coordinates;
+DROP INDEX IF EXISTS idx_positions_train_time;
+DROP INDEX IF EXISTS idx_positions_section_time_brin;
+DROP INDEX IF EXISTS idx_positions_timestamp_brin;
+
+-- Drop tables
+DROP TABLE IF EXISTS maintenance_windows;
+DROP TABLE IF EXISTS section_occupancy;
+DROP TABLE IF EXISTS train_schedules;
+DROP TABLE IF EXISTS decisions;
+DROP TABLE IF EXISTS conflicts;
+DROP TABLE IF EXISTS positions;
+DROP TABLE IF EXISTS trains;
+DROP TABLE IF EXISTS sections;
+DROP TABLE IF EXISTS controllers;
+
+-- Drop enum types
+DROP TYPE IF EXISTS conflict_type;
+DROP TYPE IF EXISTS fuel_type;
+DROP TYPE IF EXISTS operational_status;
+DROP TYPE IF EXISTS section_type;
+DROP TYPE IF EXISTS decision_action;
+DROP TYPE IF EXISTS controller_auth_level;
+DROP TYPE IF EXISTS conflict_severity;
+DROP TYPE IF EXISTS train_type;
@@ -10,8 +10,6 @@ This migration adds AI-specific fields to enable AI optimization integration:
 
 """
 from alembic import op
-import sqlalchemy as sa
-from sqlalchemy.dialects import postgresql
 
 # revision identifiers, used by Alembic.
 revision = '002'
@@ -23,69 +21,85 @@ depends_on = None
 def upgrade() -> None:
     """Add AI fields to conflicts and decisions tables"""
     
-    # Add AI fields to conflicts table
-    op.add_column('conflicts', sa.Column('ai_analyzed', sa.Boolean(), nullable=False, server_default='false'))
-    op.add_column('conflicts', sa.Column('ai_confidence', sa.Numeric(precision=5, scale=4), nullable=True))
-    op.add_column('conflicts', sa.Column('ai_solution_id', sa.String(length=100), nullable=True))
-    op.add_column('conflicts', sa.Column('ai_recommendations', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
-    op.add_column('conflicts', sa.Column('ai_analysis_time', sa.DateTime(timezone=True), nullable=True))
+    # Relax durability, raise sort memory and bound lock waits for this migration's transaction
+    op.execute("SET LOCAL synchronous_commit = OFF")
+    op.execute("SET LOCAL maintenance_work_mem = '1GB'")
+    op.execute("SET LOCAL lock_timeout = '5s'")
     
-    # Add AI fields to decisions table
-    op.add_column('decisions', sa.Column('ai_generated', sa.Boolean(), nullable=False, server_default='false'))
-    op.add_column('decisions', sa.Column('ai_solver_method', sa.String(length=50), nullable=True))
-    op.add_column('decisions', sa.Column('ai_score', sa.Numeric(precision=8, scale=4), nullable=True))
-    op.add_column('decisions', sa.Column('ai_confidence', sa.Numeric(precision=5, scale=4), nullable=True))
+    # Enum type for the AI solver method
+    op.execute("CREATE TYPE ai_solver_method AS ENUM ('rule_based', 'constraint_programming', 'reinforcement_learning')")
     
-    # Add check constraints for AI confidence values (must be between 0.0 and 1.0)
-    op.create_check_constraint(
-        'conflicts_ai_confidence_check',
-        'conflicts',
-        'ai_confidence IS NULL OR (ai_confidence >= 0.0 AND ai_confidence <= 1.0)'
-    )
+    # Add AI fields and constraints to conflicts table in a single ALTER TABLE
+    op.execute("""
+        ALTER TABLE conflicts
+            ADD COLUMN ai_analyzed BOOLEAN NOT NULL DEFAULT false,
+            ADD COLUMN ai_confidence REAL,
+            ADD COLUMN ai_solution_id VARCHAR(100),
+            ADD COLUMN ai_recommendations JSONB,
+            ADD COLUMN ai_analysis_time TIMESTAMP WITH TIME ZONE,
+            ADD CONSTRAINT conflicts_ai_confidence_check
+                CHECK (ai_confidence IS NULL OR (ai_confidence >= 0.0 AND ai_confidence <= 1.0))
+    """)
     
-    op.create_check_constraint(
-        'decisions_ai_confidence_check',
-        'decisions',
-        'ai_confidence IS NULL OR (ai_confidence >= 0.0 AND ai_confidence <= 1.0)'
-    )
+    # Add AI fields and constraints to decisions table in a single ALTER TABLE
+    op.execute("""
+        ALTER TABLE decisions
+            ADD COLUMN ai_generated BOOLEAN NOT NULL DEFAULT false,
+            ADD COLUMN ai_solver_method ai_solver_method,
+            ADD COLUMN ai_score REAL,
+            ADD COLUMN ai_confidence REAL,
+            ADD CONSTRAINT decisions_ai_confidence_check
+                CHECK (ai_confidence IS NULL OR (ai_confidence >= 0.0 AND ai_confidence <= 1.0))
+    """)
     
-    # Add check constraint for AI solver method values
-    op.create_check_constraint(
-        'decisions_ai_solver_method_check',
-        'decisions',
-        """ai_solver_method IS NULL OR ai_solver_method IN ('rule_based', 'constraint_programming', 'reinforcement_learning')"""
-    )
-    
-    # Create indexes for better query performance on AI fields
-    op.create_index('idx_conflicts_ai_analyzed', 'conflicts', ['ai_analyzed'])
-    op.create_index('idx_conflicts_ai_confidence', 'conflicts', ['ai_confidence'])
-    op.create_index('idx_decisions_ai_generated', 'decisions', ['ai_generated'])
-    op.create_index('idx_decisions_ai_solver_method', 'decisions', ['ai_solver_method'])
+    # Create partial indexes on the hot subsets of the AI fields. CONCURRENTLY cannot run
+    # inside a transaction block, so these are built in autocommit mode to avoid blocking writes.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY idx_conflicts_ai_analyzed ON conflicts (detection_time) WHERE ai_analyzed = false")
+        op.execute("CREATE INDEX CONCURRENTLY idx_decisions_ai_generated ON decisions (timestamp) WHERE ai_generated = true")
+        op.execute("CREATE INDEX CONCURRENTLY idx_decisions_ai_solver_method ON decisions (ai_solver_method) WHERE ai_solver_method IS NOT NULL")
+        
+        # Covering indexes for the dashboard/approval queue queries (index-only scans)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY idx_conflicts_open_by_severity ON conflicts (severity, detection_time DESC)
+            INCLUDE (trains_involved, sections_involved) WHERE resolution_time IS NULL
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY idx_decisions_pending_approval ON decisions (controller_id, timestamp)
+            WHERE approval_required = true AND approved_by_controller_id IS NULL
+        """)
 
 
 def downgrade() -> None:
     """Remove AI fields from conflicts and decisions tables"""
     
     # Drop indexes
-    op.drop_index('idx_decisions_ai_solver_method', table_name='decisions')
-    op.drop_index('idx_decisions_ai_generated', table_name='decisions')
-    op.drop_index('idx_conflicts_ai_confidence', table_name='conflicts')
-    op.drop_index('idx_conflicts_ai_analyzed', table_name='conflicts')
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_decisions_pending_approval")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_conflicts_open_by_severity")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_decisions_ai_solver_method")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_decisions_ai_generated")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_conflicts_ai_analyzed")
     
-    # Drop check constraints
-    op.drop_constraint('decisions_ai_solver_method_check', 'decisions')
-    op.drop_constraint('decisions_ai_confidence_check', 'decisions')
-    op.drop_constraint('conflicts_ai_confidence_check', 'conflicts')
+    # Remove AI columns and constraints from decisions table
+    op.execute("""
+        ALTER TABLE decisions
+            DROP CONSTRAINT decisions_ai_confidence_check,
+            DROP COLUMN ai_confidence,
+            DROP COLUMN ai_score,
+            DROP COLUMN ai_solver_method,
+            DROP COLUMN ai_generated
+    """)
     
-    # Remove AI columns from decisions table
-    op.drop_column('decisions', 'ai_confidence')
-    op.drop_column('decisions', 'ai_score')
-    op.drop_column('decisions', 'ai_solver_method')
-    op.drop_column('decisions', 'ai_generated')
+    # Remove AI columns and constraints from conflicts table
+    op.execute("""
+        ALTER TABLE conflicts
+            DROP CONSTRAINT conflicts_ai_confidence_check,
+            DROP COLUMN ai_analysis_time,
+            DROP COLUMN ai_recommendations,
+            DROP COLUMN ai_solution_id,
+            DROP COLUMN ai_confidence,
+            DROP COLUMN ai_analyzed
+    """)
     
-    # Remove AI columns from conflicts table
-    op.drop_column('conflicts', 'ai_analysis_time')
-    op.drop_column('conflicts', 'ai_recommendations')
-    op.drop_column('conflicts', 'ai_solution_id')
-    op.drop_column('conflicts', 'ai_confidence')
-    op.drop_column('conflicts', 'ai_analyzed')
\ No newline at end of file
+    op.execute("DROP TYPE IF EXISTS ai_solver_method")
@@ -0,0 +1,35 @@
+"""Add set-based conflict detection function
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds detect_section_conflicts(window_min, buffer_min), used by ConflictDetector
+when CONFLICT_DETECTION_SQL is enabled.
+
+"""
+import os
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+SQL_DIR = os.path.dirname(__file__)
+
+
+def _execute_sql_file(filename: str) -> None:
+    """Run a sibling .sql file as a single batch"""
+    with open(os.path.join(SQL_DIR, filename)) as f:
+        op.execute(f.read())
+
+
+def upgrade() -> None:
+    _execute_sql_file('003_add_conflict_detection_function.sql')
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS detect_section_conflicts(INTEGER, INTEGER)")
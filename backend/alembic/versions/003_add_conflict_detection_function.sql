@@ -0,0 +1,143 @@
+-- Set-based conflict detection, mirroring ConflictDetector's prediction and section scan.
+-- Returns one row per conflict with the same metadata keys the Python detector emits;
+-- impact_time is naive UTC like the rest of the detector.
+CREATE OR REPLACE FUNCTION detect_section_conflicts(window_min INTEGER, buffer_min INTEGER)
+RETURNS TABLE (
+    conflict_type TEXT,
+    section_id INTEGER,
+    train_ids INTEGER[],
+    impact_time TIMESTAMP,
+    metadata JSONB
+) AS $$
+WITH base AS (
+    SELECT now() AT TIME ZONE 'UTC' AS now_utc,
+           (now() AT TIME ZONE 'UTC') + make_interval(mins => window_min) AS end_utc
+),
+-- Latest position per moving active train, one index seek each
+latest AS (
+    SELECT t.id AS train_id, t.max_speed_kmh, p.section_id,
+           p.speed_kmh::float8 AS speed,
+           COALESCE(p.distance_from_start, 0)::float8 AS distance_from_start,
+           COALESCE(s.length_meters, 1000)::float8 AS section_length
+    FROM trains t
+    CROSS JOIN LATERAL (
+        SELECT section_id, speed_kmh, distance_from_start
+        FROM positions
+        WHERE train_id = t.id
+            AND timestamp > now() - interval '10 minutes'
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) p
+    LEFT JOIN sections s ON s.id = p.section_id
+    WHERE t.operational_status = 'active'
+        AND p.section_id IS NOT NULL
+        AND p.speed_kmh > 0
+),
+-- Time to leave the current section at current speed
+current_preds AS (
+    SELECT l.*, b.now_utc AS arrival,
+           b.now_utc + make_interval(secs => (l.section_length - l.distance_from_start) / (l.speed * 1000 / 60) * 60) AS exit_time
+    FROM latest l CROSS JOIN base b
+),
+-- First active schedule per train
+routes AS (
+    SELECT DISTINCT ON (ts.train_id) ts.train_id, ts.route_sections
+    FROM train_schedules ts
+    WHERE ts.active
+        AND cardinality(ts.route_sections) > 0
+        AND ts.train_id IN (SELECT train_id FROM latest)
+    ORDER BY ts.train_id, ts.id
+),
+-- Remaining route sections after the current one, traversed back to back
+future AS (
+    SELECT c.train_id, r.section_id, r.ord, c.exit_time,
+           LEAST(c.speed, c.max_speed_kmh)::float8 AS speed,
+           COALESCE(s.length_meters, 1000)::float8 / (LEAST(c.speed, c.max_speed_kmh) * 1000 / 60) AS traverse_min
+    FROM current_preds c
+    JOIN routes rt ON rt.train_id = c.train_id
+    CROSS JOIN LATERAL unnest(rt.route_sections) WITH ORDINALITY AS r(section_id, ord)
+    LEFT JOIN sections s ON s.id = r.section_id
+    WHERE r.ord > array_position(rt.route_sections, c.section_id)
+),
+future_preds AS (
+    SELECT f.train_id, f.section_id, f.speed,
+           f.exit_time + make_interval(secs => 60 * (SUM(f.traverse_min) OVER w - f.traverse_min)) AS arrival,
+           f.exit_time + make_interval(secs => 60 * SUM(f.traverse_min) OVER w) AS exit_time
+    FROM future f
+    WINDOW w AS (PARTITION BY f.train_id ORDER BY f.ord)
+),
+preds AS (
+    SELECT c.train_id, c.section_id, c.speed, c.arrival, c.exit_time
+    FROM current_preds c CROSS JOIN base b
+    WHERE c.exit_time <= b.end_utc
+    UNION ALL
+    SELECT f.train_id, f.section_id, f.speed, f.arrival, f.exit_time
+    FROM future_preds f CROSS JOIN base b
+    WHERE f.arrival <= b.end_utc
+),
+ordered AS (
+    SELECT p.*, ROW_NUMBER() OVER (PARTITION BY p.section_id ORDER BY p.arrival) AS rn
+    FROM preds p
+),
+-- Two trains overlapping on a single-track section
+spatial AS (
+    SELECT 'spatial_collision'::text, a.section_id, ARRAY[a.train_id, b.train_id], a.arrival,
+           jsonb_build_object(
+               'overlap_minutes', EXTRACT(EPOCH FROM LEAST(a.exit_time, b.exit_time) - b.arrival) / 60,
+               'section_capacity', s.capacity,
+               'train1_speed', a.speed,
+               'train2_speed', b.speed
+           )
+    FROM ordered a
+    JOIN sections s ON s.id = a.section_id AND s.active AND s.capacity = 1
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn > a.rn
+    WHERE LEAST(a.exit_time, b.exit_time) > b.arrival
+),
+-- Next train arriving within the safety buffer after the previous one exits
+temporal AS (
+    SELECT 'temporal_conflict'::text, a.section_id, ARRAY[a.train_id, b.train_id], a.arrival,
+           jsonb_build_object(
+               'safety_buffer', EXTRACT(EPOCH FROM b.arrival - a.exit_time) / 60,
+               'required_buffer', buffer_min
+           )
+    FROM ordered a
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn = a.rn + 1
+    WHERE b.arrival > a.exit_time
+        AND b.arrival - a.exit_time < make_interval(mins => buffer_min)
+),
+-- Express train arriving right behind a lower priority freight train
+priority AS (
+    SELECT 'priority_conflict'::text, a.section_id, ARRAY[a.train_id, b.train_id], b.arrival,
+           jsonb_build_object(
+               'blocking_train_priority', ta.priority,
+               'blocked_train_priority', tb.priority,
+               'speed_difference', tb.max_speed_kmh - ta.max_speed_kmh
+           )
+    FROM ordered a
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn = a.rn + 1
+    JOIN trains ta ON ta.id = a.train_id
+    JOIN trains tb ON tb.id = b.train_id
+    WHERE tb.priority > ta.priority
+        AND tb.type = 'express'
+        AND ta.type = 'freight'
+),
+-- A train plus every later train overlapping it exceeds junction capacity
+junction AS (
+    SELECT 'junction_conflict'::text, a.section_id, a.train_id || array_agg(b.train_id ORDER BY b.rn), a.arrival,
+           jsonb_build_object(
+               'junction_capacity', s.capacity,
+               'trains_count', COUNT(*) + 1,
+               'overflow', COUNT(*) + 1 - s.capacity
+           )
+    FROM ordered a
+    JOIN sections s ON s.id = a.section_id AND s.active AND s.section_type = 'junction'
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn > a.rn
+    WHERE LEAST(a.exit_time, b.exit_time) > b.arrival
+    GROUP BY a.section_id, a.train_id, a.rn, a.arrival, s.capacity
+    HAVING COUNT(*) + 1 > s.capacity
+)
+SELECT * FROM spatial
+UNION ALL SELECT * FROM temporal
+UNION ALL SELECT * FROM priority
+UNION ALL SELECT * FROM junction
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,37 @@
+"""Add change notifications for detector caches
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds triggers that pg_notify train_changed / section_changed with the row id
+when a field cached by ConflictDetector changes.
+
+"""
+import os
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+SQL_DIR = os.path.dirname(__file__)
+
+
+def _execute_sql_file(filename: str) -> None:
+    """Run a sibling .sql file as a single batch"""
+    with open(os.path.join(SQL_DIR, filename)) as f:
+        op.execute(f.read())
+
+
+def upgrade() -> None:
+    _execute_sql_file('004_add_cache_change_notifications.sql')
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS notify_section_changed ON sections")
+    op.execute("DROP TRIGGER IF EXISTS notify_train_changed ON trains")
+    op.execute("DROP FUNCTION IF EXISTS notify_row_changed()")
@@ -0,0 +1,21 @@
+-- Notify conflict detectors when a train or section field they cache changes.
+-- The payload is the row id; the channel is the trigger argument.
+CREATE OR REPLACE FUNCTION notify_row_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify(TG_ARGV[0], OLD.id::text);
+    ELSE
+        PERFORM pg_notify(TG_ARGV[0], NEW.id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER notify_train_changed
+    AFTER INSERT OR DELETE OR UPDATE OF priority, type, max_speed_kmh, current_load, operational_status ON trains
+    FOR EACH ROW EXECUTE FUNCTION notify_row_changed('train_changed');
+
+CREATE TRIGGER notify_section_changed
+    AFTER INSERT OR DELETE OR UPDATE OF section_type, capacity, active ON sections
+    FOR EACH ROW EXECUTE FUNCTION notify_row_changed('section_changed');
@@ -0,0 +1,49 @@
+"""Add unique index on open conflicts
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 00:00:00.000000
+
+Makes (trains_involved, sections_involved, conflict_type) unique among unresolved
+conflicts so ConflictDetector.store_conflicts can upsert with ON CONFLICT.
+Existing duplicates are resolved in favour of the oldest open conflict first.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Resolve duplicate open conflicts and add the partial unique index"""
+    
+    op.execute("""
+        UPDATE conflicts c
+        SET resolution_time = GREATEST(now(), c.detection_time),
+            auto_resolved = true,
+            resolution_notes = 'Superseded by duplicate open conflict ' || d.keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY trains_involved, sections_involved, conflict_type) AS keep_id
+            FROM conflicts
+            WHERE resolution_time IS NULL
+        ) d
+        WHERE c.id = d.id AND d.id <> d.keep_id
+    """)
+    
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY conflicts_open_uq
+            ON conflicts (trains_involved, sections_involved, conflict_type) WHERE resolution_time IS NULL
+        """)
+
+
+def downgrade() -> None:
+    """Drop the partial unique index"""
+    
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS conflicts_open_uq")
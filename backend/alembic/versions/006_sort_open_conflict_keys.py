@@ -0,0 +1,71 @@
+"""Make the open conflict unique index order-insensitive
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+Adds generated trains_sorted/sections_sorted columns and rebuilds conflicts_open_uq
+on (conflict_type, trains_sorted, sections_sorted), so the same trains and sections
+reported in a different order upsert into the existing open conflict.
+Duplicates under the new key are resolved in favour of the oldest open conflict first.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add sorted id columns, resolve duplicates under them and swap the unique index"""
+    
+    op.execute("""
+        CREATE OR REPLACE FUNCTION int_array_sort(ids INTEGER[]) RETURNS INTEGER[] AS $$
+            SELECT ARRAY(SELECT unnest(ids) ORDER BY 1)
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    """)
+    op.execute("""
+        ALTER TABLE conflicts
+            ADD COLUMN trains_sorted INTEGER[] GENERATED ALWAYS AS (int_array_sort(trains_involved)) STORED,
+            ADD COLUMN sections_sorted INTEGER[] GENERATED ALWAYS AS (int_array_sort(sections_involved)) STORED
+    """)
+    
+    op.execute("""
+        UPDATE conflicts c
+        SET resolution_time = GREATEST(now(), c.detection_time),
+            auto_resolved = true,
+            resolution_notes = 'Superseded by duplicate open conflict ' || d.keep_id
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY conflict_type, trains_sorted, sections_sorted) AS keep_id
+            FROM conflicts
+            WHERE resolution_time IS NULL
+        ) d
+        WHERE c.id = d.id AND d.id <> d.keep_id
+    """)
+    
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY conflicts_open_sorted_uq
+            ON conflicts (conflict_type, trains_sorted, sections_sorted) WHERE resolution_time IS NULL
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS conflicts_open_uq")
+        op.execute("ALTER INDEX conflicts_open_sorted_uq RENAME TO conflicts_open_uq")
+
+
+def downgrade() -> None:
+    """Restore the ordered unique index and drop the sorted id columns"""
+    
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY conflicts_open_ordered_uq
+            ON conflicts (trains_involved, sections_involved, conflict_type) WHERE resolution_time IS NULL
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS conflicts_open_uq")
+        op.execute("ALTER INDEX conflicts_open_ordered_uq RENAME TO conflicts_open_uq")
+    
+    op.execute("ALTER TABLE conflicts DROP COLUMN trains_sorted, DROP COLUMN sections_sorted")
+    op.execute("DROP FUNCTION IF EXISTS int_array_sort(INTEGER[])")
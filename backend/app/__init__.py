@@ -3,20 +3,44 @@ Railway Traffic Management System with AI Integration
 Production-ready railway optimization and management system
 """
 
+import importlib
+import logging
+
 __version__ = "2.0.0"  # Updated with AI integration
 
-# AI Integration availability check
-try:
-    from .railway_optimization import OptimizationEngine
-    from .railway_adapter import RailwayAIAdapter
-    from .ai_config import AIConfig
-    AI_AVAILABLE = True
-except ImportError as e:
-    AI_AVAILABLE = False
-    import logging
-    logging.getLogger(__name__).warning(f"AI modules not available: {e}")
+# AI modules are resolved lazily on first attribute access (PEP 562) so that
+# importing the package from Alembic, CLI scripts or unrelated routes does not
+# pull in the whole optimization stack.
+_LAZY_AI_ATTRS = {
+    'OptimizationEngine': '.railway_optimization',
+    'RailwayAIAdapter': '.railway_adapter',
+    'AIConfig': '.ai_config',
+}
+
+
+def _check_ai_available() -> bool:
+    """AI Integration availability check"""
+    try:
+        for attr, module in _LAZY_AI_ATTRS.items():
+            getattr(importlib.import_module(module, __name__), attr)
+        return True
+    except ImportError as e:
+        logging.getLogger(__name__).warning(f"AI modules not available: {e}")
+        return False
+
+
+def __getattr__(name):
+    if name == 'AI_AVAILABLE':
+        value = _check_ai_available()
+    elif name in _LAZY_AI_ATTRS:
+        value = getattr(importlib.import_module(_LAZY_AI_ATTRS[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     '__version__',
     'AI_AVAILABLE'
-]
\ No newline at end of file
+]
@@ -0,0 +1,51 @@
+"""
+Compiled pair-overlap scan for conflict detection.
+Numba is optional: without it NUMBA_AVAILABLE is False and the NumPy kernels
+in conflict_detector are used instead.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+
+def _count_section_pairs(arrivals, exits, segment_end, counts):
+    """
+    Count, for every row i, the later rows j < segment_end[i] overlapping it.
+    Rows are grouped by section and sorted by arrival within each group.
+    """
+    for i in prange(arrivals.shape[0]):
+        count = 0
+        for j in range(i + 1, segment_end[i]):
+            # Sorted by arrival: nothing after j can start before train i exits
+            if arrivals[j] >= exits[i]:
+                break
+            if min(exits[i], exits[j]) - arrivals[j] > 0:
+                count += 1
+        counts[i] = count
+
+
+def _fill_section_pairs(arrivals, exits, segment_end, offsets, out_i, out_j, out_overlap):
+    """Write the pairs counted by _count_section_pairs, row i's pairs starting at offsets[i]"""
+    for i in prange(arrivals.shape[0]):
+        k = offsets[i]
+        for j in range(i + 1, segment_end[i]):
+            if arrivals[j] >= exits[i]:
+                break
+            overlap = min(exits[i], exits[j]) - arrivals[j]
+            if overlap > 0:
+                out_i[k] = i
+                out_j[k] = j
+                out_overlap[k] = overlap
+                k += 1
+
+
+if NUMBA_AVAILABLE:
+    # Rows are independent once their output offsets are known, so both passes run in parallel
+    count_section_pairs = njit(parallel=True, cache=True)(_count_section_pairs)
+    fill_section_pairs = njit(parallel=True, cache=True)(_fill_section_pairs)
+else:
+    count_section_pairs = fill_section_pairs = None
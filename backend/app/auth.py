@@ -3,138 +3,382 @@ Authentication system for Railway Traffic Management API
 JWT-based authentication for controllers
 """
 
+import hashlib
+import hmac
+import logging
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+import warnings
+from datetime import timedelta
+from functools import lru_cache
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+import jwt
+import orjson
+from jwt.algorithms import HMACAlgorithm
+from jwt.exceptions import DecodeError, PyJWTError as JWTError
 import bcrypt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import Session, make_transient_to_detached
 from .db import get_session
-from .models import Controller
+from .models import Controller, section_mask
 from .schemas import TokenData
 
+logger = logging.getLogger(__name__)
+
+# HS256 is HMAC-SHA256; it should run on OpenSSL's SHA-256 (which uses the CPU's
+# SHA extensions where available) rather than CPython's builtin fallback.
+try:
+    from _hashlib import openssl_sha256 as _openssl_sha256
+except ImportError:
+    _openssl_sha256 = None
+
+if hashlib.sha256 is not _openssl_sha256:
+    logger.warning("hashlib is not backed by OpenSSL; JWT verification will use the slower builtin SHA-256")
+
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET", "railway-secret-key-change-in-production")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRES_IN", "3600")) // 60
+_DEFAULT_DELTA_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# bcrypt work factor: fixed via BCRYPT_COST, otherwise calibrated to BCRYPT_TARGET_MS on this host
+BCRYPT_COST = os.getenv("BCRYPT_COST")
+BCRYPT_TARGET_MS = int(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_COST = 10
+BCRYPT_MAX_COST = 14
+
+# Optional libxcrypt bcrypt backend (e.g. a build with an AVX2/AVX-512 Blowfish path).
+# Hashes stay in Modular Crypt Format, so either backend verifies the other's output.
+BCRYPT_BACKEND = os.getenv("BCRYPT_BACKEND", "bcrypt")
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import crypt as _crypt
+    CRYPT_BCRYPT_AVAILABLE = (_crypt.crypt("probe", "$2b$04$" + "." * 22) or "").startswith("$2b$")
+except ImportError:
+    _crypt = None
+    CRYPT_BCRYPT_AVAILABLE = False
+
+
+def _cpu_flags() -> set:
+    """CPU feature flags from /proc/cpuinfo (empty where unavailable)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    return set(line.split(":", 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+
+USE_CRYPT_BCRYPT = (
+    BCRYPT_BACKEND == "crypt"
+    and CRYPT_BCRYPT_AVAILABLE
+    and bool({"avx2", "avx512vl"} & _cpu_flags())
+)
+if BCRYPT_BACKEND == "crypt" and not USE_CRYPT_BCRYPT:
+    logger.warning("BCRYPT_BACKEND=crypt requested but libxcrypt bcrypt/AVX is unavailable; using bcrypt")
+
+# Decode arguments bound once; required claims are enforced by the decoder itself
+_DECODE_KWARGS = {
+    "key": SECRET_KEY,
+    "algorithms": [ALGORITHM],
+    "options": {"require": ["sub", "exp"]},
+}
+
+class _OrjsonPyJWT(jwt.PyJWT):
+    """PyJWT with claims (de)serialized by orjson instead of the stdlib json module.
+    
+    _encode_payload/_decode_payload are private PyJWT methods, so the overrides accept
+    any extra arguments and hand anything they do not recognise back to PyJWT.
+    """
+    
+    def _encode_payload(self, payload, *args, **kwargs) -> bytes:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            return super()._encode_payload(payload, *args, **kwargs)
+    
+    def _decode_payload(self, decoded, *args, **kwargs):
+        raw = decoded.get("payload") if isinstance(decoded, dict) else None
+        if not isinstance(raw, (bytes, str)):
+            return super()._decode_payload(decoded, *args, **kwargs)
+        try:
+            payload = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            raise DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+def _build_jwt() -> jwt.PyJWT:
+    """The orjson codec if it round-trips a token on this PyJWT version, else stock PyJWT"""
+    codec = _OrjsonPyJWT()
+    probe_key = os.urandom(32)
+    try:
+        token = codec.encode({"sub": "probe"}, probe_key, algorithm="HS256")
+        if codec.decode(token, probe_key, algorithms=["HS256"]) == {"sub": "probe"}:
+            return codec
+    except (TypeError, JWTError):
+        pass
+    logger.warning("orjson JWT codec is incompatible with this PyJWT version; using the stock encoder")
+    return jwt.PyJWT()
+
+
+class _PrekeyedHS256(HMACAlgorithm):
+    """HS256 with SECRET_KEY validated and HMAC-keyed once; per token only the message is hashed"""
+    
+    def __init__(self, secret: str):
+        super().__init__(HMACAlgorithm.SHA256)
+        self._secret = super().prepare_key(secret)
+        self._hmac_template = hmac.new(self._secret, digestmod="sha256")
+    
+    def prepare_key(self, key):
+        if key == SECRET_KEY:
+            return self._secret
+        return super().prepare_key(key)
+    
+    def sign(self, msg: bytes, key: bytes) -> bytes:
+        if key is self._secret:
+            h = self._hmac_template.copy()
+            h.update(msg)
+            return h.digest()
+        return super().sign(msg, key)
+    
+    def verify(self, msg: bytes, key: bytes, sig: bytes) -> bool:
+        return hmac.compare_digest(sig, self.sign(msg, key))
+
+
+_jwt = _build_jwt()
+if ALGORITHM == "HS256":
+    # PyJWT >= 2.11 gives each PyJWT its own PyJWS; older releases share a module-level
+    # one, which is left alone so other jwt users keep the stock HS256
+    _signer = getattr(_jwt, "_jws", None)
+    if isinstance(_signer, jwt.PyJWS):
+        _signer.unregister_algorithm("HS256")
+        _signer.register_algorithm("HS256", _PrekeyedHS256(SECRET_KEY))
+    else:
+        logger.warning("PyJWT has no per-instance PyJWS; using the stock HS256 implementation")
 
 # HTTP Bearer token scheme
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
+
+# Auth failures carry no request-specific data, so the exceptions are built once
+_CREDENTIALS_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+_FORBIDDEN_EXC = HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+
+# Recently verified tokens, keyed by SHA-256 of the token so raw tokens are never held
+_token_cache: TTLCache = TTLCache(maxsize=10000, ttl=30)
+_token_cache_lock = threading.Lock()
+
+# Recently verified logins, so repeated logins with the same credentials skip bcrypt.
+# Keys are HMACs of the credentials under a per-process pepper; only successes are cached.
+_AUTH_CACHE_PEPPER = os.urandom(32)
+_auth_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_auth_cache_lock = threading.Lock()
 
+# Column snapshots of recently authenticated controllers, keyed by controller id.
+# Combined with the token cache, a repeat request authenticates without any SQL.
+_CONTROLLER_CACHE_FIELDS = (
+    'id', 'name', 'employee_id', 'section_responsibility', 'auth_level', 'active', 'created_at', 'updated_at'
+)
+_controller_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_controller_cache_lock = threading.Lock()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+
+def _hashpw(password_bytes: bytes, salt: bytes) -> bytes:
+    if USE_CRYPT_BCRYPT and b"\0" not in password_bytes:
+        return _crypt.crypt(password_bytes.decode('utf-8'), salt.decode('ascii')).encode('ascii')
+    return bcrypt.hashpw(password_bytes, salt)
+
+
+def _checkpw(password_bytes: bytes, hashed_bytes: bytes) -> bool:
+    if USE_CRYPT_BCRYPT and b"\0" not in password_bytes:
+        computed = _crypt.crypt(password_bytes.decode('utf-8'), hashed_bytes.decode('ascii'))
+        return computed is not None and hmac.compare_digest(computed.encode('ascii'), hashed_bytes)
+    return bcrypt.checkpw(password_bytes, hashed_bytes)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash"""
     if not hashed_password:
         return False
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
-    return bcrypt.checkpw(password_bytes, hashed_bytes)
+    # bcrypt releases the GIL, so the threadpool keeps the event loop free during the check
+    return await run_in_threadpool(_checkpw, password_bytes, hashed_bytes)
+
+
+@lru_cache(maxsize=1)
+def get_bcrypt_cost() -> int:
+    """Return the bcrypt cost, calibrating it on first use if BCRYPT_COST is unset"""
+    if BCRYPT_COST:
+        return int(BCRYPT_COST)
+    
+    cost = BCRYPT_MIN_COST
+    while cost < BCRYPT_MAX_COST:
+        start = time.perf_counter()
+        _hashpw(b"calibration", bcrypt.gensalt(rounds=cost + 1))
+        if (time.perf_counter() - start) * 1000 > BCRYPT_TARGET_MS:
+            break
+        cost += 1
+    
+    logger.info(f"bcrypt cost calibrated to {cost} (target {BCRYPT_TARGET_MS} ms)")
+    return cost
+
+
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    """Hash verified against when there is no real one, so every login pays for one bcrypt check"""
+    return get_password_hash("unused-dummy-password")
+
+
+async def warm_up_password_hashing() -> None:
+    """Calibrate the bcrypt cost and build the dummy hash in the threadpool, e.g. at startup"""
+    await run_in_threadpool(_dummy_password_hash)
 
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
+    salt = bcrypt.gensalt(rounds=get_bcrypt_cost())
+    hashed = _hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # exp as an integer NumericDate, so no datetime arithmetic or conversion is needed
+    expire = int(time.time()) + (int(expires_delta.total_seconds()) if expires_delta else _DEFAULT_DELTA_SECONDS)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _jwt.encode({**data, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def verify_token(token: str) -> Optional[TokenData]:
     """Verify and decode JWT token"""
+    cache_key = hashlib.sha256(token.encode()).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+    if cached is not None:
+        token_data, exp = cached
+        if exp > time.time():
+            return token_data
+        with _token_cache_lock:
+            _token_cache.pop(cache_key, None)
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        employee_id: str = payload.get("sub")
-        controller_id: int = payload.get("controller_id")
-        
-        if employee_id is None:
-            return None
-            
-        token_data = TokenData(employee_id=employee_id, controller_id=controller_id)
-        return token_data
-    except JWTError:
+        payload = _jwt.decode(token, **_DECODE_KWARGS)
+        exp = payload["exp"]
+        token_data = TokenData(payload["sub"], payload.get("controller_id"))
+    except (JWTError, KeyError):
         return None
+    
+    # Only successful decodes are cached; failures always go back through jwt.decode
+    with _token_cache_lock:
+        _token_cache[cache_key] = (token_data, exp)
+    return token_data
 
 
-def authenticate_controller(db: Session, employee_id: str, password: str) -> Optional[Controller]:
+async def authenticate_controller(db: Session, employee_id: str, password: str) -> Optional[Controller]:
     """Authenticate controller with employee_id and password"""
-    controller = db.query(Controller).filter(
-        Controller.employee_id == employee_id,
-        Controller.active == True
-    ).first()
+    cache_key = hmac.new(_AUTH_CACHE_PEPPER, f"{employee_id}|{password}".encode(), "sha256").digest()
+    with _auth_cache_lock:
+        cached = _auth_cache.get(cache_key)
+    if cached is not None:
+        controller_id, password_hash = cached
+        controller = db.get(Controller, controller_id)
+        # A changed password hash or deactivation invalidates the cached login
+        if controller is not None and controller.active and controller.password_hash == password_hash:
+            return controller
+        with _auth_cache_lock:
+            _auth_cache.pop(cache_key, None)
     
-    if not controller:
-        return None
+    # Fetch only what the password check needs; the full row is loaded after it succeeds
+    row = db.execute(
+        select(Controller.id, Controller.password_hash).where(
+            Controller.employee_id == employee_id,
+            Controller.active.is_(True)
+        )
+    ).first()
     
-    # Check if controller has a password hash
-    if not controller.password_hash:
+    # Always run bcrypt, even for unknown controllers or ones without a password,
+    # so response time does not reveal which employee IDs exist
+    password_hash = row.password_hash if row and row.password_hash else None
+    # The dummy hash is normally built at startup; if not, calibration stays off the event loop
+    password_ok = await verify_password(password, password_hash or await run_in_threadpool(_dummy_password_hash))
+    if not (password_ok and password_hash):
         return None
     
-    # Verify password
-    if not verify_password(password, controller.password_hash):
+    controller = db.get(Controller, row.id)
+    if controller is None:
         return None
     
+    with _auth_cache_lock:
+        _auth_cache[cache_key] = (controller.id, controller.password_hash)
     return controller
 
 
 async def get_current_controller(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_session)
 ) -> Controller:
-    """Get current authenticated controller"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    """Get current authenticated, active controller"""
+    # auto_error is off so a missing/malformed header gets the same 401 as a bad token
+    if credentials is None:
+        raise _CREDENTIALS_EXC
     
     token_data = verify_token(credentials.credentials)
     if token_data is None:
-        raise credentials_exception
+        raise _CREDENTIALS_EXC
     
-    controller = db.query(Controller).filter(
-        Controller.employee_id == token_data.employee_id,
-        Controller.active == True
-    ).first()
+    if token_data.controller_id is None:
+        # Tokens without a controller_id claim fall back to the employee_id lookup
+        controller = db.query(Controller).filter(
+            Controller.employee_id == token_data.employee_id,
+            Controller.active == True
+        ).first()
+        if controller is None:
+            raise _CREDENTIALS_EXC
+        return controller
     
-    if controller is None:
-        raise credentials_exception
+    with _controller_cache_lock:
+        fields = _controller_cache.get(token_data.controller_id)
+    if fields is not None and fields['employee_id'] == token_data.employee_id:
+        # Rebuild a detached instance per request so callers never share mutable state
+        sections = fields['section_responsibility']
+        controller = Controller(**{**fields, 'section_responsibility': list(sections) if sections is not None else None})
+        make_transient_to_detached(controller)
+        return controller
+    
+    controller = db.get(Controller, token_data.controller_id)
+    if controller is None or not controller.active or controller.employee_id != token_data.employee_id:
+        raise _CREDENTIALS_EXC
     
+    with _controller_cache_lock:
+        _controller_cache[controller.id] = {field: getattr(controller, field) for field in _CONTROLLER_CACHE_FIELDS}
     return controller
 
 
-async def get_current_active_controller(
-    current_controller: Controller = Depends(get_current_controller)
-) -> Controller:
-    """Get current active controller"""
-    if not current_controller.active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Inactive controller"
-        )
-    return current_controller
+# get_current_controller only ever returns active controllers, so these are plain aliases
+# rather than extra dependency hops. Kept for compatibility with existing code.
+get_current_active_controller = get_current_controller
+get_current_user = get_current_controller
 
 
-# Alias for compatibility with existing code
-async def get_current_user(
-    current_controller: Controller = Depends(get_current_active_controller)
-) -> Controller:
-    """Get current authenticated user (controller) - alias for compatibility"""
-    return current_controller
+AUTH_LEVELS = {"operator": 1, "supervisor": 2, "manager": 3, "admin": 4}
 
 
 def check_controller_permissions(
@@ -143,20 +387,16 @@ def check_controller_permissions(
     min_auth_level: str = "operator"
 ) -> bool:
     """Check if controller has required permissions"""
-    auth_levels = {"operator": 1, "supervisor": 2, "manager": 3, "admin": 4}
-    
-    controller_level = auth_levels.get(controller.auth_level.value, 0)
-    required_level = auth_levels.get(min_auth_level, 1)
-    
-    if controller_level < required_level:
+    return _has_permissions(controller, section_mask(required_sections), AUTH_LEVELS.get(min_auth_level, 1))
+
+
+def _has_permissions(controller: Controller, required_mask: int, required_level: int) -> bool:
+    if AUTH_LEVELS.get(controller.auth_level.value, 0) < required_level:
         return False
     
-    if required_sections and controller.section_responsibility:
-        # Check if controller has responsibility for required sections
-        if not any(section in controller.section_responsibility for section in required_sections):
-            return False
-    
-    return True
+    # Controllers without section assignments are not restricted by section
+    controller_mask = controller._sections_mask
+    return not (required_mask and controller_mask) or (controller_mask & required_mask) != 0
 
 
 class PermissionChecker:
@@ -165,17 +405,31 @@ class PermissionChecker:
     def __init__(self, min_auth_level: str = "operator", required_sections: Optional[list] = None):
         self.min_auth_level = min_auth_level
         self.required_sections = required_sections
+        self._check = self._compile_check(AUTH_LEVELS.get(min_auth_level, 1), section_mask(required_sections))
+    
+    @staticmethod
+    def _compile_check(required_level: int, required_mask: int):
+        """Build a check function with the level and section mask inlined as constants"""
+        if required_mask:
+            source = (
+                "def check(controller):\n"
+                "    if AUTH_LEVELS.get(controller.auth_level.value, 0) < %d:\n"
+                "        return False\n"
+                "    mask = controller._sections_mask\n"
+                "    return not mask or (mask & %d) != 0\n"
+            ) % (required_level, required_mask)
+        else:
+            source = (
+                "def check(controller):\n"
+                "    return AUTH_LEVELS.get(controller.auth_level.value, 0) >= %d\n"
+            ) % required_level
+        namespace = {"AUTH_LEVELS": AUTH_LEVELS}
+        exec(source, namespace)
+        return namespace["check"]
     
     def __call__(self, controller: Controller = Depends(get_current_active_controller)):
-        if not check_controller_permissions(
-            controller, 
-            self.required_sections, 
-            self.min_auth_level
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Insufficient permissions"
-            )
+        if not self._check(controller):
+            raise _FORBIDDEN_EXC
         return controller
 
 
@@ -188,11 +442,8 @@ require_admin = PermissionChecker("admin")
 
 def create_demo_passwords(db: Session):
     """Create demo passwords for existing controllers (development only)"""
-    controllers = db.query(Controller).filter(Controller.active == True).all()
-    
-    demo_credentials = {}
-    for controller in controllers:
-        demo_password = f"password_{controller.employee_id}"
-        demo_credentials[controller.employee_id] = demo_password
+    employee_ids = db.execute(
+        select(Controller.employee_id).where(Controller.active.is_(True))
+    ).scalars().all()
     
-    return demo_credentials
\ No newline at end of file
+    return {employee_id: f"password_{employee_id}" for employee_id in employee_ids}
\ No newline at end of file
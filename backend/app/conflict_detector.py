@@ -4,20 +4,36 @@ Monitors train positions and detects potential conflicts with severity scoring.
 """
 
 import asyncio
+import hashlib
+import json
 import logging
+import os
+import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from typing import List, Dict, Set, Tuple, Optional, Any
+from functools import cached_property
+from typing import List, Dict, Set, Tuple, Optional, Any, Iterator, FrozenSet, NamedTuple, Hashable
 from dataclasses import dataclass
 from enum import Enum
 import math
 from decimal import Decimal
 
+import numpy as np
+import psycopg2
+
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, text
-from .models import Train, Position, Section, Conflict, SectionOccupancy, TrainSchedule, ConflictSeverity
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, func, text, cast, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from .models import Train, Position, Section, Conflict, SectionOccupancy, TrainSchedule, ConflictSeverity, TrainType
 from .db import get_db
 from .websocket_manager import connection_manager
-from .redis_client import RedisClient
+from .redis_client import (
+    RedisClient, DETECTOR_TRAIN_CACHE_TTL, DETECTOR_SECTION_CACHE_TTL,
+    TRAIN_INVALIDATE_CHANNEL, SECTION_INVALIDATE_CHANNEL, TRAIN_META_KEY, SECTION_META_KEY, ACTIVE_TRAINS_KEY,
+    ACTIVE_SECTIONS_KEY
+)
+from ._scan_kernel import NUMBA_AVAILABLE, count_section_pairs, fill_section_pairs
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +60,13 @@ class DetectedConflict:
     predicted_impact_time: datetime
     resolution_suggestions: List[str]
     metadata: Dict[str, Any]
+    is_alertable: bool = False  # Set with the severity score by ConflictDetector
+    
+    @cached_property
+    def alert_key(self) -> str:
+        """Stable id for alerts about the same trains and sections, equal across processes"""
+        key = str((tuple(sorted(self.trains_involved)), tuple(sorted(self.sections_involved))))
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
 
 
 @dataclass
@@ -58,6 +81,303 @@ class TrainPrediction:
     confidence: float  # 0-1
 
 
+# Conflict types produced by the per-section scan in ConflictDetector._detect_all
+PAIRWISE_CONFLICT_TYPES = frozenset({
+    ConflictType.SPATIAL_COLLISION,
+    ConflictType.TEMPORAL_CONFLICT,
+    ConflictType.PRIORITY_CONFLICT,
+    ConflictType.JUNCTION_CONFLICT,
+})
+
+# Severity score (1-10) lower bounds for MEDIUM, HIGH and CRITICAL
+_SEVERITY_THRESHOLDS = (4, 6, 8)
+_SEVERITY_LEVELS = (ConflictSeverity.LOW, ConflictSeverity.MEDIUM, ConflictSeverity.HIGH, ConflictSeverity.CRITICAL)
+
+# Bits per id in packed deduplication keys
+_KEY_ID_BITS = 24
+_KEY_ID_MASK = (1 << _KEY_ID_BITS) - 1
+
+# Safety risk factor per conflict type, indexed by _CONFLICT_TYPE_CODES
+_CONFLICT_TYPE_CODES = {conflict_type: code for code, conflict_type in enumerate(ConflictType)}
+_SAFETY_FACTOR_LUT = np.array([
+    3.0,  # SPATIAL_COLLISION
+    2.0,  # TEMPORAL_CONFLICT
+    1.5,  # PRIORITY_CONFLICT
+    2.5,  # JUNCTION_CONFLICT
+    1.0,  # SECTION_OVERLOAD
+    1.0,  # MAINTENANCE_CONFLICT
+])
+
+# Conflict descriptions, shared by the in-process scan and the SQL backend
+_SPATIAL_DESCRIPTION = "Spatial collision risk: Trains {t1} and {t2} approaching section {section}"
+_TEMPORAL_DESCRIPTION = "Temporal conflict: Insufficient safety buffer ({gap:.1f} min) between trains {t1} and {t2}"
+_PRIORITY_DESCRIPTION = "Priority conflict: Express train {t2} blocked by freight train {t1}"
+_JUNCTION_DESCRIPTION = "Junction conflict: {count} trains converging on junction {section} (capacity: {capacity})"
+
+# Resolution suggestion templates, formatted per conflict
+_SPATIAL_SLOW_LEADER_TEMPLATE = "Reduce speed of train {t1} to allow train {t2} to pass"
+_SPATIAL_SPEED_UP_TEMPLATE = "Increase speed of train {t2} to reduce conflict window"
+_SPATIAL_TEMPLATES = (
+    "Delay train {t2} by 3-5 minutes",
+    "Consider alternative route for train {t2}",
+)
+_TEMPORAL_TEMPLATES = (
+    "Delay train {t2} by {delay:.1f} minutes",
+    "Increase speed of train {t1} to exit section faster",
+    "Implement holding signal for train {t2}",
+)
+_PRIORITY_TEMPLATES = (
+    "Hold freight train {t1} at previous station",
+    "Create express bypass for train {t2}",
+    "Increase priority of train {t2} to {priority}",
+    "Reroute freight train {t1} to alternate track",
+)
+_JUNCTION_TEMPLATES = (
+    "Implement sequential junction crossing with 2-minute intervals",
+    "Hold {hold} trains at approach signals",
+    "Prioritize by train type: Express > Local > Freight",
+    "Consider temporary speed restrictions approaching junction",
+)
+
+
+
+def _spatial_resolutions(train1_id: int, train2_id: int, speed1: float, speed2: float) -> List[str]:
+    """Speed adjustment, then timing adjustment and rerouting"""
+    speed_template = _SPATIAL_SLOW_LEADER_TEMPLATE if speed1 > speed2 else _SPATIAL_SPEED_UP_TEMPLATE
+    return [
+        template.format(t1=train1_id, t2=train2_id)
+        for template in (speed_template,) + _SPATIAL_TEMPLATES
+    ]
+
+
+def _temporal_resolutions(train1_id: int, train2_id: int, needed_delay: float) -> List[str]:
+    """Delay the follower or clear the leader faster"""
+    return [template.format(t1=train1_id, t2=train2_id, delay=needed_delay) for template in _TEMPORAL_TEMPLATES]
+
+
+def _priority_resolutions(train1_id: int, train2_id: int, new_priority: int) -> List[str]:
+    """Hold, bypass or reroute around the blocking freight train"""
+    return [template.format(t1=train1_id, t2=train2_id, priority=new_priority) for template in _PRIORITY_TEMPLATES]
+
+
+def _junction_resolutions(hold_count: int) -> List[str]:
+    """Sequence junction crossings and hold the overflow"""
+    return [template.format(hold=hold_count) for template in _JUNCTION_TEMPLATES]
+
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+
+def _datetime_ns(t: datetime) -> int:
+    """Naive UTC datetime to epoch nanoseconds, comparable with time.time_ns()"""
+    return (t - _EPOCH) // _ONE_MICROSECOND * 1000
+
+
+def _to_epoch_ns(times: List[datetime]) -> np.ndarray:
+    """Convert datetimes to int64 epoch nanoseconds once, so pair math runs on plain integers"""
+    return np.fromiter((_datetime_ns(t) for t in times), dtype=np.int64, count=len(times))
+
+
+def _overlap_ns(interval1: Tuple[int, int], interval2: Tuple[int, int]) -> int:
+    """Overlap of two (start_ns, end_ns) intervals in ns, 0 when they are disjoint"""
+    return max(0, min(interval1[1], interval2[1]) - max(interval1[0], interval2[0]))
+
+
+# Sections with more trains than this use the sorted sweep instead of the dense overlap matrix
+SWEEP_THRESHOLD = 8
+
+
+def _pairs_overlap(arrivals_ns: np.ndarray, exits_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find every pair i < j whose [arrival, exit) intervals overlap.
+    Returns the (i, j) index pairs in row-major order and the overlap of each pair in ns.
+    """
+    overlap = np.minimum.outer(exits_ns, exits_ns) - np.maximum.outer(arrivals_ns, arrivals_ns)
+    pairs = np.argwhere(np.triu(overlap > 0, k=1))
+    return pairs, overlap[pairs[:, 0], pairs[:, 1]]
+
+
+def _sweep_pairs_overlap(arrivals_ns: np.ndarray, exits_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same result as _pairs_overlap for intervals sorted by arrival, in O(n log n + k).
+    Only trains arriving before train i exits can overlap it, so a binary search on the
+    sorted arrivals bounds each train's candidates instead of testing all n².
+    """
+    n = len(arrivals_ns)
+    first = np.arange(1, n + 1)
+    last = np.maximum(np.searchsorted(arrivals_ns, exits_ns, side='left'), first)
+    counts = last - first
+    
+    i = np.repeat(np.arange(n), counts)
+    j = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + i + 1
+    
+    # arrival_j >= arrival_i, so the overlap starts at arrival_j
+    overlap = np.minimum(exits_ns[i], exits_ns[j]) - arrivals_ns[j]
+    keep = overlap > 0
+    return np.column_stack((i[keep], j[keep])), overlap[keep]
+
+
+def _compiled_section_pairs(
+    arrivals_ns: np.ndarray, exits_ns: np.ndarray, segment_end: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same result as _pairs_overlap within each group of arrival-sorted rows, using the
+    parallel Numba kernels; segment_end[i] is the exclusive end of row i's group.
+    Pairs come out ordered by row, so each group's pairs stay contiguous.
+    """
+    n = len(arrivals_ns)
+    counts = np.empty(n, dtype=np.int64)
+    count_section_pairs(arrivals_ns, exits_ns, segment_end, counts)
+    
+    offsets = np.cumsum(counts) - counts
+    size = int(counts.sum())
+    out_i, out_j, out_overlap = (np.empty(size, dtype=np.int64) for _ in range(3))
+    fill_section_pairs(arrivals_ns, exits_ns, segment_end, offsets, out_i, out_j, out_overlap)
+    return np.column_stack((out_i, out_j)), out_overlap
+
+
+def _later_overlap_spans(arrivals_ns: np.ndarray, exits_ns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For intervals sorted by arrival, the exclusive end of each train's run of later
+    overlapping candidates and how many of them actually overlap, in O(n log n).
+    Every train arriving after i and before i exits overlaps it unless its own interval
+    is empty, so a prefix sum over non-empty intervals counts them without forming pairs.
+    """
+    n = len(arrivals_ns)
+    first = np.arange(1, n + 1)
+    ends = np.maximum(np.searchsorted(arrivals_ns, exits_ns, side='left'), first)
+    non_empty = np.concatenate(([0], np.cumsum(exits_ns > arrivals_ns)))
+    return ends, non_empty[ends] - non_empty[first]
+
+
+def _pack_conflict_key(conflict_type: ConflictType, sections: List[int], trains: List[int]) -> Hashable:
+    """
+    Pack the type code, sorted section ids and sorted train ids into one int,
+    _KEY_ID_BITS per id; ids too large for that fall back to a tuple key.
+    """
+    if len(trains) == 2:
+        t1, t2 = trains
+        train_ids = (t1, t2) if t1 < t2 else (t2, t1)
+    else:
+        train_ids = sorted(trains)
+    section_ids = sections if len(sections) == 1 else sorted(sections)
+    
+    if train_ids[-1] > _KEY_ID_MASK or section_ids[-1] > _KEY_ID_MASK:
+        return (tuple(train_ids), tuple(section_ids), conflict_type)
+    
+    # The section count keeps section and train fields from shifting into each other
+    key = _CONFLICT_TYPE_CODES[conflict_type] << _KEY_ID_BITS | len(section_ids)
+    for section_id in section_ids:
+        key = key << _KEY_ID_BITS | section_id
+    for train_id in train_ids:
+        key = key << _KEY_ID_BITS | train_id
+    return key
+
+
+class _RawConflict(NamedTuple):
+    """
+    A conflict as found by the section scan, before deduplication.
+    rows are PredictionTable row indices (reference train first); value_ns is the
+    overlap or gap for spatial/temporal conflicts and 0 otherwise.
+    """
+    conflict_type: ConflictType
+    rows: Tuple[int, ...]
+    value_ns: int
+
+
+# Enum ordinals used to pack snapshots for Redis
+_TRAIN_TYPES = tuple(TrainType)
+_TRAIN_TYPE_CODES = {train_type: code for code, train_type in enumerate(_TRAIN_TYPES)}
+
+
+class TrainMeta(NamedTuple):
+    """Fields of an active train the detector reads, packed positionally for Redis"""
+    id: int
+    priority: int
+    type: TrainType
+    max_speed_kmh: int
+    current_load: int
+
+    @classmethod
+    def unpack(cls, train_id: int, packed: List[int]) -> "TrainMeta":
+        priority, type_code, max_speed_kmh, current_load = packed
+        return cls(train_id, priority, _TRAIN_TYPES[type_code], max_speed_kmh, current_load)
+
+    def pack(self) -> List[int]:
+        return [self.priority, _TRAIN_TYPE_CODES[self.type], self.max_speed_kmh, self.current_load]
+
+
+class SectionMeta(NamedTuple):
+    """Fields of an active section the detector reads, packed positionally for Redis"""
+    id: int
+    section_type: str
+    capacity: int
+    length_meters: float
+
+    @classmethod
+    def unpack(cls, section_id: int, packed: List[Any]) -> "SectionMeta":
+        section_type, capacity, length_meters = packed
+        return cls(section_id, section_type, capacity, length_meters)
+
+    def pack(self) -> List[Any]:
+        return [self.section_type, self.capacity, self.length_meters]
+
+
+# Channels the cache triggers (migration 004) notify with the changed row id
+TRAIN_CHANGED_CHANNEL = 'train_changed'
+SECTION_CHANGED_CHANNEL = 'section_changed'
+
+# Backoff bounds, in seconds, for re-establishing a lost invalidation subscription
+# (Redis pub/sub or the database LISTEN connection)
+INVALIDATION_RESUBSCRIBE_MIN_DELAY = 1
+INVALIDATION_RESUBSCRIBE_MAX_DELAY = 60
+
+
+@dataclass
+class PredictionTable:
+    """
+    Columnar view of one prediction batch.
+    Built once per detection cycle; `sections` maps each section id (in first-seen order)
+    to its row indices sorted by arrival time, so detectors share a single grouping pass.
+    """
+    predictions: List[TrainPrediction]
+    train_ids: np.ndarray
+    section_ids: np.ndarray
+    arrival_ns: np.ndarray
+    exit_ns: np.ndarray
+    speed: np.ndarray
+    confidence: np.ndarray
+    sections: Dict[int, np.ndarray]
+
+    @classmethod
+    def from_predictions(cls, predictions: List[TrainPrediction]) -> "PredictionTable":
+        n = len(predictions)
+        train_ids = np.fromiter((p.train_id for p in predictions), dtype=np.int64, count=n)
+        section_ids = np.fromiter((p.section_id for p in predictions), dtype=np.int64, count=n)
+        arrival_ns = _to_epoch_ns([p.arrival_time for p in predictions])
+        exit_ns = _to_epoch_ns([p.exit_time for p in predictions])
+        speed = np.fromiter((p.speed_kmh for p in predictions), dtype=np.float64, count=n)
+        confidence = np.fromiter((p.confidence for p in predictions), dtype=np.float64, count=n)
+
+        sections = {}
+        if n:
+            unique_ids, first_seen, inverse = np.unique(section_ids, return_index=True, return_inverse=True)
+            # Stable sort by (section, arrival) keeps insertion order for equal arrivals
+            order = np.lexsort((arrival_ns, inverse))
+            buckets = np.split(order, np.flatnonzero(np.diff(inverse[order])) + 1)
+            for k in np.argsort(first_seen, kind='stable'):
+                sections[int(unique_ids[k])] = buckets[k]
+
+        return cls(predictions, train_ids, section_ids, arrival_ns, exit_ns, speed, confidence, sections)
+
+    def rows(self, indices: np.ndarray) -> List[TrainPrediction]:
+        """Predictions for the given row indices, in index order"""
+        return [self.predictions[i] for i in indices.tolist()]
+
+
 class ConflictDetector:
     """
     Real-time conflict detection engine for railway traffic management.
@@ -77,6 +397,9 @@ class ConflictDetector:
         self.detection_interval_seconds = 30
         self.alert_threshold_minutes = 5
         
+        # Predict and scan in PostgreSQL with detect_section_conflicts() (migration 003)
+        self.use_sql_detection = os.getenv('CONFLICT_DETECTION_SQL', 'false').lower() == 'true'
+        
         # Conflict severity weights
         self.severity_weights = {
             'time_factor': 0.3,  # How soon the conflict will occur
@@ -92,13 +415,40 @@ class ConflictDetector:
             'conflicts_resolved': 0,
             'false_positives': 0,
             'detection_time_ms': 0,
-            'predictions_made': 0
+            'predictions_made': 0,
+            'alerts_suppressed': 0
         }
         
-        # Cache for frequent queries
+        # Cache for frequent queries: in-process L1 backed by Redis (L2), kept fresh by
+        # invalidation messages; the expiry only forces a periodic full reload as a safety net
         self._active_trains_cache = {}
         self._section_cache = {}
         self._cache_expiry = datetime.utcnow()
+        self._cache_safety_ttl = timedelta(minutes=int(os.getenv('CACHE_SAFETY_REFRESH_MINUTES', '60')))
+        # Invalidations arriving within this window are applied together with one HMGET per hash
+        self._invalidation_debounce = int(os.getenv('CACHE_INVALIDATION_DEBOUNCE_MS', '50')) / 1000
+        self._pending_trains: Set[int] = set()
+        self._pending_sections: Set[int] = set()
+        self._invalidation_flush: Optional[asyncio.Task] = None
+        self._stale_trains: Set[int] = set()
+        self._stale_sections: Set[int] = set()
+        self._invalidation_task: Optional[asyncio.Task] = None
+        self._change_listener = None  # Pooled connection LISTENing for trigger notifications
+        self._change_listener_fd: Optional[int] = None
+        self._change_listener_retry: Optional[asyncio.TimerHandle] = None
+        self._change_listener_delay = INVALIDATION_RESUBSCRIBE_MIN_DELAY
+        
+        # Severity inputs indexed by train id, derived from _active_trains_cache
+        self._priority_vec = np.zeros(1, dtype=np.int8)
+        self._load_vec = np.zeros(1, dtype=np.int32)
+        self._train_valid_vec = np.ones(1, dtype=bool)
+        self._train_vectors_source = None
+        
+        # Planned route per train as (section_id, length_meters), reloaded every detection tick
+        self._route_cache: Dict[int, List[Tuple[int, float]]] = {}
+        
+        # Snapshot of the current time for one detection pass, in epoch ns
+        self._now_ns = time.time_ns()
         
     async def detect_conflicts(self) -> List[DetectedConflict]:
         """
@@ -106,37 +456,34 @@ class ConflictDetector:
         Returns list of detected conflicts sorted by severity.
         """
         start_time = datetime.utcnow()
+        start_counter = time.perf_counter()
         detected_conflicts = []
         
         try:
-            # Update cache if expired
-            if datetime.utcnow() > self._cache_expiry:
+            # Update cache if expired, otherwise reload only entries invalidated since the last tick
+            if start_time > self._cache_expiry:
                 await self._update_cache()
+            elif self._stale_trains or self._stale_sections:
+                await self._refresh_stale_entries()
             
-            # Get active trains and their predictions
-            train_predictions = await self._get_train_predictions()
-            
-            if len(train_predictions) < 2:
-                logger.debug("Less than 2 active trains, skipping conflict detection")
-                return []
-            
-            # Detect different types of conflicts
-            spatial_conflicts = await self._detect_spatial_conflicts(train_predictions)
-            temporal_conflicts = await self._detect_temporal_conflicts(train_predictions)
-            priority_conflicts = await self._detect_priority_conflicts(train_predictions)
-            junction_conflicts = await self._detect_junction_conflicts(train_predictions)
-            
-            # Combine all conflicts
-            all_conflicts = (
-                spatial_conflicts + temporal_conflicts + 
-                priority_conflicts + junction_conflicts
-            )
-            
-            # Remove duplicates and calculate final severity
-            detected_conflicts = await self._process_conflicts(all_conflicts)
+            if self.use_sql_detection:
+                detected_conflicts = await self._detect_all_sql()
+            else:
+                # Get active trains and their predictions
+                train_predictions = await self._get_train_predictions()
+                
+                if len(train_predictions) < 2:
+                    logger.debug("Less than 2 active trains, skipping conflict detection")
+                    return []
+                
+                # Group by section once into a columnar table
+                table = PredictionTable.from_predictions(train_predictions)
+                
+                # Detect, deduplicate and score all conflict types in one pass over the section groups
+                detected_conflicts = await self._detect_all(train_predictions, table)
             
             # Update metrics
-            detection_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+            detection_time = (time.perf_counter() - start_counter) * 1000
             self.metrics['detection_time_ms'] = detection_time
             self.metrics['conflicts_detected'] += len(detected_conflicts)
             
@@ -150,46 +497,44 @@ class ConflictDetector:
     
     async def _get_train_predictions(self) -> List[TrainPrediction]:
         """Get predicted positions for all active trains within prediction window"""
-        predictions = []
         current_time = datetime.utcnow()
         prediction_end = current_time + timedelta(minutes=self.prediction_window_minutes)
         
         try:
-            # Get active trains with their latest positions
+            # Get active trains with their latest positions; the lateral LIMIT 1 is a single
+            # seek per train on idx_positions_train_time instead of sorting every recent position.
+            # Numeric columns are cast to float8 so rows arrive as floats, not Decimals.
             query = """
-                SELECT DISTINCT ON (t.id) 
+                SELECT
                     t.id, t.train_number, t.type, t.speed_kmh, t.max_speed_kmh,
                     t.priority, t.capacity, t.current_load, t.current_section_id,
-                    p.section_id, p.speed_kmh as current_speed, p.timestamp,
-                    p.distance_from_start, s.length_meters, s.max_speed_kmh as section_max_speed
+                    p.section_id, COALESCE(p.speed_kmh, 0)::float8 as current_speed, p.timestamp,
+                    COALESCE(p.distance_from_start, 0)::float8 as distance_from_start,
+                    COALESCE(s.length_meters, 1000)::float8 as length_meters,
+                    s.max_speed_kmh as section_max_speed
                 FROM trains t
-                LEFT JOIN positions p ON t.id = p.train_id
+                CROSS JOIN LATERAL (
+                    SELECT section_id, speed_kmh, timestamp, distance_from_start
+                    FROM positions
+                    WHERE train_id = t.id
+                        AND timestamp > :time_threshold
+                    ORDER BY timestamp DESC
+                    LIMIT 1
+                ) p
                 LEFT JOIN sections s ON p.section_id = s.id
                 WHERE t.operational_status = 'active'
-                    AND p.timestamp > :time_threshold
-                ORDER BY t.id, p.timestamp DESC
+                ORDER BY t.id
             """
             
-            result = self.db.execute(
-                text(query),
-                {"time_threshold": current_time - timedelta(minutes=10)}
-            ).fetchall()
+            result = await run_in_threadpool(
+                self._fetch_all, query, {"time_threshold": current_time - timedelta(minutes=10)}
+            )
             
-            for row in result:
-                if not row.section_id:
-                    continue
-                
-                train_prediction = await self._predict_train_path(
-                    train_id=row.id,
-                    current_section_id=row.section_id,
-                    current_speed=float(row.current_speed or 0),
-                    max_speed=row.max_speed_kmh,
-                    distance_from_start=float(row.distance_from_start or 0),
-                    section_length=float(row.length_meters or 1000),
-                    prediction_end=prediction_end
-                )
-                
-                predictions.extend(train_prediction)
+            # Prefetch every route in one batch instead of two queries per train
+            moving = [row for row in result if row.section_id and row.current_speed > 0]
+            await self._load_routes([row.id for row in moving])
+            
+            predictions = self._predict_train_paths(moving, current_time, prediction_end)
             
             self.metrics['predictions_made'] = len(predictions)
             return predictions
@@ -198,213 +543,304 @@ class ConflictDetector:
             logger.error(f"Error getting train predictions: {e}")
             return []
     
-    async def _predict_train_path(
-        self, 
-        train_id: int, 
-        current_section_id: int, 
-        current_speed: float,
-        max_speed: int,
-        distance_from_start: float,
-        section_length: float,
+    def _predict_train_paths(
+        self,
+        rows: List[Any],
+        current_time: datetime,
         prediction_end: datetime
     ) -> List[TrainPrediction]:
-        """Predict train path for the next hour"""
-        predictions = []
-        current_time = datetime.utcnow()
-        
-        try:
-            # Time to exit current section
-            remaining_distance = section_length - distance_from_start
-            if current_speed > 0:
-                time_to_exit = remaining_distance / (current_speed * 1000 / 60)  # Convert to minutes
-                exit_time = current_time + timedelta(minutes=time_to_exit)
-                
-                if exit_time <= prediction_end:
-                    predictions.append(TrainPrediction(
-                        train_id=train_id,
-                        section_id=current_section_id,
-                        arrival_time=current_time,
-                        exit_time=exit_time,
-                        speed_kmh=current_speed,
-                        distance_to_section=0,
-                        confidence=0.9
-                    ))
-                
-                # Get scheduled route for future sections
-                future_sections = await self._get_train_route(train_id, current_section_id)
-                
-                simulation_time = exit_time
-                for next_section_id, section_length in future_sections:
-                    if simulation_time > prediction_end:
-                        break
-                    
-                    # Estimate section traverse time
-                    section_speed = min(current_speed, max_speed)
-                    traverse_time = section_length / (section_speed * 1000 / 60)
-                    
-                    arrival_time = simulation_time
-                    exit_time = simulation_time + timedelta(minutes=traverse_time)
-                    
-                    predictions.append(TrainPrediction(
-                        train_id=train_id,
-                        section_id=next_section_id,
-                        arrival_time=arrival_time,
-                        exit_time=exit_time,
-                        speed_kmh=section_speed,
-                        distance_to_section=(simulation_time - current_time).total_seconds() / 60 * section_speed,
-                        confidence=max(0.5, 0.9 - len(predictions) * 0.1)  # Confidence decreases over time
-                    ))
-                    
-                    simulation_time = exit_time
-            
-            return predictions
-            
-        except Exception as e:
-            logger.error(f"Error predicting path for train {train_id}: {e}")
+        """
+        Predict the path of every moving train for the next hour.
+        Train state is laid out as parallel arrays and the remaining route sections of all
+        trains as one flat array, so exit and arrival times come from a few NumPy passes.
+        """
+        n = len(rows)
+        if not n:
             return []
-    
-    async def _detect_spatial_conflicts(self, predictions: List[TrainPrediction]) -> List[DetectedConflict]:
-        """Detect two trains approaching the same track section"""
-        conflicts = []
         
-        # Group predictions by section
-        section_predictions = {}
-        for pred in predictions:
-            if pred.section_id not in section_predictions:
-                section_predictions[pred.section_id] = []
-            section_predictions[pred.section_id].append(pred)
+        window_min = (prediction_end - current_time).total_seconds() / 60
+        speed = np.fromiter((row.current_speed for row in rows), dtype=np.float64, count=n)
+        max_speed = np.fromiter((row.max_speed_kmh for row in rows), dtype=np.float64, count=n)
+        remaining = np.fromiter(
+            (row.length_meters - row.distance_from_start for row in rows), dtype=np.float64, count=n
+        )
         
-        # Check each section for conflicts
-        for section_id, preds in section_predictions.items():
-            if len(preds) < 2:
-                continue
-            
-            # Check section capacity
-            section = self._section_cache.get(section_id)
-            if not section:
-                continue
-            
-            # Sort by arrival time
-            preds.sort(key=lambda x: x.arrival_time)
-            
-            for i in range(len(preds) - 1):
-                for j in range(i + 1, len(preds)):
-                    pred1, pred2 = preds[i], preds[j]
-                    
-                    # Check if trains will overlap in time
-                    overlap = self._calculate_time_overlap(pred1, pred2)
-                    if overlap > 0 and section.capacity == 1:  # Single track conflict
-                        
-                        time_to_impact = (pred1.arrival_time - datetime.utcnow()).total_seconds() / 60
-                        severity = await self._calculate_severity(
-                            conflict_type=ConflictType.SPATIAL_COLLISION,
-                            trains=[pred1.train_id, pred2.train_id],
-                            time_to_impact=time_to_impact,
-                            sections=[section_id]
-                        )
-                        
-                        conflicts.append(DetectedConflict(
-                            conflict_type=ConflictType.SPATIAL_COLLISION,
-                            severity_score=severity,
-                            trains_involved=[pred1.train_id, pred2.train_id],
-                            sections_involved=[section_id],
-                            time_to_impact=time_to_impact,
-                            description=f"Spatial collision risk: Trains {pred1.train_id} and {pred2.train_id} approaching section {section_id}",
-                            predicted_impact_time=pred1.arrival_time,
-                            resolution_suggestions=await self._generate_spatial_resolutions(pred1, pred2, section),
-                            metadata={
-                                'overlap_minutes': overlap,
-                                'section_capacity': section.capacity,
-                                'train1_speed': pred1.speed_kmh,
-                                'train2_speed': pred2.speed_kmh
-                            }
-                        ))
+        # Time to exit current section, in minutes from now
+        exit_min = remaining / (speed * 1000 / 60)
+        in_window = (exit_min <= window_min).tolist()
         
-        return conflicts
-    
-    async def _detect_temporal_conflicts(self, predictions: List[TrainPrediction]) -> List[DetectedConflict]:
-        """Detect scheduled arrivals within 2-minute safety buffer"""
-        conflicts = []
+        # Flatten the remaining route of every train whose current section ends inside the window
+        routes = [
+            self._get_train_route(row.id, row.section_id) if in_window[i] else []
+            for i, row in enumerate(rows)
+        ]
+        route_counts = np.fromiter((len(route) for route in routes), dtype=np.intp, count=n)
+        owner = np.repeat(np.arange(n), route_counts)
+        lengths = np.fromiter(
+            (length for route in routes for _, length in route), dtype=np.float64, count=len(owner)
+        )
+        
+        # Estimate section traverse times and chain them per train from the current exit
+        section_speed = np.minimum(speed, max_speed)[owner]
+        traverse_min = lengths / (section_speed * 1000 / 60)
+        cumulative = np.cumsum(traverse_min)
+        route_start = np.cumsum(route_counts) - route_counts
+        before_route = np.concatenate(([0.0], cumulative))[route_start][owner]
+        future_exit_min = exit_min[owner] + cumulative - before_route
+        future_arrival_min = future_exit_min - traverse_min
         
-        # Group by section
-        section_predictions = {}
-        for pred in predictions:
-            if pred.section_id not in section_predictions:
-                section_predictions[pred.section_id] = []
-            section_predictions[pred.section_id].append(pred)
+        arrival_list = future_arrival_min.tolist()
+        exit_list = future_exit_min.tolist()
+        section_speed_list = section_speed.tolist()
+        exit_min_list = exit_min.tolist()
         
-        for section_id, preds in section_predictions.items():
-            if len(preds) < 2:
+        predictions = []
+        k = 0
+        for i, row in enumerate(rows):
+            if not in_window[i]:
                 continue
             
-            preds.sort(key=lambda x: x.arrival_time)
+            predictions.append(TrainPrediction(
+                train_id=row.id,
+                section_id=row.section_id,
+                arrival_time=current_time,
+                exit_time=current_time + timedelta(minutes=exit_min_list[i]),
+                speed_kmh=row.current_speed,
+                distance_to_section=0,
+                confidence=0.9
+            ))
             
-            for i in range(len(preds) - 1):
-                pred1, pred2 = preds[i], preds[i + 1]
-                
-                # Check if arrivals are within safety buffer
-                time_diff = (pred2.arrival_time - pred1.exit_time).total_seconds() / 60
-                
-                if 0 < time_diff < self.safety_buffer_minutes:
-                    time_to_impact = (pred1.arrival_time - datetime.utcnow()).total_seconds() / 60
-                    severity = await self._calculate_severity(
-                        conflict_type=ConflictType.TEMPORAL_CONFLICT,
-                        trains=[pred1.train_id, pred2.train_id],
-                        time_to_impact=time_to_impact,
-                        sections=[section_id]
-                    )
-                    
-                    conflicts.append(DetectedConflict(
-                        conflict_type=ConflictType.TEMPORAL_CONFLICT,
-                        severity_score=severity,
-                        trains_involved=[pred1.train_id, pred2.train_id],
-                        sections_involved=[section_id],
-                        time_to_impact=time_to_impact,
-                        description=f"Temporal conflict: Insufficient safety buffer ({time_diff:.1f} min) between trains {pred1.train_id} and {pred2.train_id}",
-                        predicted_impact_time=pred1.arrival_time,
-                        resolution_suggestions=await self._generate_temporal_resolutions(pred1, pred2, time_diff),
-                        metadata={
-                            'safety_buffer': time_diff,
-                            'required_buffer': self.safety_buffer_minutes
-                        }
-                    ))
+            for step, (next_section_id, _) in enumerate(routes[i]):
+                arrival = arrival_list[k + step]
+                if arrival > window_min:
+                    break
+                predictions.append(TrainPrediction(
+                    train_id=row.id,
+                    section_id=next_section_id,
+                    arrival_time=current_time + timedelta(minutes=arrival),
+                    exit_time=current_time + timedelta(minutes=exit_list[k + step]),
+                    speed_kmh=section_speed_list[k + step],
+                    distance_to_section=arrival * section_speed_list[k + step],
+                    confidence=max(0.5, 0.8 - step * 0.1)  # Confidence decreases over time
+                ))
+            k += len(routes[i])
         
-        return conflicts
+        return predictions
     
-    async def _detect_priority_conflicts(self, predictions: List[TrainPrediction]) -> List[DetectedConflict]:
-        """Detect express trains blocked by slower freight trains"""
-        conflicts = []
+    async def _detect_all(
+        self,
+        predictions: List[TrainPrediction],
+        table: Optional[PredictionTable] = None,
+        kinds: FrozenSet[ConflictType] = PAIRWISE_CONFLICT_TYPES
+    ) -> List[DetectedConflict]:
+        """Run every pairwise detector in a single pass over the per-section groups"""
+        if table is None:
+            table = PredictionTable.from_predictions(predictions)
+        
+        self._now_ns = time.time_ns()
         
         # Get train priorities and types
         train_info = {}
-        for pred in predictions:
-            if pred.train_id not in train_info:
-                train = self._active_trains_cache.get(pred.train_id)
+        if ConflictType.PRIORITY_CONFLICT in kinds:
+            for train_id in np.unique(table.train_ids).tolist():
+                train = self._active_trains_cache.get(train_id)
                 if train:
-                    train_info[pred.train_id] = {
+                    train_info[train_id] = {
                         'priority': train.priority,
                         'type': train.type,
                         'max_speed': train.max_speed_kmh
                     }
         
-        # Group by section and check for priority conflicts
-        section_predictions = {}
-        for pred in predictions:
-            if pred.section_id not in section_predictions:
-                section_predictions[pred.section_id] = []
-            section_predictions[pred.section_id].append(pred)
+        # With Numba, every single-track section is scanned in one parallel kernel call
+        spatial_pairs = {}
+        if NUMBA_AVAILABLE and ConflictType.SPATIAL_COLLISION in kinds:
+            spatial_pairs = self._single_track_pairs(table)
         
-        for section_id, preds in section_predictions.items():
-            if len(preds) < 2:
+        # Duplicates are dropped as they are emitted; only survivors get descriptions and suggestions
+        conflicts = []
+        seen_combinations = set()
+        train_ids = table.train_ids.tolist()
+        for section_id, rows in table.sections.items():
+            if len(rows) < 2:
                 continue
             
-            preds.sort(key=lambda x: x.arrival_time)
+            section = self._section_cache.get(section_id)
+            for raw in self._scan_section(
+                rows, table, section, train_info, kinds, spatial_pairs.get(section_id)
+            ):
+                key = _pack_conflict_key(raw.conflict_type, [section_id], [train_ids[row] for row in raw.rows])
+                if key not in seen_combinations:
+                    seen_combinations.add(key)
+                    materialize = self._materializers[raw.conflict_type]
+                    conflicts.append(materialize(self, raw, section_id, table, section, train_info))
+        
+        self._score_conflicts(conflicts)
+        return conflicts
+    
+    def _single_track_pairs(self, table: PredictionTable) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Overlapping pairs and overlaps of every single-track section, with section-local row indices"""
+        groups = []
+        for section_id, rows in table.sections.items():
+            section = self._section_cache.get(section_id)
+            if len(rows) > 1 and section is not None and section.capacity == 1:
+                groups.append((section_id, rows))
+        if not groups:
+            return {}
+        
+        rows = np.concatenate([section_rows for _, section_rows in groups])
+        sizes = np.fromiter((len(section_rows) for _, section_rows in groups), dtype=np.int64, count=len(groups))
+        ends = np.cumsum(sizes)
+        pairs, overlap_ns = _compiled_section_pairs(
+            table.arrival_ns[rows], table.exit_ns[rows], np.repeat(ends, sizes)
+        )
+        
+        # Split the row-ordered pairs back into their sections
+        bounds = np.searchsorted(pairs[:, 0], ends).tolist()
+        result = {}
+        lo = 0
+        for (section_id, _), start, hi in zip(groups, (ends - sizes).tolist(), bounds):
+            result[section_id] = (pairs[lo:hi] - start, overlap_ns[lo:hi])
+            lo = hi
+        return result
+    
+    async def _detect_all_sql(self) -> List[DetectedConflict]:
+        """
+        Run prediction and the section scan inside PostgreSQL via detect_section_conflicts().
+        Python only adds descriptions, suggestions and severity to the returned rows.
+        """
+        self._now_ns = time.time_ns()
+        
+        rows = await run_in_threadpool(
+            self._fetch_all,
+            "SELECT * FROM detect_section_conflicts(:window_min, :buffer_min)",
+            {"window_min": self.prediction_window_minutes, "buffer_min": self.safety_buffer_minutes}
+        )
+        
+        conflicts = []
+        seen_combinations = set()
+        for row in rows:
+            conflict = self._conflict_from_row(row)
+            key = self._conflict_key(conflict)
+            if key not in seen_combinations:
+                seen_combinations.add(key)
+                conflicts.append(conflict)
+        
+        self._score_conflicts(conflicts)
+        return conflicts
+    
+    def _conflict_from_row(self, row: Any) -> DetectedConflict:
+        """Build a DetectedConflict from a detect_section_conflicts() row"""
+        conflict_type = ConflictType(row.conflict_type)
+        train_ids = list(row.train_ids)
+        train1_id, train2_id = train_ids[0], train_ids[-1]
+        metadata = dict(row.metadata)
+        
+        if conflict_type == ConflictType.SPATIAL_COLLISION:
+            description = _SPATIAL_DESCRIPTION.format(t1=train1_id, t2=train2_id, section=row.section_id)
+            suggestions = _spatial_resolutions(
+                train1_id, train2_id, metadata['train1_speed'], metadata['train2_speed']
+            )
+        elif conflict_type == ConflictType.TEMPORAL_CONFLICT:
+            gap = metadata['safety_buffer']
+            description = _TEMPORAL_DESCRIPTION.format(gap=gap, t1=train1_id, t2=train2_id)
+            suggestions = _temporal_resolutions(train1_id, train2_id, self.safety_buffer_minutes - gap + 0.5)
+        elif conflict_type == ConflictType.PRIORITY_CONFLICT:
+            description = _PRIORITY_DESCRIPTION.format(t1=train1_id, t2=train2_id)
+            suggestions = _priority_resolutions(train1_id, train2_id, metadata['blocked_train_priority'] + 1)
+        else:
+            description = _JUNCTION_DESCRIPTION.format(
+                count=metadata['trains_count'], section=row.section_id, capacity=metadata['junction_capacity']
+            )
+            suggestions = _junction_resolutions(metadata['overflow'])
+        
+        return DetectedConflict(
+            conflict_type=conflict_type,
+            severity_score=0,  # Scored in batch by _detect_all_sql
+            trains_involved=train_ids,
+            sections_involved=[row.section_id],
+            time_to_impact=(_datetime_ns(row.impact_time) - self._now_ns) / NS_PER_MINUTE,
+            description=description,
+            predicted_impact_time=row.impact_time,
+            resolution_suggestions=suggestions,
+            metadata=metadata
+        )
+    
+    def _score_conflicts(self, conflicts: List[DetectedConflict]):
+        """Set severity_score on every conflict with one batch calculation"""
+        if not conflicts:
+            return
+        
+        scores = self._calculate_severity_batch(
+            [c.conflict_type for c in conflicts],
+            [c.trains_involved for c in conflicts],
+            [c.time_to_impact for c in conflicts],
+            [c.sections_involved for c in conflicts]
+        )
+        for conflict, score in zip(conflicts, scores.tolist()):
+            conflict.severity_score = score
+            conflict.is_alertable = (
+                score >= 6 and conflict.time_to_impact <= self.alert_threshold_minutes
+            )
+    
+    def _scan_section(
+        self,
+        rows: np.ndarray,
+        table: PredictionTable,
+        section: Optional[Section],
+        train_info: Dict[int, Dict[str, Any]],
+        kinds: FrozenSet[ConflictType],
+        spatial_pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+    ) -> Iterator[_RawConflict]:
+        """
+        Emit every conflict type for one section from its arrival-ordered trains.
+        The overlap matrix and consecutive gaps are computed once and shared by all checks;
+        spatial_pairs, when given, are this section's overlaps from _single_track_pairs.
+        """
+        # Rows are already sorted by arrival time
+        arrivals_ns = table.arrival_ns[rows]
+        exits_ns = table.exit_ns[rows]
+        row_ids = rows.tolist()
+        
+        single_track = (
+            ConflictType.SPATIAL_COLLISION in kinds
+            and section is not None and section.capacity == 1
+        )
+        junction = (
+            ConflictType.JUNCTION_CONFLICT in kinds
+            and section is not None and section.section_type == 'junction'
+        )
+        
+        # Spatial: two trains overlapping on a single-track section
+        if single_track:
+            if spatial_pairs is not None:
+                pairs, overlap_ns = spatial_pairs
+            elif len(row_ids) > SWEEP_THRESHOLD:
+                pairs, overlap_ns = _sweep_pairs_overlap(arrivals_ns, exits_ns)
+            else:
+                pairs, overlap_ns = _pairs_overlap(arrivals_ns, exits_ns)
+            
+            for (i, j), pair_overlap_ns in zip(pairs.tolist(), overlap_ns.tolist()):
+                yield _RawConflict(ConflictType.SPATIAL_COLLISION, (row_ids[i], row_ids[j]), pair_overlap_ns)
+        
+        # Temporal and priority: each train against the next one to arrive
+        check_temporal = ConflictType.TEMPORAL_CONFLICT in kinds
+        check_priority = ConflictType.PRIORITY_CONFLICT in kinds and bool(train_info)
+        if check_temporal or check_priority:
+            gaps_ns = arrivals_ns[1:] - exits_ns[:-1]
+            buffer_ns = int(self.safety_buffer_minutes * NS_PER_MINUTE)
+            short_gap = ((gaps_ns > 0) & (gaps_ns < buffer_ns)).tolist()
+            gaps = gaps_ns.tolist()
+            train_ids = table.train_ids[rows].tolist()
             
-            for i in range(len(preds) - 1):
-                pred1, pred2 = preds[i], preds[i + 1]
+            for i in range(len(row_ids) - 1):
+                if check_temporal and short_gap[i]:
+                    yield _RawConflict(ConflictType.TEMPORAL_CONFLICT, (row_ids[i], row_ids[i + 1]), gaps[i])
+                
+                if not check_priority:
+                    continue
                 
-                train1_info = train_info.get(pred1.train_id)
-                train2_info = train_info.get(pred2.train_id)
+                train1_info = train_info.get(train_ids[i])
+                train2_info = train_info.get(train_ids[i + 1])
                 
                 if not train1_info or not train2_info:
                     continue
@@ -413,90 +849,149 @@ class ConflictDetector:
                 if (train2_info['priority'] > train1_info['priority'] and 
                     train2_info['type'].value == 'express' and 
                     train1_info['type'].value == 'freight'):
-                    
-                    time_to_impact = (pred2.arrival_time - datetime.utcnow()).total_seconds() / 60
-                    severity = await self._calculate_severity(
-                        conflict_type=ConflictType.PRIORITY_CONFLICT,
-                        trains=[pred1.train_id, pred2.train_id],
-                        time_to_impact=time_to_impact,
-                        sections=[section_id]
-                    )
-                    
-                    conflicts.append(DetectedConflict(
-                        conflict_type=ConflictType.PRIORITY_CONFLICT,
-                        severity_score=severity,
-                        trains_involved=[pred1.train_id, pred2.train_id],
-                        sections_involved=[section_id],
-                        time_to_impact=time_to_impact,
-                        description=f"Priority conflict: Express train {pred2.train_id} blocked by freight train {pred1.train_id}",
-                        predicted_impact_time=pred2.arrival_time,
-                        resolution_suggestions=await self._generate_priority_resolutions(pred1, pred2, train1_info, train2_info),
-                        metadata={
-                            'blocking_train_priority': train1_info['priority'],
-                            'blocked_train_priority': train2_info['priority'],
-                            'speed_difference': train2_info['max_speed'] - train1_info['max_speed']
-                        }
-                    ))
+                    yield _RawConflict(ConflictType.PRIORITY_CONFLICT, (row_ids[i], row_ids[i + 1]), 0)
         
-        return conflicts
+        # Junction: a train plus every later train overlapping it exceeds capacity
+        if junction:
+            # Counted from sorted arrivals; trains are only listed for sections over capacity
+            ends, later_counts = _later_overlap_spans(arrivals_ns, exits_ns)
+            non_empty = (exits_ns > arrivals_ns).tolist()
+            
+            for i in np.flatnonzero(later_counts[:-1] + 1 > section.capacity).tolist():
+                later = [row_ids[j] for j in range(i + 1, ends[i]) if non_empty[j]]
+                yield _RawConflict(ConflictType.JUNCTION_CONFLICT, (row_ids[i], *later), 0)
+    
+    def _time_to_impact(self, table: PredictionTable, row: int) -> float:
+        """Minutes from the start of this detection pass until the prediction's arrival"""
+        return (int(table.arrival_ns[row]) - self._now_ns) / NS_PER_MINUTE
+    
+    def _materialize_spatial(
+        self, raw: _RawConflict, section_id: int, table: PredictionTable,
+        section: Any, train_info: Dict[int, Dict[str, Any]]
+    ) -> DetectedConflict:
+        pred1, pred2 = (table.predictions[row] for row in raw.rows)
+        return DetectedConflict(
+            conflict_type=ConflictType.SPATIAL_COLLISION,
+            severity_score=0,  # Scored in batch by _detect_all
+            trains_involved=[pred1.train_id, pred2.train_id],
+            sections_involved=[section_id],
+            time_to_impact=self._time_to_impact(table, raw.rows[0]),
+            description=_SPATIAL_DESCRIPTION.format(t1=pred1.train_id, t2=pred2.train_id, section=section_id),
+            predicted_impact_time=pred1.arrival_time,
+            resolution_suggestions=self._generate_spatial_resolutions(pred1, pred2, section),
+            metadata={
+                'overlap_minutes': raw.value_ns / NS_PER_MINUTE,
+                'section_capacity': section.capacity,
+                'train1_speed': pred1.speed_kmh,
+                'train2_speed': pred2.speed_kmh
+            }
+        )
+    
+    def _materialize_temporal(
+        self, raw: _RawConflict, section_id: int, table: PredictionTable,
+        section: Any, train_info: Dict[int, Dict[str, Any]]
+    ) -> DetectedConflict:
+        pred1, pred2 = (table.predictions[row] for row in raw.rows)
+        time_diff = raw.value_ns / NS_PER_MINUTE
+        return DetectedConflict(
+            conflict_type=ConflictType.TEMPORAL_CONFLICT,
+            severity_score=0,  # Scored in batch by _detect_all
+            trains_involved=[pred1.train_id, pred2.train_id],
+            sections_involved=[section_id],
+            time_to_impact=self._time_to_impact(table, raw.rows[0]),
+            description=_TEMPORAL_DESCRIPTION.format(gap=time_diff, t1=pred1.train_id, t2=pred2.train_id),
+            predicted_impact_time=pred1.arrival_time,
+            resolution_suggestions=self._generate_temporal_resolutions(pred1, pred2, time_diff),
+            metadata={
+                'safety_buffer': time_diff,
+                'required_buffer': self.safety_buffer_minutes
+            }
+        )
+    
+    def _materialize_priority(
+        self, raw: _RawConflict, section_id: int, table: PredictionTable,
+        section: Any, train_info: Dict[int, Dict[str, Any]]
+    ) -> DetectedConflict:
+        pred1, pred2 = (table.predictions[row] for row in raw.rows)
+        train1_info = train_info[pred1.train_id]
+        train2_info = train_info[pred2.train_id]
+        return DetectedConflict(
+            conflict_type=ConflictType.PRIORITY_CONFLICT,
+            severity_score=0,  # Scored in batch by _detect_all
+            trains_involved=[pred1.train_id, pred2.train_id],
+            sections_involved=[section_id],
+            time_to_impact=self._time_to_impact(table, raw.rows[1]),
+            description=_PRIORITY_DESCRIPTION.format(t1=pred1.train_id, t2=pred2.train_id),
+            predicted_impact_time=pred2.arrival_time,
+            resolution_suggestions=self._generate_priority_resolutions(pred1, pred2, train1_info, train2_info),
+            metadata={
+                'blocking_train_priority': train1_info['priority'],
+                'blocked_train_priority': train2_info['priority'],
+                'speed_difference': train2_info['max_speed'] - train1_info['max_speed']
+            }
+        )
+    
+    def _materialize_junction(
+        self, raw: _RawConflict, section_id: int, table: PredictionTable,
+        section: Any, train_info: Dict[int, Dict[str, Any]]
+    ) -> DetectedConflict:
+        conflicting_trains = [table.predictions[row] for row in raw.rows]
+        return DetectedConflict(
+            conflict_type=ConflictType.JUNCTION_CONFLICT,
+            severity_score=0,  # Scored in batch by _detect_all
+            trains_involved=[p.train_id for p in conflicting_trains],
+            sections_involved=[section_id],
+            time_to_impact=self._time_to_impact(table, raw.rows[0]),
+            description=_JUNCTION_DESCRIPTION.format(
+                count=len(conflicting_trains), section=section_id, capacity=section.capacity
+            ),
+            predicted_impact_time=conflicting_trains[0].arrival_time,
+            resolution_suggestions=self._generate_junction_resolutions(conflicting_trains, section),
+            metadata={
+                'junction_capacity': section.capacity,
+                'trains_count': len(conflicting_trains),
+                'overflow': len(conflicting_trains) - section.capacity
+            }
+        )
+    
+    _materializers = {
+        ConflictType.SPATIAL_COLLISION: _materialize_spatial,
+        ConflictType.TEMPORAL_CONFLICT: _materialize_temporal,
+        ConflictType.PRIORITY_CONFLICT: _materialize_priority,
+        ConflictType.JUNCTION_CONFLICT: _materialize_junction,
+    }
+    
+    async def _detect_spatial_conflicts(
+        self,
+        predictions: List[TrainPrediction],
+        table: Optional[PredictionTable] = None
+    ) -> List[DetectedConflict]:
+        """Detect two trains approaching the same track section"""
+        return await self._detect_all(predictions, table, frozenset({ConflictType.SPATIAL_COLLISION}))
+    
+    async def _detect_temporal_conflicts(
+        self,
+        predictions: List[TrainPrediction],
+        table: Optional[PredictionTable] = None
+    ) -> List[DetectedConflict]:
+        """Detect scheduled arrivals within 2-minute safety buffer"""
+        return await self._detect_all(predictions, table, frozenset({ConflictType.TEMPORAL_CONFLICT}))
     
-    async def _detect_junction_conflicts(self, predictions: List[TrainPrediction]) -> List[DetectedConflict]:
+    async def _detect_priority_conflicts(
+        self,
+        predictions: List[TrainPrediction],
+        table: Optional[PredictionTable] = None
+    ) -> List[DetectedConflict]:
+        """Detect express trains blocked by slower freight trains"""
+        return await self._detect_all(predictions, table, frozenset({ConflictType.PRIORITY_CONFLICT}))
+    
+    async def _detect_junction_conflicts(
+        self,
+        predictions: List[TrainPrediction],
+        table: Optional[PredictionTable] = None
+    ) -> List[DetectedConflict]:
         """Detect multiple trains converging on junction"""
-        conflicts = []
-        
-        # Get junction sections
-        junction_sections = {
-            section_id: section for section_id, section in self._section_cache.items()
-            if section.section_type == 'junction'
-        }
-        
-        for junction_id, junction in junction_sections.items():
-            junction_predictions = [p for p in predictions if p.section_id == junction_id]
-            
-            if len(junction_predictions) < 2:
-                continue
-            
-            junction_predictions.sort(key=lambda x: x.arrival_time)
-            
-            # Check for conflicts among multiple trains
-            for i in range(len(junction_predictions) - 1):
-                conflicting_trains = [junction_predictions[i]]
-                
-                for j in range(i + 1, len(junction_predictions)):
-                    pred = junction_predictions[j]
-                    overlap = self._calculate_time_overlap(junction_predictions[i], pred)
-                    
-                    if overlap > 0:
-                        conflicting_trains.append(pred)
-                
-                if len(conflicting_trains) > junction.capacity:
-                    train_ids = [p.train_id for p in conflicting_trains]
-                    time_to_impact = (junction_predictions[i].arrival_time - datetime.utcnow()).total_seconds() / 60
-                    
-                    severity = await self._calculate_severity(
-                        conflict_type=ConflictType.JUNCTION_CONFLICT,
-                        trains=train_ids,
-                        time_to_impact=time_to_impact,
-                        sections=[junction_id]
-                    )
-                    
-                    conflicts.append(DetectedConflict(
-                        conflict_type=ConflictType.JUNCTION_CONFLICT,
-                        severity_score=severity,
-                        trains_involved=train_ids,
-                        sections_involved=[junction_id],
-                        time_to_impact=time_to_impact,
-                        description=f"Junction conflict: {len(conflicting_trains)} trains converging on junction {junction_id} (capacity: {junction.capacity})",
-                        predicted_impact_time=junction_predictions[i].arrival_time,
-                        resolution_suggestions=await self._generate_junction_resolutions(conflicting_trains, junction),
-                        metadata={
-                            'junction_capacity': junction.capacity,
-                            'trains_count': len(conflicting_trains),
-                            'overflow': len(conflicting_trains) - junction.capacity
-                        }
-                    ))
-        
-        return conflicts
+        return await self._detect_all(predictions, table, frozenset({ConflictType.JUNCTION_CONFLICT}))
     
     async def _calculate_severity(
         self, 
@@ -506,269 +1001,580 @@ class ConflictDetector:
         sections: List[int]
     ) -> int:
         """Calculate conflict severity score (1-10)"""
-        try:
-            # Time factor (0-3): Less time = higher severity
-            if time_to_impact <= 1:
-                time_factor = 3.0
-            elif time_to_impact <= 5:
-                time_factor = 2.5
-            elif time_to_impact <= 15:
-                time_factor = 2.0
-            else:
-                time_factor = 1.0
-            
-            # Train priority factor (0-2)
-            priority_factor = 0
-            passenger_impact = 0
-            
-            for train_id in trains:
-                train = self._active_trains_cache.get(train_id)
-                if train:
-                    priority_factor += train.priority * 0.2
-                    passenger_impact += train.current_load
-            
-            # Network impact factor (0-2)
-            network_factor = len(sections) * 0.5 + len(trains) * 0.3
-            
-            # Safety risk factor (0-3)
-            safety_factor = {
-                ConflictType.SPATIAL_COLLISION: 3.0,
-                ConflictType.JUNCTION_CONFLICT: 2.5,
-                ConflictType.TEMPORAL_CONFLICT: 2.0,
-                ConflictType.PRIORITY_CONFLICT: 1.5,
-                ConflictType.SECTION_OVERLOAD: 1.0,
-                ConflictType.MAINTENANCE_CONFLICT: 1.0
-            }.get(conflict_type, 1.0)
-            
-            # Calculate weighted score (normalize to 1-10 scale)
-            raw_score = (
-                time_factor * self.severity_weights['time_factor'] +
-                priority_factor * self.severity_weights['train_priority'] +
-                (passenger_impact / 100) * self.severity_weights['passenger_impact'] +
-                network_factor * self.severity_weights['network_impact'] +
-                safety_factor * self.severity_weights['safety_risk']
-            )
-            
-            # Scale to 1-10 range (raw_score typically ranges from ~1 to ~4)
-            weighted_score = (raw_score / 4.0) * 9 + 1  # Maps ~1-4 to 1-10
+        return int(self._calculate_severity_batch([conflict_type], [trains], [time_to_impact], [sections])[0])
+    
+    def _calculate_severity_batch(
+        self,
+        conflict_types: List[ConflictType],
+        trains: List[List[int]],
+        times_to_impact: List[float],
+        sections: List[List[int]]
+    ) -> np.ndarray:
+        """Calculate severity scores (1-10) for a batch of conflicts with one set of array operations"""
+        count = len(conflict_types)
+        priority_vec, load_vec, train_valid_vec = self._train_vectors()
+        
+        # Gather per-train inputs for all conflicts at once; unknown train ids contribute nothing
+        n_trains = np.fromiter((len(t) for t in trains), dtype=np.intp, count=count)
+        train_ids = np.fromiter((i for t in trains for i in t), dtype=np.int64, count=int(n_trains.sum()))
+        owner = np.repeat(np.arange(count), n_trains)
+        known = (train_ids >= 0) & (train_ids < len(priority_vec))
+        train_ids = np.where(known, train_ids, 0)
+        
+        priority_sum = np.bincount(owner, weights=np.where(known, priority_vec[train_ids], 0), minlength=count)
+        passenger_sum = np.bincount(owner, weights=np.where(known, load_vec[train_ids], 0), minlength=count)
+        valid = np.bincount(owner, weights=known & ~train_valid_vec[train_ids], minlength=count) == 0
+        
+        # Time factor (0-3): Less time = higher severity
+        t = np.asarray(times_to_impact, dtype=np.float64)
+        time_factor = np.select([t <= 1, t <= 5, t <= 15], [3.0, 2.5, 2.0], 1.0)
+        
+        # Train priority factor (0-2)
+        priority_factor = priority_sum * 0.2
+        
+        # Network impact factor (0-2)
+        n_sections = np.fromiter((len(s) for s in sections), dtype=np.float64, count=count)
+        network_factor = n_sections * 0.5 + n_trains * 0.3
+        
+        # Safety risk factor (0-3)
+        type_codes = np.fromiter((_CONFLICT_TYPE_CODES[c] for c in conflict_types), dtype=np.intp, count=count)
+        safety_factor = _SAFETY_FACTOR_LUT[type_codes]
+        
+        # Calculate weighted score (normalize to 1-10 scale)
+        raw_score = (
+            time_factor * self.severity_weights['time_factor'] +
+            priority_factor * self.severity_weights['train_priority'] +
+            (passenger_sum / 100) * self.severity_weights['passenger_impact'] +
+            network_factor * self.severity_weights['network_impact'] +
+            safety_factor * self.severity_weights['safety_risk']
+        )
+        
+        # Scale to 1-10 range (raw_score typically ranges from ~1 to ~4)
+        weighted_score = (raw_score / 4.0) * 9 + 1  # Maps ~1-4 to 1-10
+        
+        # Ensure score is between 1-10; conflicts whose inputs failed get the default medium severity
+        scores = np.clip(weighted_score.astype(np.int64), 1, 10)
+        scores[~valid] = 5
+        return scores
+    
+    def _train_vectors(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Priority, load and validity arrays indexed by train id, rebuilt when the trains cache is replaced"""
+        trains = self._active_trains_cache
+        if self._train_vectors_source is not trains:
+            size = max(trains, default=0) + 1
+            priority_vec = np.zeros(size, dtype=np.int8)
+            load_vec = np.zeros(size, dtype=np.int32)
+            train_valid_vec = np.ones(size, dtype=bool)
             
-            # Ensure score is between 1-10
-            return max(1, min(10, int(weighted_score)))
+            for train_id, train in trains.items():
+                if not train:
+                    continue
+                try:
+                    priority_vec[train_id] = train.priority
+                    load_vec[train_id] = train.current_load
+                except Exception as e:
+                    logger.error(f"Error reading severity inputs for train {train_id}: {e}")
+                    train_valid_vec[train_id] = False
             
-        except Exception as e:
-            logger.error(f"Error calculating severity: {e}")
-            return 5  # Default medium severity
+            self._priority_vec = priority_vec
+            self._load_vec = load_vec
+            self._train_valid_vec = train_valid_vec
+            self._train_vectors_source = trains
+        
+        return self._priority_vec, self._load_vec, self._train_valid_vec
     
     def _calculate_time_overlap(self, pred1: TrainPrediction, pred2: TrainPrediction) -> float:
         """Calculate time overlap between two train predictions in minutes"""
-        start1, end1 = pred1.arrival_time, pred1.exit_time
-        start2, end2 = pred2.arrival_time, pred2.exit_time
-        
-        # Check for overlap
-        latest_start = max(start1, start2)
-        earliest_end = min(end1, end2)
+        overlap = _overlap_ns(
+            (_datetime_ns(pred1.arrival_time), _datetime_ns(pred1.exit_time)),
+            (_datetime_ns(pred2.arrival_time), _datetime_ns(pred2.exit_time))
+        )
         
-        if latest_start < earliest_end:
-            return (earliest_end - latest_start).total_seconds() / 60
+        if overlap > 0:
+            return overlap / NS_PER_MINUTE
         return 0
     
-    async def _generate_spatial_resolutions(
-        self, 
+    @staticmethod
+    def _generate_spatial_resolutions(
         pred1: TrainPrediction, 
         pred2: TrainPrediction, 
         section: Any
     ) -> List[str]:
         """Generate resolution suggestions for spatial conflicts"""
-        suggestions = []
-        
-        # Speed adjustment
-        if pred1.speed_kmh > pred2.speed_kmh:
-            suggestions.append(f"Reduce speed of train {pred1.train_id} to allow train {pred2.train_id} to pass")
-        else:
-            suggestions.append(f"Increase speed of train {pred2.train_id} to reduce conflict window")
-        
-        # Timing adjustment
-        suggestions.append(f"Delay train {pred2.train_id} by 3-5 minutes")
-        
-        # Rerouting (if applicable)
-        suggestions.append(f"Consider alternative route for train {pred2.train_id}")
-        
-        return suggestions
+        return _spatial_resolutions(pred1.train_id, pred2.train_id, pred1.speed_kmh, pred2.speed_kmh)
     
-    async def _generate_temporal_resolutions(
+    def _generate_temporal_resolutions(
         self, 
         pred1: TrainPrediction, 
         pred2: TrainPrediction, 
         buffer_time: float
     ) -> List[str]:
         """Generate resolution suggestions for temporal conflicts"""
-        suggestions = []
-        
         needed_delay = self.safety_buffer_minutes - buffer_time + 0.5  # Add 0.5min extra buffer
-        
-        suggestions.append(f"Delay train {pred2.train_id} by {needed_delay:.1f} minutes")
-        suggestions.append(f"Increase speed of train {pred1.train_id} to exit section faster")
-        suggestions.append("Implement holding signal for train {pred2.train_id}")
-        
-        return suggestions
+        return _temporal_resolutions(pred1.train_id, pred2.train_id, needed_delay)
     
-    async def _generate_priority_resolutions(
-        self, 
+    @staticmethod
+    def _generate_priority_resolutions(
         pred1: TrainPrediction, 
         pred2: TrainPrediction,
         train1_info: Dict,
         train2_info: Dict
     ) -> List[str]:
         """Generate resolution suggestions for priority conflicts"""
-        suggestions = []
-        
-        suggestions.append(f"Hold freight train {pred1.train_id} at previous station")
-        suggestions.append(f"Create express bypass for train {pred2.train_id}")
-        suggestions.append(f"Increase priority of train {pred2.train_id} to {train2_info['priority'] + 1}")
-        suggestions.append(f"Reroute freight train {pred1.train_id} to alternate track")
-        
-        return suggestions
+        return _priority_resolutions(pred1.train_id, pred2.train_id, train2_info['priority'] + 1)
     
-    async def _generate_junction_resolutions(
-        self, 
+    @staticmethod
+    def _generate_junction_resolutions(
         conflicting_trains: List[TrainPrediction], 
         junction: Any
     ) -> List[str]:
         """Generate resolution suggestions for junction conflicts"""
-        suggestions = []
+        return _junction_resolutions(len(conflicting_trains) - junction.capacity)
+    
+    @staticmethod
+    def _conflict_key(conflict: DetectedConflict) -> Hashable:
+        """Deduplication key based on trains and sections involved"""
+        return _pack_conflict_key(conflict.conflict_type, conflict.sections_involved, conflict.trains_involved)
+    
+    def _fetch_all(self, query: str, params: Dict[str, Any]) -> List[Any]:
+        """Run a raw query on the session; called through run_in_threadpool"""
+        return self.db.execute(text(query), params).fetchall()
+    
+    async def _load_routes(self, train_ids: List[int]):
+        """Load active schedules and section lengths for all given trains into the route cache"""
+        self._route_cache = {}
+        if not train_ids:
+            return
         
-        suggestions.append("Implement sequential junction crossing with 2-minute intervals")
-        suggestions.append(f"Hold {len(conflicting_trains) - junction.capacity} trains at approach signals")
-        suggestions.append("Prioritize by train type: Express > Local > Freight")
-        suggestions.append("Consider temporary speed restrictions approaching junction")
+        # Snapshot the section lengths here: invalidations mutate the section cache on the event loop
+        # while the route query runs in the threadpool
+        section_lengths = {section_id: section.length_meters for section_id, section in self._section_cache.items()}
         
-        return suggestions
+        try:
+            self._route_cache = await run_in_threadpool(self._fetch_routes, train_ids, section_lengths)
+        except Exception as e:
+            logger.error(f"Error loading train routes: {e}")
     
-    async def _process_conflicts(self, conflicts: List[DetectedConflict]) -> List[DetectedConflict]:
-        """Process and deduplicate conflicts"""
-        # Remove duplicates based on trains and sections involved
-        unique_conflicts = []
-        seen_combinations = set()
+    def _fetch_routes(
+        self, train_ids: List[int], section_lengths: Dict[int, float]
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """Query the first active schedule of each train; lengths come from the section cache snapshot"""
+        schedules = self.db.query(TrainSchedule.train_id, TrainSchedule.route_sections).filter(
+            and_(
+                TrainSchedule.train_id.in_(train_ids),
+                TrainSchedule.active == True
+            )
+        ).order_by(TrainSchedule.id).all()
+        
+        # Keep the first active schedule per train
+        routes: Dict[int, List[int]] = {}
+        for train_id, route_sections in schedules:
+            if route_sections and train_id not in routes:
+                routes[train_id] = list(route_sections)
         
-        for conflict in conflicts:
-            key = (
-                tuple(sorted(conflict.trains_involved)),
-                tuple(sorted(conflict.sections_involved)),
-                conflict.conflict_type
+        if not routes:
+            return {}
+        
+        # Active sections are cached with their lengths; only query the rest (normally none)
+        uncached_ids = {section_id for route in routes.values() for section_id in route} - section_lengths.keys()
+        if uncached_ids:
+            section_lengths.update(
+                self.db.query(Section.id, cast(Section.length_meters, Float)).filter(
+                    Section.id.in_(uncached_ids)
+                ).all()
             )
-            
-            if key not in seen_combinations:
-                seen_combinations.add(key)
-                unique_conflicts.append(conflict)
         
-        return unique_conflicts
+        return {
+            train_id: [(section_id, section_lengths.get(section_id, 1000)) for section_id in route]  # Default 1km
+            for train_id, route in routes.items()
+        }
     
-    async def _get_train_route(self, train_id: int, current_section_id: int) -> List[Tuple[int, float]]:
+    def _get_train_route(self, train_id: int, current_section_id: int) -> List[Tuple[int, float]]:
         """Get planned route for train from current position"""
+        route = self._route_cache.get(train_id)
+        if not route:
+            return []
+        
+        # Find current position in route
+        for index, (section_id, _) in enumerate(route):
+            if section_id == current_section_id:
+                return route[index + 1:]
+        return []
+    
+    async def _update_cache(self, from_database: bool = False):
+        """
+        Reload the train and section caches.
+        Uses the shared Redis copy written by any worker when it is complete, otherwise the database.
+        """
+        # Taken before the first await, so ids invalidated while the reload runs stay marked
+        stale_trains, self._stale_trains = self._stale_trains, set()
+        stale_sections, self._stale_sections = self._stale_sections, set()
         try:
-            # Get train schedule
-            schedule = self.db.query(TrainSchedule).filter(
-                and_(
-                    TrainSchedule.train_id == train_id,
-                    TrainSchedule.active == True
-                )
-            ).first()
+            trains = None if from_database else await self._read_shared_cache(ACTIVE_TRAINS_KEY, TRAIN_META_KEY, TrainMeta)
+            if trains is None:
+                active_trains = await run_in_threadpool(self._query_train_meta, Train.operational_status == 'active')
+                trains = {row.id: TrainMeta(*row) for row in active_trains}
+                await self._write_shared_cache(ACTIVE_TRAINS_KEY, TRAIN_META_KEY, trains, DETECTOR_TRAIN_CACHE_TTL)
             
-            if not schedule or not schedule.route_sections:
-                return []
+            sections = None if from_database else await self._read_shared_cache(ACTIVE_SECTIONS_KEY, SECTION_META_KEY, SectionMeta)
+            if sections is None:
+                active_sections = await run_in_threadpool(self._query_section_meta, Section.active == True)
+                sections = {row.id: SectionMeta(*row) for row in active_sections}
+                await self._write_shared_cache(ACTIVE_SECTIONS_KEY, SECTION_META_KEY, sections, DETECTOR_SECTION_CACHE_TTL)
             
-            # Find current position in route
-            try:
-                current_index = schedule.route_sections.index(current_section_id)
-                future_sections = schedule.route_sections[current_index + 1:]
-            except ValueError:
-                return []
-            
-            # Get section lengths
-            route_with_lengths = []
-            if future_sections:
-                sections = self.db.query(Section).filter(
-                    Section.id.in_(future_sections)
-                ).all()
-                
-                section_lengths = {s.id: float(s.length_meters) for s in sections}
-                
-                for section_id in future_sections:
-                    length = section_lengths.get(section_id, 1000)  # Default 1km
-                    route_with_lengths.append((section_id, length))
+            self._active_trains_cache = trains
+            self._train_vectors()
+            self._section_cache = sections
             
-            return route_with_lengths
+            # Set cache expiry
+            self._cache_expiry = datetime.utcnow() + self._cache_safety_ttl
+            
+            logger.debug(f"Updated cache: {len(self._active_trains_cache)} trains, {len(self._section_cache)} sections")
             
         except Exception as e:
-            logger.error(f"Error getting train route for {train_id}: {e}")
-            return []
+            self._stale_trains |= stale_trains
+            self._stale_sections |= stale_sections
+            logger.error(f"Error updating cache: {e}")
+    
+    def _query_train_meta(self, *criteria):
+        """Select just the TrainMeta columns, skipping ORM instantiation"""
+        return self.db.query(
+            Train.id, Train.priority, Train.type, Train.max_speed_kmh, Train.current_load
+        ).filter(*criteria).all()
+    
+    def _query_section_meta(self, *criteria):
+        """Select just the SectionMeta columns, skipping ORM instantiation"""
+        return self.db.query(
+            Section.id, Section.section_type, Section.capacity, cast(Section.length_meters, Float)
+        ).filter(*criteria).all()
+    
+    async def _read_shared_cache(self, index_key: str, meta_key: str, entry_type: Any) -> Optional[Dict[int, Any]]:
+        """Load all entries listed under index_key from the Redis hash, or None if any are missing"""
+        if not self.redis_client:
+            return None
+        
+        ids = await self.redis_client.get(index_key)
+        if ids is None:
+            return None
+        
+        values = await self.redis_client.hash_get_many(meta_key, ids)
+        if any(value is None for value in values):
+            return None
+        
+        try:
+            return {entry_id: entry_type.unpack(entry_id, value) for entry_id, value in zip(ids, values)}
+        except (TypeError, ValueError):
+            # Written by a worker with a different snapshot layout; reload from the database
+            return None
     
-    async def _update_cache(self):
-        """Update cached data for performance"""
+    async def _write_shared_cache(
+        self, index_key: str, meta_key: str, entries: Dict[int, Any], ttl: int,
+        changed: Optional[Dict[int, Any]] = None
+    ):
+        """Publish entries (or only the changed ones) and the full id index to Redis for other workers"""
+        if not self.redis_client:
+            return
+        
+        if changed is None:
+            changed = entries
+        await self.redis_client.hash_set_many(
+            meta_key, {entry_id: entry.pack() for entry_id, entry in changed.items()}, ttl
+        )
+        await self.redis_client.set_id_index(index_key, list(entries), ttl)
+    
+    async def _refresh_stale_entries(self):
+        """Reload trains and sections marked stale by notifications, one batch query each"""
+        stale_trains, self._stale_trains = self._stale_trains, set()
+        stale_sections, self._stale_sections = self._stale_sections, set()
         try:
-            # Cache active trains
-            active_trains = self.db.query(Train).filter(Train.operational_status == 'active').all()
-            self._active_trains_cache = {train.id: train for train in active_trains}
-            
-            # Cache sections
-            sections = self.db.query(Section).filter(Section.active == True).all()
-            self._section_cache = {section.id: section for section in sections}
+            if stale_trains:
+                stale_ids = list(stale_trains)
+                rows = await run_in_threadpool(
+                    self._query_train_meta, Train.id.in_(stale_ids), Train.operational_status == 'active'
+                )
+                trains = {row.id: TrainMeta(*row) for row in rows}
+                for train_id in stale_ids:
+                    self._set_cached_train(train_id, trains.get(train_id))
+                stale_trains = set()
+                await self._write_shared_cache(
+                    ACTIVE_TRAINS_KEY, TRAIN_META_KEY, self._active_trains_cache, DETECTOR_TRAIN_CACHE_TTL, trains
+                )
             
-            # Set cache expiry
-            self._cache_expiry = datetime.utcnow() + timedelta(minutes=5)
+            if stale_sections:
+                stale_ids = list(stale_sections)
+                rows = await run_in_threadpool(
+                    self._query_section_meta, Section.id.in_(stale_ids), Section.active == True
+                )
+                sections = {row.id: SectionMeta(*row) for row in rows}
+                for section_id in stale_ids:
+                    self._set_cached_section(section_id, sections.get(section_id))
+                stale_sections = set()
+                await self._write_shared_cache(
+                    ACTIVE_SECTIONS_KEY, SECTION_META_KEY, self._section_cache, DETECTOR_SECTION_CACHE_TTL, sections
+                )
             
-            logger.debug(f"Updated cache: {len(self._active_trains_cache)} trains, {len(self._section_cache)} sections")
+        except Exception as e:
+            # Ids whose reload did not reach the L1 cache are retried at the next tick
+            self._stale_trains |= stale_trains
+            self._stale_sections |= stale_sections
+            logger.error(f"Error refreshing invalidated cache entries: {e}")
+    
+    def _set_cached_train(self, train_id: int, train: Optional[TrainMeta]):
+        """Replace or drop one train in the L1 cache"""
+        if train is None:
+            self._active_trains_cache.pop(train_id, None)
+        else:
+            self._active_trains_cache[train_id] = train
+        # Severity vectors are keyed on the dict identity; force a rebuild
+        self._train_vectors_source = None
+    
+    def _set_cached_section(self, section_id: int, section: Optional[SectionMeta]):
+        """Replace or drop one section in the L1 cache"""
+        if section is None:
+            self._section_cache.pop(section_id, None)
+        else:
+            self._section_cache[section_id] = section
+    
+    async def start_invalidation_listener(self):
+        """
+        Subscribe to train/section invalidation messages published by writers,
+        and to the database change notifications raised by the cache triggers
+        """
+        if self.redis_client and not self._invalidation_task:
+            try:
+                pubsub = await self.redis_client.subscribe([TRAIN_INVALIDATE_CHANNEL, SECTION_INVALIDATE_CHANNEL])
+            except Exception as e:
+                logger.error(f"Error starting cache invalidation listener: {e}")
+                pubsub = None
+            # Without a subscription the task resubscribes with backoff until Redis is reachable
+            self._invalidation_task = asyncio.create_task(self._subscribe_invalidations(pubsub))
+        
+        if not self._change_listener and not self._change_listener_retry:
+            self._start_change_listener()
+    
+    async def stop_invalidation_listener(self):
+        """Stop the invalidation listener task and database change listener"""
+        if self._invalidation_task:
+            self._invalidation_task.cancel()
+            try:
+                await self._invalidation_task
+            except asyncio.CancelledError:
+                pass
+            self._invalidation_task = None
+        
+        if self._change_listener_retry:
+            self._change_listener_retry.cancel()
+            self._change_listener_retry = None
+        self._drop_change_listener()
+    
+    def _start_change_listener(self):
+        """
+        LISTEN for train_changed/section_changed on a dedicated autocommit connection.
+        A failed attempt schedules another one with backoff.
+        """
+        self._change_listener_retry = None
+        listener = None
+        try:
+            listener = self.db.get_bind().raw_connection()
+            connection = listener.driver_connection
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {TRAIN_CHANGED_CHANNEL}; LISTEN {SECTION_CHANGED_CHANNEL}")
             
+            fd = connection.fileno()
+            asyncio.get_running_loop().add_reader(fd, self._drain_change_notifications, connection)
+            self._change_listener = listener
+            self._change_listener_fd = fd
+            self._change_listener_delay = INVALIDATION_RESUBSCRIBE_MIN_DELAY
+            # Changes made before LISTEN took effect were never notified; reload everything at the next tick
+            self._cache_expiry = datetime.utcnow()
         except Exception as e:
-            logger.error(f"Error updating cache: {e}")
+            logger.error(f"Error starting database change listener: {e}")
+            if listener is not None:
+                try:
+                    listener.invalidate()
+                except Exception:
+                    pass
+            self._schedule_change_listener_restart()
+    
+    def _schedule_change_listener_restart(self):
+        """Re-establish the LISTEN connection after the current backoff delay"""
+        delay = self._change_listener_delay
+        self._change_listener_delay = min(delay * 2, INVALIDATION_RESUBSCRIBE_MAX_DELAY)
+        self._change_listener_retry = asyncio.get_running_loop().call_later(
+            delay, self._start_change_listener
+        )
+    
+    def _drop_change_listener(self):
+        """Stop watching the LISTEN connection and discard it"""
+        listener, self._change_listener = self._change_listener, None
+        fd, self._change_listener_fd = self._change_listener_fd, None
+        if listener is None:
+            return
+        
+        try:
+            # The fd saved at start, since a dead connection may no longer report one
+            asyncio.get_running_loop().remove_reader(fd)
+        except Exception as e:
+            logger.error(f"Error removing database change listener reader: {e}")
+        try:
+            # LISTEN state must not leak back into the pool
+            listener.invalidate()
+        except Exception as e:
+            logger.error(f"Error stopping database change listener: {e}")
+    
+    def _drain_change_notifications(self, connection):
+        """Mark notified trains/sections stale; they are reloaded in one batch at the next tick"""
+        try:
+            connection.poll()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"Database change listener connection lost: {e}; reconnecting")
+            self._drop_change_listener()
+            # Notifications sent while disconnected are lost; reload everything at the next tick
+            self._cache_expiry = datetime.utcnow()
+            self._schedule_change_listener_restart()
+            return
+        except Exception as e:
+            logger.error(f"Error reading database change notifications: {e}")
+            return
+        
+        try:
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                if notify.channel == TRAIN_CHANGED_CHANNEL:
+                    self._stale_trains.add(int(notify.payload))
+                elif notify.channel == SECTION_CHANGED_CHANNEL:
+                    self._stale_sections.add(int(notify.payload))
+        except Exception as e:
+            logger.error(f"Error reading database change notifications: {e}")
+    
+    async def _subscribe_invalidations(self, pubsub):
+        """
+        Collect invalidated ids and apply them in debounced batches.
+        A lost subscription is re-established with exponential backoff.
+        """
+        delay = INVALIDATION_RESUBSCRIBE_MIN_DELAY
+        try:
+            while True:
+                if pubsub is not None:
+                    try:
+                        async for message in pubsub.listen():
+                            delay = INVALIDATION_RESUBSCRIBE_MIN_DELAY
+                            if message["type"] == "message":
+                                self._queue_invalidation(message)
+                        logger.warning("Cache invalidation subscription ended; resubscribing")
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        logger.warning(f"Cache invalidation subscription lost: {e}; resubscribing")
+                    
+                    try:
+                        await pubsub.reset()
+                    except Exception:
+                        pass
+                
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, INVALIDATION_RESUBSCRIBE_MAX_DELAY)
+                
+                await self.redis_client.connect()
+                pubsub = await self.redis_client.subscribe([TRAIN_INVALIDATE_CHANNEL, SECTION_INVALIDATE_CHANNEL])
+                if pubsub is not None:
+                    # Messages published while unsubscribed are lost; reload everything at the next tick
+                    self._cache_expiry = datetime.utcnow()
+        
+        except asyncio.CancelledError:
+            if self._invalidation_flush:
+                self._invalidation_flush.cancel()
+            raise
+    
+    def _queue_invalidation(self, message: Dict[str, Any]):
+        """Add the id from one invalidation message to the pending batch"""
+        try:
+            data = json.loads(message["data"])
+            if message["channel"] == TRAIN_INVALIDATE_CHANNEL:
+                self._pending_trains.add(int(data["train_id"]))
+            elif message["channel"] == SECTION_INVALIDATE_CHANNEL:
+                self._pending_sections.add(int(data["section_id"]))
+            else:
+                return
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring malformed cache invalidation message: {e}")
+            return
+        
+        if not self._invalidation_flush or self._invalidation_flush.done():
+            self._invalidation_flush = asyncio.create_task(self._flush_invalidations())
+    
+    async def _flush_invalidations(self):
+        """
+        Replace invalidated L1 entries with the fresh copies in Redis.
+        Entries Redis does not have yet are reloaded from the database at the start of the next tick.
+        """
+        try:
+            # Ids arriving while a batch is applied are picked up by the next pass
+            while self._pending_trains or self._pending_sections:
+                await asyncio.sleep(self._invalidation_debounce)
+                
+                train_ids, self._pending_trains = list(self._pending_trains), set()
+                section_ids, self._pending_sections = list(self._pending_sections), set()
+                
+                if train_ids:
+                    values = await self.redis_client.hash_get_many(TRAIN_META_KEY, train_ids)
+                    for train_id, value in zip(train_ids, values):
+                        self._set_cached_train(train_id, TrainMeta.unpack(train_id, value) if value else None)
+                        if not value:
+                            self._stale_trains.add(train_id)
+                
+                if section_ids:
+                    values = await self.redis_client.hash_get_many(SECTION_META_KEY, section_ids)
+                    for section_id, value in zip(section_ids, values):
+                        self._set_cached_section(section_id, SectionMeta.unpack(section_id, value) if value else None)
+                        if not value:
+                            self._stale_sections.add(section_id)
+        
+        except Exception as e:
+            logger.error(f"Error applying cache invalidations: {e}")
     
     async def store_conflicts(self, conflicts: List[DetectedConflict]) -> List[int]:
         """Store detected conflicts in database"""
-        stored_conflict_ids = []
+        return await run_in_threadpool(self._store_conflicts_sync, conflicts)
+    
+    def _store_conflicts_sync(self, conflicts: List[DetectedConflict]) -> List[int]:
+        """
+        Blocking body of store_conflicts, run in the threadpool.
+        One INSERT ... ON CONFLICT against the conflicts_open_uq partial index inserts new
+        conflicts and refreshes severity/description of ones still open, in a single round trip.
+        """
+        if not conflicts:
+            return []
         
         try:
-            for conflict in conflicts:
-                # Check if conflict already exists (avoid duplicates)
-                existing = self.db.query(Conflict).filter(
-                    and_(
-                        Conflict.trains_involved == conflict.trains_involved,
-                        Conflict.sections_involved == conflict.sections_involved,
-                        Conflict.conflict_type == conflict.conflict_type.value,
-                        Conflict.resolution_time.is_(None)
-                    )
-                ).first()
-                
-                if existing:
-                    # Update existing conflict
-                    existing.severity = ConflictSeverity(
-                        'critical' if conflict.severity_score >= 8 else
-                        'high' if conflict.severity_score >= 6 else
-                        'medium' if conflict.severity_score >= 4 else 'low'
-                    )
-                    existing.description = conflict.description
-                    existing.updated_at = datetime.utcnow()
-                    stored_conflict_ids.append(existing.id)
-                else:
-                    # Create new conflict
-                    db_conflict = Conflict(
-                        conflict_type=conflict.conflict_type.value,
-                        severity=ConflictSeverity(
-                            'critical' if conflict.severity_score >= 8 else
-                            'high' if conflict.severity_score >= 6 else
-                            'medium' if conflict.severity_score >= 4 else 'low'
-                        ),
-                        trains_involved=conflict.trains_involved,
-                        sections_involved=conflict.sections_involved,
-                        detection_time=datetime.utcnow(),
-                        estimated_impact_minutes=int(conflict.time_to_impact),
-                        description=conflict.description,
-                        auto_resolved=False
-                    )
-                    
-                    self.db.add(db_conflict)
-                    self.db.flush()
-                    stored_conflict_ids.append(db_conflict.id)
+            detection_time = datetime.utcnow()
+            rows = [
+                {
+                    'conflict_type': conflict.conflict_type.value,
+                    'severity': _SEVERITY_LEVELS[bisect_right(_SEVERITY_THRESHOLDS, conflict.severity_score)],
+                    'trains_involved': conflict.trains_involved,
+                    'sections_involved': conflict.sections_involved,
+                    'detection_time': detection_time,
+                    'estimated_impact_minutes': int(conflict.time_to_impact),
+                    'description': conflict.description,
+                    'auto_resolved': False
+                }
+                for conflict in conflicts
+            ]
+            
+            stmt = pg_insert(Conflict).values(rows)
+            upsert = stmt.on_conflict_do_update(
+                index_elements=[Conflict.conflict_type, Conflict.trains_sorted, Conflict.sections_sorted],
+                index_where=Conflict.resolution_time.is_(None),
+                set_={
+                    'severity': stmt.excluded.severity,
+                    'description': stmt.excluded.description,
+                    'updated_at': func.now()
+                }
+            ).returning(Conflict.id)
             
+            stored_conflict_ids = self.db.execute(upsert).scalars().all()
             self.db.commit()
             return stored_conflict_ids
             
@@ -777,36 +1583,56 @@ class ConflictDetector:
             self.db.rollback()
             return []
     
-    async def send_alerts(self, conflicts: List[DetectedConflict]):
-        """Send real-time alerts for high-severity conflicts"""
+    async def send_alerts(self, conflicts: List[DetectedConflict]) -> int:
+        """
+        Send real-time alerts for high-severity conflicts, returning how many were sent.
+        A conflict already alerted within the alert window (by any worker) is not sent again.
+        """
         try:
-            for conflict in conflicts:
-                if (conflict.severity_score >= 6 and 
-                    conflict.time_to_impact <= self.alert_threshold_minutes):
-                    
-                    alert_data = {
-                        'conflict_id': f"temp_{hash(str(conflict.trains_involved) + str(conflict.sections_involved))}",
-                        'type': conflict.conflict_type.value,
-                        'severity': conflict.severity_score,
-                        'trains_involved': conflict.trains_involved,
-                        'sections_involved': conflict.sections_involved,
-                        'time_to_impact': conflict.time_to_impact,
-                        'description': conflict.description,
-                        'resolution_suggestions': conflict.resolution_suggestions,
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-                    
-                    # Send via WebSocket
-                    await connection_manager.broadcast_conflict_alert(alert_data)
-                    
-                    # Store in Redis for persistence
-                    if self.redis_client:
-                        await self.redis_client.publish("railway:conflicts", alert_data)
-                    
-                    logger.warning(f"High-severity conflict alert sent: {conflict.description}")
+            alert_conflicts = [conflict for conflict in conflicts if conflict.is_alertable]
+            
+            if alert_conflicts and self.redis_client:
+                claimed = await self.redis_client.claim_many(
+                    [f"railway:alert:{c.conflict_type.value}:{c.alert_key}" for c in alert_conflicts],
+                    self.alert_threshold_minutes * 60
+                )
+                self.metrics['alerts_suppressed'] += len(claimed) - sum(claimed)
+                alert_conflicts = [c for c, is_new in zip(alert_conflicts, claimed) if is_new]
+            
+            if not alert_conflicts:
+                return 0
+            
+            timestamp = datetime.utcnow()
+            alerts = [
+                {
+                    'conflict_id': f"temp_{conflict.alert_key}",
+                    'type': conflict.conflict_type.value,
+                    'severity': conflict.severity_score,
+                    'trains_involved': conflict.trains_involved,
+                    'sections_involved': conflict.sections_involved,
+                    'time_to_impact': conflict.time_to_impact,
+                    'description': conflict.description,
+                    'resolution_suggestions': conflict.resolution_suggestions,
+                    'timestamp': timestamp
+                }
+                for conflict in alert_conflicts
+            ]
+            
+            # Send via WebSocket
+            await connection_manager.broadcast_conflict_alerts(alerts)
+            
+            # Store in Redis for persistence, one pipelined round trip for the whole batch
+            if self.redis_client:
+                await self.redis_client.publish_many("railway:conflicts", alerts)
+            
+            for conflict in alert_conflicts:
+                logger.warning(f"High-severity conflict alert sent: {conflict.description}")
+            
+            return len(alerts)
             
         except Exception as e:
             logger.error(f"Error sending alerts: {e}")
+            return 0
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get performance metrics"""
@@ -5,13 +5,15 @@ Runs conflict detection every 30 seconds and manages the detection pipeline.
 
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime, timedelta
+from statistics import fmean
 from typing import Optional, Dict, Any
 
 from sqlalchemy.orm import Session
 from .conflict_detector import ConflictDetector
-from .db import get_db
-from .redis_client import RedisClient
+from .db import get_db, get_session
+from .redis_client import RedisClient, get_redis
 from .websocket_manager import connection_manager
 
 logger = logging.getLogger(__name__)
@@ -27,12 +29,20 @@ class ConflictDetectionScheduler:
     - Managing performance metrics
     """
     
+    DETECTION_TIME_SAMPLES = 256
+    DETECTION_TIME_EMA_WEIGHT = 0.05
+    
     def __init__(self, redis_client: Optional[RedisClient] = None):
         self.redis_client = redis_client
         self.detection_interval = 30  # seconds
+        self.min_trigger_interval = 5  # seconds between an on-demand run and the previous run
+        self.status_interval = 5  # seconds between checks for a status broadcast
         self.is_running = False
         self.task: Optional[asyncio.Task] = None
+        self._status_task: Optional[asyncio.Task] = None
         self.detector: Optional[ConflictDetector] = None
+        # Session owned by the scheduler and shared by every cycle of its detector
+        self._session: Optional[Session] = None
         
         # Performance tracking
         self.stats = {
@@ -40,15 +50,25 @@ class ConflictDetectionScheduler:
             'runs_failed': 0,
             'total_conflicts_detected': 0,
             'alerts_sent': 0,
-            'average_detection_time': 0.0,
+            'average_detection_time': 0.0,  # Mean of the last DETECTION_TIME_SAMPLES runs
+            'detection_time_ema': 0.0,
             'last_run_time': None,
             'uptime_start': datetime.utcnow()
         }
         
+        # Recent detection times; a bounded window follows regressions instead of averaging over all uptime
+        self._recent_detection_times = deque(maxlen=self.DETECTION_TIME_SAMPLES)
+        
         # Error tracking
         self.consecutive_failures = 0
         self.max_consecutive_failures = 5
         
+        # Set by trigger_detection to run the next cycle before its deadline
+        self._wake_event = asyncio.Event()
+        
+        # Set when a cycle changes what the status broadcast would report
+        self._status_dirty = False
+        
     async def start(self):
         """Start the background conflict detection scheduler"""
         if self.is_running:
@@ -60,8 +80,9 @@ class ConflictDetectionScheduler:
         
         logger.info("Starting conflict detection scheduler...")
         
-        # Create the background task
+        # Create the background tasks; status broadcasts run off the detection cycle's path
         self.task = asyncio.create_task(self._detection_loop())
+        self._status_task = asyncio.create_task(self._status_loop())
         
         # Log successful start
         logger.info(f"Conflict detection scheduler started successfully. Detection interval: {self.detection_interval}s")
@@ -75,28 +96,51 @@ class ConflictDetectionScheduler:
         
         self.is_running = False
         
-        if self.task:
-            self.task.cancel()
-            try:
-                await self.task
-            except asyncio.CancelledError:
-                pass
+        for task in (self.task, self._status_task):
+            if task and task is not asyncio.current_task():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        
+        if self.detector:
+            await self.detector.stop_invalidation_listener()
+        
+        if self._session:
+            self._session.close()
         
         logger.info("Conflict detection scheduler stopped")
     
+    def trigger_detection(self):
+        """Run the next detection cycle early, e.g. after a train enters a new section"""
+        self._wake_event.set()
+    
     async def _detection_loop(self):
-        """Main detection loop that runs every 30 seconds"""
+        """
+        Main detection loop that runs every 30 seconds.
+        Deadlines advance by a whole interval from the previous deadline, so cycle time does
+        not accumulate as drift; trigger_detection can wake the loop before the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        next_deadline = loop.time()
+        
         while self.is_running:
+            cycle_start = loop.time()
+            self._wake_event.clear()
+            
             try:
-                start_time = datetime.utcnow()
-                
                 # Run conflict detection
                 conflicts_detected = await self._run_detection_cycle()
                 
                 # Update statistics
-                detection_time = (datetime.utcnow() - start_time).total_seconds()
+                detection_time = loop.time() - cycle_start
                 self._update_stats(detection_time, conflicts_detected, success=True)
                 
+                # Broadcast status for new conflicts or recovery from failures
+                if conflicts_detected or self.consecutive_failures:
+                    self._status_dirty = True
+                
                 # Reset consecutive failures on success
                 self.consecutive_failures = 0
                 
@@ -106,6 +150,7 @@ class ConflictDetectionScheduler:
                 logger.error(f"Error in conflict detection cycle: {e}", exc_info=True)
                 self.consecutive_failures += 1
                 self._update_stats(0, 0, success=False)
+                self._status_dirty = True
                 
                 # Stop scheduler if too many consecutive failures
                 if self.consecutive_failures >= self.max_consecutive_failures:
@@ -113,26 +158,31 @@ class ConflictDetectionScheduler:
                     await self.stop()
                     break
             
-            # Wait for next cycle
+            # Wait for the next deadline or an early trigger
             if self.is_running:
+                # Advance only past deadlines: a triggered cycle leaves the periodic schedule alone,
+                # and an overrun skips the missed slots instead of bursting
+                while next_deadline <= loop.time():
+                    next_deadline += self.detection_interval
+                
                 try:
-                    await asyncio.sleep(self.detection_interval)
+                    await asyncio.wait_for(self._wake_event.wait(), timeout=max(0, next_deadline - loop.time()))
+                    # Triggered early: keep a minimum gap between runs
+                    await asyncio.sleep(max(0, cycle_start + self.min_trigger_interval - loop.time()))
+                except asyncio.TimeoutError:
+                    pass
                 except asyncio.CancelledError:
                     break
     
     async def _run_detection_cycle(self) -> int:
         """Run a single conflict detection cycle"""
-        # Get database session
-        db_session = next(get_db())
+        # Initialize detector with the scheduler's long-lived session
+        if not self.detector:
+            self._session = get_session()
+            self.detector = ConflictDetector(self._session, self.redis_client)
+            await self.detector.start_invalidation_listener()
         
         try:
-            # Initialize detector
-            if not self.detector:
-                self.detector = ConflictDetector(db_session, self.redis_client)
-            else:
-                # Update detector's database session
-                self.detector.db = db_session
-            
             # Run conflict detection
             conflicts = await self.detector.detect_conflicts()
             
@@ -144,37 +194,46 @@ class ConflictDetectionScheduler:
             stored_ids = await self.detector.store_conflicts(conflicts)
             logger.info(f"Stored {len(stored_ids)} conflicts in database")
             
-            # Send alerts for high-severity conflicts
-            await self.detector.send_alerts(conflicts)
-            
-            # Count alerts sent
-            alerts_sent = sum(1 for c in conflicts if c.severity_score >= 6 and c.time_to_impact <= 5)
-            self.stats['alerts_sent'] += alerts_sent
-            
-            # Send system status update
-            await self._broadcast_system_status()
+            # Send alerts for high-severity conflicts not already alerted
+            self.stats['alerts_sent'] += await self.detector.send_alerts(conflicts)
             
             return len(conflicts)
             
         finally:
-            db_session.close()
+            # Roll back whatever the cycle left open and return its connection to the pool;
+            # the session stays usable and bound to the detector for the next run
+            self._session.close()
+    
+    async def _status_loop(self):
+        """Broadcast system status every status_interval seconds, only after a cycle changed it"""
+        while self.is_running:
+            try:
+                await asyncio.sleep(self.status_interval)
+            except asyncio.CancelledError:
+                break
+            
+            if self._status_dirty:
+                self._status_dirty = False
+                await self._broadcast_system_status()
     
     async def _broadcast_system_status(self):
         """Broadcast system status to connected clients"""
         try:
+            now = datetime.utcnow()
             status_data = {
                 'conflict_detection': {
                     'status': 'active',
-                    'last_run': self.stats['last_run_time'].isoformat() if self.stats['last_run_time'] else None,
+                    'last_run': self.stats['last_run_time'],
                     'runs_completed': self.stats['runs_completed'],
                     'total_conflicts': self.stats['total_conflicts_detected'],
                     'alerts_sent': self.stats['alerts_sent'],
                     'average_detection_time': self.stats['average_detection_time'],
+                    'detection_time_ema': self.stats['detection_time_ema'],
                     'consecutive_failures': self.consecutive_failures
                 },
                 'detector_metrics': self.detector.get_metrics() if self.detector else {},
-                'uptime_seconds': (datetime.utcnow() - self.stats['uptime_start']).total_seconds(),
-                'timestamp': datetime.utcnow().isoformat()
+                'uptime_seconds': (now - self.stats['uptime_start']).total_seconds(),
+                'timestamp': now
             }
             
             await connection_manager.broadcast_system_status(status_data)
@@ -188,12 +247,15 @@ class ConflictDetectionScheduler:
             self.stats['runs_completed'] += 1
             self.stats['total_conflicts_detected'] += conflicts_detected
             
-            # Update average detection time
-            total_runs = self.stats['runs_completed']
-            current_avg = self.stats['average_detection_time']
-            self.stats['average_detection_time'] = (
-                (current_avg * (total_runs - 1) + detection_time) / total_runs
-            )
+            # Update recent average and EMA of detection time; the EMA starts at the first sample
+            self._recent_detection_times.append(detection_time)
+            self.stats['average_detection_time'] = fmean(self._recent_detection_times)
+            if self.stats['runs_completed'] == 1:
+                self.stats['detection_time_ema'] = detection_time
+            else:
+                self.stats['detection_time_ema'] += self.DETECTION_TIME_EMA_WEIGHT * (
+                    detection_time - self.stats['detection_time_ema']
+                )
         else:
             self.stats['runs_failed'] += 1
         
@@ -221,7 +283,8 @@ class ConflictDetectionScheduler:
             # Send alerts
             await detector.send_alerts(conflicts)
             
-            detection_time = (datetime.utcnow() - start_time).total_seconds()
+            finished = datetime.utcnow()
+            detection_time = (finished - start_time).total_seconds()
             
             result = {
                 'success': True,
@@ -240,7 +303,7 @@ class ConflictDetectionScheduler:
                     }
                     for c in conflicts
                 ],
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': finished
             }
             
             logger.info(f"Manual detection completed: {len(conflicts)} conflicts found in {detection_time:.2f}s")
@@ -251,7 +314,7 @@ class ConflictDetectionScheduler:
             return {
                 'success': False,
                 'error': str(e),
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': datetime.utcnow()
             }
         finally:
             db_session.close()
@@ -290,7 +353,7 @@ class ConflictDetectionScheduler:
     async def force_cache_update(self):
         """Force update of detector cache"""
         if self.detector:
-            await self.detector._update_cache()
+            await self.detector._update_cache(from_database=True)
             logger.info("Forced detector cache update")
         else:
             logger.warning("Detector not initialized, cannot update cache")
@@ -301,11 +364,10 @@ conflict_scheduler = ConflictDetectionScheduler()
 
 
 async def start_conflict_detection(redis_client: Optional[RedisClient] = None):
-    """Start the global conflict detection scheduler"""
+    """Start the global conflict detection scheduler on the shared Redis client"""
     global conflict_scheduler
     
-    if redis_client:
-        conflict_scheduler.redis_client = redis_client
+    conflict_scheduler.redis_client = redis_client or await get_redis()
     
     await conflict_scheduler.start()
 
@@ -322,6 +384,12 @@ def get_conflict_detection_status() -> Dict[str, Any]:
     return conflict_scheduler.get_status()
 
 
+def trigger_conflict_detection():
+    """Ask the global scheduler to run its next cycle early"""
+    global conflict_scheduler
+    conflict_scheduler.trigger_detection()
+
+
 async def run_manual_conflict_detection() -> Dict[str, Any]:
     """Run conflict detection manually"""
     global conflict_scheduler
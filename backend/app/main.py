@@ -1,39 +1,146 @@
 import os
+import asyncio
 import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from fastapi import FastAPI, Request, HTTPException, status
+from typing import Any
+import orjson
+from fastapi import FastAPI, Request, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from sqlalchemy import text
+from sqlalchemy import text, func, select
 
-from .db import get_engine
-from .redis_client import startup_redis, shutdown_redis, get_redis
+from .auth import warm_up_password_hashing
+from .db import get_engine, get_db
+from .models import Conflict, Section, assign_section_bits
+from .redis_client import startup_redis, shutdown_redis, get_redis, RedisClient, RATE_LIMIT_STORAGE_URI, REDIS_URL
 from .websocket_manager import connection_manager
 from .schemas import HealthResponse, PerformanceMetrics, APIResponse
 
 # Import route modules
 from .routes import auth, positions, sections, websocket, ai, controller
 from .conflict_scheduler import start_conflict_detection, stop_conflict_detection, get_conflict_detection_status, run_manual_conflict_detection
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: records are queued by the caller and written to stderr by a listener
+# thread, so request handlers never block on the stream lock or the write itself.
+# The listener runs for the app's lifespan; records logged before startup wait in the queue.
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, _log_handler, respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[QueueHandler(_log_queue)])
 logger = logging.getLogger(__name__)
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter; counts live in Redis so the limits hold across workers, falling back to
+# per-process memory while Redis is unreachable
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    in_memory_fallback_enabled=True
+)
+
+# Manual conflict detection: bursts of up to 5 runs, refilled at a steady 5 per minute
+MANUAL_DETECTION_BURST = 5
+MANUAL_DETECTION_REFILL_PER_SECOND = 5 / 60
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson; datetimes are emitted natively in ISO 8601.
+    Kept here rather than fastapi.responses.ORJSONResponse, which newer FastAPI releases deprecate.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+# Seconds a health or system-info result is reused, so probe bursts collapse into one check
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "1.5"))
+
+
+class _CachedResult:
+    """Per-worker TTL cache for one endpoint's result; concurrent misses share a single recomputation"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.expires_at = 0.0
+        self.value = None
+        self._lock = asyncio.Lock()
+    
+    async def get(self, compute):
+        if time.monotonic() < self.expires_at:
+            return self.value
+        
+        async with self._lock:
+            # Another request may have refreshed it while this one waited
+            if time.monotonic() >= self.expires_at:
+                self.value = await compute()
+                self.expires_at = time.monotonic() + self.ttl
+        return self.value
+
+
+_health_cache = _CachedResult(HEALTH_CACHE_SECONDS)
+_system_info_cache = _CachedResult(HEALTH_CACHE_SECONDS)
+
+
+def _ping_database(engine):
+    """Round trip on a pooled connection; blocking, so run it in the threadpool"""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+def _read_db_versions(engine) -> dict:
+    """PostgreSQL and extension versions in one query; they never change while the process runs"""
+    with engine.connect() as conn:
+        row = conn.execute(text("""
+            SELECT version(),
+                   (SELECT extversion FROM pg_extension WHERE extname = 'timescaledb'),
+                   (SELECT extversion FROM pg_extension WHERE extname = 'postgis')
+        """)).one()
+    return {
+        "postgresql_version": row[0],
+        "timescaledb_version": row[1],
+        "postgis_version": row[2]
+    }
+
+
+def _read_section_ids(engine) -> list:
+    """All section ids, used to assign the permission mask bits"""
+    with engine.connect() as conn:
+        return conn.execute(select(Section.id)).scalars().all()
+
+
+async def _get_db_versions(app: FastAPI) -> dict:
+    """Versions cached on app.state, read from the database on first use if startup could not"""
+    if getattr(app.state, "db_versions", None) is None:
+        app.state.db_versions = await run_in_threadpool(_read_db_versions, get_engine())
+    return app.state.db_versions
+
 
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    _log_listener.start()
     logger.info("Starting Railway Traffic Management API...")
     
+    # Warm the process-wide engine's pool, cache the database versions and assign section mask bits
+    app.state.db_versions = None
+    try:
+        await _get_db_versions(app)
+        assign_section_bits(await run_in_threadpool(_read_section_ids, get_engine()))
+    except Exception as e:
+        logger.error(f"Database warmup failed: {e}")
+    
+    # Calibrate bcrypt before the first login rather than during it
+    await warm_up_password_hashing()
+    
     # Initialize Redis
     await startup_redis()
     
@@ -63,6 +170,9 @@ async def lifespan(app: FastAPI):
     await shutdown_redis()
     
     logger.info("Railway Traffic Management API shutdown complete")
+    
+    # Flush queued log records and stop the listener thread
+    _log_listener.stop()
 
 
 # Create FastAPI app
@@ -72,6 +182,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -79,47 +190,48 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# CORS middleware
-origins = [
+# CORS origins; a set, since FRONTEND_URL usually repeats a default and membership is checked per request
+origins = frozenset({
     os.getenv("FRONTEND_URL", "http://localhost:5173"),
     "http://localhost:5173",
     "http://127.0.0.1:5173",
     "http://localhost:3000",  # React dev server
     "http://127.0.0.1:3000",
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+})
 
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = datetime.utcnow()
+    start_ns = time.perf_counter_ns()
     
     # Process request
     response = await call_next(request)
     
-    # Calculate processing time
-    process_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+    # Calculate processing time on the monotonic clock
+    process_time = (time.perf_counter_ns() - start_ns) / 1_000_000
     
-    # Log request
+    # Log request; arguments are only formatted if INFO is enabled
     logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.2f}ms"
+        "%s %s - Status: %d - Time: %.2fms",
+        request.method, request.url.path, response.status_code, process_time
     )
     
     # Add performance headers
-    response.headers["X-Process-Time"] = str(process_time)
+    response.headers["X-Process-Time"] = f"{process_time:.2f}"
     response.headers["X-Timestamp"] = start_time.isoformat()
     
     return response
 
+# CORS middleware, added last so it is outermost: preflights are answered before request logging runs
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(positions.router)
@@ -134,13 +246,15 @@ async def health_check():
     """
     Health check endpoint
     
-    Returns system status and component health
+    Returns system status and component health, reused for HEALTH_CACHE_SECONDS
     """
+    return await _health_cache.get(_check_health)
+
+
+async def _check_health() -> HealthResponse:
     try:
-        # Check database
-        engine = get_engine()
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        # Check database off the event loop
+        await run_in_threadpool(_ping_database, get_engine())
         db_status = "healthy"
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -179,31 +293,18 @@ async def database_check():
     Detailed database connectivity check
     """
     try:
-        engine = get_engine()
-        with engine.connect() as conn:
-            # Test basic connectivity
-            result = conn.execute(text("SELECT version()")).scalar_one()
-            
-            # Test TimescaleDB extension
-            timescale_version = conn.execute(
-                text("SELECT extversion FROM pg_extension WHERE extname = 'timescaledb'")
-            ).scalar_one_or_none()
-            
-            # Test PostGIS extension
-            postgis_version = conn.execute(
-                text("SELECT extversion FROM pg_extension WHERE extname = 'postgis'")
-            ).scalar_one_or_none()
+        # Test basic connectivity; versions are cached since startup
+        await run_in_threadpool(_ping_database, get_engine())
+        versions = await _get_db_versions(app)
         
         return APIResponse(
             success=True,
             message="Database connectivity check passed",
             data={
-                "postgresql_version": result,
-                "timescaledb_version": timescale_version,
-                "postgis_version": postgis_version,
+                **versions,
                 "extensions_available": {
-                    "timescaledb": timescale_version is not None,
-                    "postgis": postgis_version is not None
+                    "timescaledb": versions["timescaledb_version"] is not None,
+                    "postgis": versions["postgis_version"] is not None
                 }
             }
         )
@@ -218,31 +319,29 @@ async def database_check():
 
 
 @app.get("/api/performance", response_model=PerformanceMetrics, tags=["Monitoring"])
-async def get_performance_metrics():
+async def get_performance_metrics(redis_client: RedisClient = Depends(get_redis)):
     """
     Get system performance metrics
     """
     try:
-        redis_client = await get_redis()
-        
-        # Get metrics from Redis
-        position_updates = await redis_client.get_counter("position_updates_total")
-        bulk_updates = await redis_client.get_counter("bulk_position_updates_total")
+        # Get metrics counters in one MGET, concurrently with the active train count
+        counters, active_trains = await asyncio.gather(
+            redis_client.get_counters([
+                "position_updates_total", "bulk_position_updates_total", "cache_hits", "cache_misses"
+            ]),
+            redis_client.count_active_trains()
+        )
+        position_updates, bulk_updates, cache_hits, cache_misses = counters
         
-        # Get WebSocket stats
+        # Get WebSocket stats; plain in-memory lengths, so no need to leave the event loop
         ws_stats = connection_manager.get_connection_stats()
         
         # Calculate cache hit rate (simplified)
-        cache_hits = await redis_client.get_counter("cache_hits") or 0
-        cache_misses = await redis_client.get_counter("cache_misses") or 0
-        cache_hit_rate = (cache_hits / (cache_hits + cache_misses) * 100) if (cache_hits + cache_misses) > 0 else 0
+        cache_lookups = cache_hits + cache_misses
+        cache_hit_rate = cache_hits / cache_lookups * 100 if cache_lookups else 0
         
         # Get database connection info
-        engine = get_engine()
-        db_connections = engine.pool.size()
-        
-        # Count active trains (from cache or database)
-        active_trains = len(await redis_client.get_active_trains())
+        db_connections = get_engine().pool.size()
         
         return PerformanceMetrics(
             total_trains=active_trains,
@@ -265,35 +364,37 @@ async def get_performance_metrics():
 @app.get("/api/system-info", tags=["Monitoring"])
 async def get_system_info():
     """
-    Get comprehensive system information
+    Get comprehensive system information, reused for HEALTH_CACHE_SECONDS
     """
+    return await _system_info_cache.get(_collect_system_info)
+
+
+async def _collect_system_info() -> APIResponse:
     try:
         # Get WebSocket connection stats
         ws_stats = connection_manager.get_connection_stats()
         
-        # Get Redis info
+        # Redis ping and database versions (cached at startup) are independent, so await them together
         redis_client = await get_redis()
-        redis_connected = await redis_client.is_connected()
-        
-        # Get database info
-        engine = get_engine()
-        with engine.connect() as conn:
-            db_version = conn.execute(text("SELECT version()")).scalar_one()
+        redis_connected, versions = await asyncio.gather(
+            redis_client.is_connected(),
+            _get_db_versions(app)
+        )
         
         return APIResponse(
             success=True,
             message="System information retrieved",
             data={
                 "api_version": "1.0.0",
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": datetime.utcnow(),
                 "database": {
                     "connected": True,
-                    "version": db_version,
-                    "pool_size": engine.pool.size()
+                    "version": versions["postgresql_version"],
+                    "pool_size": get_engine().pool.size()
                 },
                 "redis": {
                     "connected": redis_connected,
-                    "url": os.getenv("REDIS_URL", "redis://localhost:6379/0")
+                    "url": REDIS_URL
                 },
                 "websocket": ws_stats,
                 "environment": {
@@ -342,12 +443,31 @@ async def get_conflict_detection_status_api():
 
 
 @app.post("/api/conflicts/detect", tags=["Conflict Detection"])
-@limiter.limit("5/minute")
-async def run_manual_conflict_detection_api(request: Request):
+async def run_manual_conflict_detection_api(
+    request: Request,
+    response: Response,
+    redis_client: RedisClient = Depends(get_redis)
+):
     """
     Run conflict detection manually (for testing/debugging)
-    Rate limited to 5 requests per minute
+    Rate limited per client to bursts of 5, refilled at 5 requests per minute
     """
+    bucket = await redis_client.take_token(
+        f"rate_limit:conflicts_detect:{get_remote_address(request)}",
+        MANUAL_DETECTION_BURST,
+        MANUAL_DETECTION_REFILL_PER_SECOND
+    )
+    if not bucket["allowed"]:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded for manual conflict detection",
+            headers={
+                "Retry-After": str(bucket["retry_after"]),
+                "RateLimit-Remaining": "0"
+            }
+        )
+    response.headers["RateLimit-Remaining"] = str(bucket["remaining"])
+    
     try:
         result = await run_manual_conflict_detection()
         return APIResponse(
@@ -363,36 +483,91 @@ async def run_manual_conflict_detection_api(request: Request):
         )
 
 
+def _load_conflict_history(since: datetime) -> list:
+    """Conflicts detected since the given time, newest first; blocking, so run it in the threadpool"""
+    db = next(get_db())
+    try:
+        # Plain column rows: no ORM instances are built just to be turned into dicts
+        rows = db.execute(
+            select(
+                Conflict.id, Conflict.conflict_type, Conflict.severity,
+                Conflict.trains_involved, Conflict.sections_involved,
+                Conflict.detection_time, Conflict.resolution_time, Conflict.description,
+                Conflict.auto_resolved, Conflict.estimated_impact_minutes
+            ).where(
+                Conflict.detection_time >= since
+            ).order_by(Conflict.detection_time.desc()).limit(100)
+        ).all()
+        
+        return [
+            {
+                'id': row.id,
+                'type': row.conflict_type,
+                'severity': row.severity.value,
+                'trains_involved': row.trains_involved,
+                'sections_involved': row.sections_involved,
+                'detection_time': row.detection_time,
+                'resolution_time': row.resolution_time,
+                'description': row.description,
+                'auto_resolved': row.auto_resolved,
+                'estimated_impact_minutes': row.estimated_impact_minutes
+            }
+            for row in rows
+        ]
+    finally:
+        db.close()
+
+
+def _load_conflict_statistics(recent_since: datetime) -> dict:
+    """
+    Conflict counts and distributions; the three totals come from one scan with FILTER aggregates.
+    Blocking, so run it in the threadpool.
+    """
+    db = next(get_db())
+    try:
+        total_conflicts, resolved_conflicts, recent_conflicts = db.query(
+            func.count(Conflict.id),
+            func.count(Conflict.id).filter(Conflict.resolution_time.isnot(None)),
+            func.count(Conflict.id).filter(Conflict.detection_time >= recent_since)
+        ).one()
+        
+        # Conflicts by severity
+        severity_stats = db.query(
+            Conflict.severity,
+            func.count(Conflict.id)
+        ).group_by(Conflict.severity).all()
+        
+        # Conflicts by type
+        type_stats = db.query(
+            Conflict.conflict_type,
+            func.count(Conflict.id)
+        ).group_by(Conflict.conflict_type).all()
+        
+        return {
+            'total_conflicts': total_conflicts,
+            'resolved_conflicts': resolved_conflicts,
+            'recent_conflicts_1h': recent_conflicts,
+            'severity_distribution': {
+                str(severity): count for severity, count in severity_stats
+            },
+            'type_distribution': {
+                conflict_type: count for conflict_type, count in type_stats
+            }
+        }
+    finally:
+        db.close()
+
+
 @app.get("/api/conflicts/history", tags=["Conflict Detection"])
 async def get_conflict_history():
     """
     Get historical conflict data from database
     """
     try:
-        from .db import get_db
-        from .models import Conflict
-        
-        db = next(get_db())
-        
         # Get recent conflicts (last 24 hours)
-        conflicts = db.query(Conflict).filter(
-            Conflict.detection_time >= datetime.utcnow() - timedelta(hours=24)
-        ).order_by(Conflict.detection_time.desc()).limit(100).all()
-        
-        conflict_data = []
-        for conflict in conflicts:
-            conflict_data.append({
-                'id': conflict.id,
-                'type': conflict.conflict_type,
-                'severity': conflict.severity.value,
-                'trains_involved': conflict.trains_involved,
-                'sections_involved': conflict.sections_involved,
-                'detection_time': conflict.detection_time.isoformat(),
-                'resolution_time': conflict.resolution_time.isoformat() if conflict.resolution_time else None,
-                'description': conflict.description,
-                'auto_resolved': conflict.auto_resolved,
-                'estimated_impact_minutes': conflict.estimated_impact_minutes
-            })
+        conflict_data = await run_in_threadpool(
+            _load_conflict_history, datetime.utcnow() - timedelta(hours=24)
+        )
         
         return APIResponse(
             success=True,
@@ -418,35 +593,11 @@ async def get_conflict_metrics():
     Get conflict detection performance metrics and statistics
     """
     try:
-        from .db import get_db
-        from .models import Conflict
-        from sqlalchemy import func
-        
-        db = next(get_db())
-        
-        # Get conflict statistics
-        total_conflicts = db.query(func.count(Conflict.id)).scalar()
-        
-        resolved_conflicts = db.query(func.count(Conflict.id)).filter(
-            Conflict.resolution_time.isnot(None)
-        ).scalar()
-        
-        # Conflicts by severity
-        severity_stats = db.query(
-            Conflict.severity,
-            func.count(Conflict.id)
-        ).group_by(Conflict.severity).all()
-        
-        # Conflicts by type
-        type_stats = db.query(
-            Conflict.conflict_type,
-            func.count(Conflict.id)
-        ).group_by(Conflict.conflict_type).all()
-        
-        # Recent conflicts (last hour)
-        recent_conflicts = db.query(func.count(Conflict.id)).filter(
-            Conflict.detection_time >= datetime.utcnow() - timedelta(hours=1)
-        ).scalar()
+        # Recent conflicts are those from the last hour
+        stats = await run_in_threadpool(
+            _load_conflict_statistics, datetime.utcnow() - timedelta(hours=1)
+        )
+        total_conflicts = stats['total_conflicts']
         
         # Get system status
         system_status = get_conflict_detection_status()
@@ -456,15 +607,11 @@ async def get_conflict_metrics():
             message="Conflict detection metrics retrieved",
             data={
                 'total_conflicts': total_conflicts,
-                'resolved_conflicts': resolved_conflicts,
-                'resolution_rate': (resolved_conflicts / total_conflicts * 100) if total_conflicts > 0 else 0,
-                'recent_conflicts_1h': recent_conflicts,
-                'severity_distribution': {
-                    str(severity): count for severity, count in severity_stats
-                },
-                'type_distribution': {
-                    conflict_type: count for conflict_type, count in type_stats
-                },
+                'resolved_conflicts': stats['resolved_conflicts'],
+                'resolution_rate': (stats['resolved_conflicts'] / total_conflicts * 100) if total_conflicts > 0 else 0,
+                'recent_conflicts_1h': stats['recent_conflicts_1h'],
+                'severity_distribution': stats['severity_distribution'],
+                'type_distribution': stats['type_distribution'],
                 'system_performance': system_status.get('stats', {}),
                 'detection_system_status': system_status.get('is_running', False)
             }
@@ -478,17 +625,17 @@ async def get_conflict_metrics():
         )
 
 
-# Global exception handler
+# Global exception handler; the body is pre-encoded, only the timestamp is filled in per error
+_INTERNAL_ERROR_BODY = b'{"success":false,"error":"Internal server error","timestamp":"%s"}'
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Global exception: {exc}", exc_info=True)
-    return JSONResponse(
+    logger.error("Global exception: %s", exc, exc_info=True)
+    return Response(
+        content=_INTERNAL_ERROR_BODY % datetime.utcnow().isoformat().encode(),
         status_code=500,
-        content={
-            "success": False,
-            "error": "Internal server error",
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        media_type="application/json"
     )
 
 
@@ -504,5 +651,5 @@ async def root():
         "docs": "/docs",
         "health": "/api/health",
         "websocket": "/ws/positions",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
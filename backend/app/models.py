@@ -3,14 +3,16 @@ SQLAlchemy ORM Models for Railway Traffic Management System
 Production-ready models with proper relationships and constraints
 """
 
+import threading
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy import (
-    Column, Integer, String, Boolean, DateTime, Text, Time, Numeric,
-    ForeignKey, CheckConstraint, UniqueConstraint, Index, ARRAY, JSON
+    Column, Integer, SmallInteger, String, Boolean, DateTime, Text, Time, Numeric, REAL,
+    ForeignKey, CheckConstraint, UniqueConstraint, Index, ARRAY, JSON, Computed, DDL, event
 )
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.orm import relationship, validates, reconstructor
 from sqlalchemy.dialects.postgresql import ENUM, JSONB
 from enum import Enum as PyEnum
 
@@ -36,6 +38,27 @@ def get_coordinate_column(*args, **kwargs):
 
 Base = declarative_base()
 
+
+class ScaledSmallInteger(TypeDecorator):
+    """Fixed-point value stored as SMALLINT in units of 1/scale (e.g. deci-degrees, centimetres)"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, scale: int):
+        super().__init__()
+        self.scale = scale
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(round(float(value) * self.scale))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value / self.scale
+
+
 # Python Enums for type safety
 class TrainType(PyEnum):
     EXPRESS = "express"
@@ -69,6 +92,45 @@ conflict_severity_enum = ENUM(ConflictSeverity, name='conflict_severity')
 controller_auth_level_enum = ENUM(ControllerAuthLevel, name='controller_auth_level')
 decision_action_enum = ENUM(DecisionAction, name='decision_action')
 
+# String-valued ENUM types (read and written as plain strings by the application)
+section_type_enum = ENUM('track', 'junction', 'station', 'yard', name='section_type')
+operational_status_enum = ENUM('active', 'maintenance', 'out_of_service', 'emergency', name='operational_status')
+fuel_type_enum = ENUM('diesel', 'electric', 'hybrid', name='fuel_type')
+conflict_type_enum = ENUM(
+    'collision_risk', 'section_overload', 'speed_violation', 'signal_violation',
+    'maintenance_conflict', 'priority_conflict', 'route_conflict', name='conflict_type'
+)
+ai_solver_method_enum = ENUM('rule_based', 'constraint_programming', 'reinforcement_learning', name='ai_solver_method')
+
+
+# Dense bit index per section id, so masks are as wide as the number of sections rather than
+# the largest id. Assigned in id order at startup; ids first seen later get the next free bit.
+# Bits are never reassigned, so masks built at any point in the process stay comparable.
+_section_bits: Dict[int, int] = {}
+_section_bits_lock = threading.Lock()
+
+
+def _section_bit(section_id: int) -> int:
+    bit = _section_bits.get(section_id)
+    if bit is None:
+        with _section_bits_lock:
+            bit = _section_bits.setdefault(section_id, len(_section_bits))
+    return bit
+
+
+def assign_section_bits(section_ids: Iterable[int]) -> None:
+    """Give every listed section its bit up front, e.g. all ids from the sections table at startup"""
+    for section_id in sorted(section_ids):
+        _section_bit(section_id)
+
+
+def section_mask(section_ids) -> int:
+    """Pack section ids into an integer bitmask using their dense bit indexes"""
+    mask = 0
+    for section_id in section_ids or ():
+        mask |= 1 << _section_bit(section_id)
+    return mask
+
 
 class Controller(Base):
     """Railway traffic controllers"""
@@ -96,12 +158,24 @@ class Controller(Base):
         CheckConstraint("LENGTH(employee_id) >= 3", name="controllers_employee_id_check"),
     )
     
+    # section_responsibility as a bitmask, kept in step for permission checks
+    _sections_mask = 0
+    
+    @reconstructor
+    def _init_on_load(self):
+        self._sections_mask = section_mask(self.section_responsibility)
+    
     @validates('name')
     def validate_name(self, key, name):
         if not name or len(name.strip()) < 2:
             raise ValueError("Controller name must be at least 2 characters")
         return name.strip()
     
+    @validates('section_responsibility')
+    def validate_section_responsibility(self, key, section_responsibility):
+        self._sections_mask = section_mask(section_responsibility)
+        return section_responsibility
+    
     def __repr__(self):
         return f"<Controller(id={self.id}, name='{self.name}', auth_level='{self.auth_level}')>"
 
@@ -113,7 +187,7 @@ class Section(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     section_code = Column(String(20), unique=True, nullable=False)
-    section_type = Column(String(20), nullable=False)
+    section_type = Column(section_type_enum, nullable=False)
     length_meters = Column(Numeric(10, 2), nullable=False)
     max_speed_kmh = Column(Integer, nullable=False)
     capacity = Column(Integer, nullable=False, default=1)
@@ -147,7 +221,6 @@ class Section(Base):
         CheckConstraint("max_speed_kmh > 0 AND max_speed_kmh <= 300", name="sections_max_speed_check"),
         CheckConstraint("capacity > 0", name="sections_capacity_check"),
         CheckConstraint("gradient BETWEEN -10.0 AND 10.0", name="sections_gradient_check"),
-        CheckConstraint("section_type IN ('track', 'junction', 'station', 'yard')", name="sections_type_check"),
     )
     
     @validates('section_type')
@@ -169,7 +242,7 @@ class Train(Base):
     train_number = Column(String(20), unique=True, nullable=False)
     type = Column(train_type_enum, nullable=False)
     current_section_id = Column(Integer, ForeignKey('sections.id'), nullable=True)
-    speed_kmh = Column(Numeric(5, 2), nullable=False, default=0)
+    speed_kmh = Column(REAL, nullable=False, default=0)
     max_speed_kmh = Column(Integer, nullable=False)
     capacity = Column(Integer, nullable=False)
     current_load = Column(Integer, nullable=False, default=0)
@@ -185,8 +258,8 @@ class Train(Base):
     length_meters = Column(Numeric(8, 2), nullable=False)
     weight_tons = Column(Numeric(10, 2), nullable=False)
     engine_power_kw = Column(Integer, nullable=True)
-    fuel_type = Column(String(20), nullable=True)
-    operational_status = Column(String(20), nullable=False, default='active')
+    fuel_type = Column(fuel_type_enum, nullable=True)
+    operational_status = Column(operational_status_enum, nullable=False, default='active')
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -210,8 +283,6 @@ class Train(Base):
         CheckConstraint("priority BETWEEN 1 AND 10", name="trains_priority_check"),
         CheckConstraint("length_meters > 0", name="trains_length_check"),
         CheckConstraint("weight_tons > 0", name="trains_weight_check"),
-        CheckConstraint("fuel_type IN ('diesel', 'electric', 'hybrid') OR fuel_type IS NULL", name="trains_fuel_check"),
-        CheckConstraint("operational_status IN ('active', 'maintenance', 'out_of_service', 'emergency')", name="trains_status_check"),
         CheckConstraint("""
             scheduled_departure IS NULL OR scheduled_arrival IS NULL OR 
             scheduled_departure < scheduled_arrival
@@ -237,12 +308,12 @@ class Position(Base):
     timestamp = Column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow)
     section_id = Column(Integer, ForeignKey('sections.id'), nullable=False)
     coordinates = Column(String(500), nullable=True)  # Store as WKT or JSON string
-    speed_kmh = Column(Numeric(5, 2), nullable=False, default=0)
-    direction = Column(Numeric(5, 2), nullable=True)
+    speed_kmh = Column(REAL, nullable=False, default=0)
+    direction = Column(ScaledSmallInteger(10), nullable=True)  # Stored in tenths of a degree
     distance_from_start = Column(Numeric(10, 2), nullable=True)
-    signal_strength = Column(Integer, nullable=True)
-    gps_accuracy = Column(Numeric(5, 2), nullable=True)
-    altitude = Column(Numeric(8, 2), nullable=True)
+    signal_strength = Column(SmallInteger, nullable=True)
+    gps_accuracy = Column(ScaledSmallInteger(100), nullable=True)  # Stored in centimetres
+    altitude = Column(REAL, nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     
     # Relationships
@@ -252,7 +323,7 @@ class Position(Base):
     # Constraints
     __table_args__ = (
         CheckConstraint("speed_kmh >= 0", name="positions_speed_check"),
-        CheckConstraint("direction BETWEEN 0 AND 360 OR direction IS NULL", name="positions_direction_check"),
+        CheckConstraint("direction BETWEEN 0 AND 3600 OR direction IS NULL", name="positions_direction_check"),
         CheckConstraint("distance_from_start >= 0 OR distance_from_start IS NULL", name="positions_distance_check"),
         CheckConstraint("signal_strength BETWEEN 0 AND 100 OR signal_strength IS NULL", name="positions_signal_check"),
         CheckConstraint("coordinates IS NOT NULL OR section_id IS NOT NULL", name="positions_coordinates_check"),
@@ -267,10 +338,13 @@ class Conflict(Base):
     __tablename__ = 'conflicts'
     
     id = Column(Integer, primary_key=True)
-    conflict_type = Column(String(50), nullable=False)
+    conflict_type = Column(conflict_type_enum, nullable=False)
     severity = Column(conflict_severity_enum, nullable=False)
     trains_involved = Column(ARRAY(Integer), nullable=False)
     sections_involved = Column(ARRAY(Integer), nullable=False)
+    # Order-insensitive copies of the id arrays, keys of the conflicts_open_uq upsert target
+    trains_sorted = Column(ARRAY(Integer), Computed("int_array_sort(trains_involved)", persisted=True))
+    sections_sorted = Column(ARRAY(Integer), Computed("int_array_sort(sections_involved)", persisted=True))
     detection_time = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     resolution_time = Column(DateTime(timezone=True), nullable=True)
     estimated_impact_minutes = Column(Integer, nullable=True)
@@ -281,7 +355,7 @@ class Conflict(Base):
     
     # AI-specific fields
     ai_analyzed = Column(Boolean, nullable=False, default=False)
-    ai_confidence = Column(Numeric(5, 4), nullable=True)  # 0.0000 to 1.0000
+    ai_confidence = Column(REAL, nullable=True)  # 0.0 to 1.0
     ai_solution_id = Column(String(100), nullable=True)
     ai_recommendations = Column(JSONB, nullable=True)
     ai_analysis_time = Column(DateTime(timezone=True), nullable=True)
@@ -297,10 +371,6 @@ class Conflict(Base):
     __table_args__ = (
         CheckConstraint("array_length(trains_involved, 1) >= 1", name="conflicts_trains_check"),
         CheckConstraint("array_length(sections_involved, 1) >= 1", name="conflicts_sections_check"),
-        CheckConstraint("""
-            conflict_type IN ('collision_risk', 'section_overload', 'speed_violation', 
-                            'signal_violation', 'maintenance_conflict', 'priority_conflict', 'route_conflict')
-        """, name="conflicts_type_check"),
         CheckConstraint("""
             (resolution_time IS NULL AND resolved_by_controller_id IS NULL) OR
             (resolution_time IS NOT NULL AND resolution_time >= detection_time)
@@ -327,6 +397,15 @@ class Conflict(Base):
         return f"<Conflict(id={self.id}, type='{self.conflict_type}', severity='{self.severity}')>"
 
 
+# The generated sorted-id columns need int_array_sort before conflicts is created
+INT_ARRAY_SORT_SQL = """
+CREATE OR REPLACE FUNCTION int_array_sort(ids INTEGER[]) RETURNS INTEGER[] AS $$
+    SELECT ARRAY(SELECT unnest(ids) ORDER BY 1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE
+"""
+event.listen(Conflict.__table__, 'before_create', DDL(INT_ARRAY_SORT_SQL).execute_if(dialect='postgresql'))
+
+
 class Decision(Base):
     """Controller decisions and audit trail"""
     __tablename__ = 'decisions'
@@ -350,9 +429,9 @@ class Decision(Base):
     
     # AI-specific fields
     ai_generated = Column(Boolean, nullable=False, default=False)
-    ai_solver_method = Column(String(50), nullable=True)  # rule_based, constraint_programming, reinforcement_learning
-    ai_score = Column(Numeric(8, 4), nullable=True)  # AI optimization score
-    ai_confidence = Column(Numeric(5, 4), nullable=True)  # 0.0000 to 1.0000
+    ai_solver_method = Column(ai_solver_method_enum, nullable=True)
+    ai_score = Column(REAL, nullable=True)  # AI optimization score
+    ai_confidence = Column(REAL, nullable=True)  # 0.0 to 1.0
     
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
     
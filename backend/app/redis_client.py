@@ -5,8 +5,10 @@ Redis client for caching and pub/sub functionality
 import os
 import json
 import asyncio
+import time
 from typing import Optional, Any, Dict, List
 from datetime import datetime, timedelta
+import orjson
 import redis.asyncio as redis
 from redis.asyncio import Redis
 import logging
@@ -19,12 +21,64 @@ REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 REDIS_DB = int(os.getenv("REDIS_DB", "0"))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+# Size of the single connection pool shared by all users of the global client, pub/sub included
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+REDIS_HEALTH_CHECK_INTERVAL = 30  # seconds
+# Minimum gap between connection attempts while Redis is unreachable, so get_redis() callers
+# do not each pay a connect timeout
+REDIS_RECONNECT_INTERVAL = 5  # seconds
+# Shared storage for the slowapi limiters, so every worker counts against the same limit
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", REDIS_URL)
 
 # Cache TTL settings (in seconds)
 POSITION_CACHE_TTL = 300  # 5 minutes
 SECTION_STATUS_CACHE_TTL = 60  # 1 minute
 TRAIN_INFO_CACHE_TTL = 3600  # 1 hour
 RATE_LIMIT_TTL = 60  # 1 minute
+DETECTOR_TRAIN_CACHE_TTL = 300  # 5 minutes
+DETECTOR_SECTION_CACHE_TTL = 3600  # 1 hour
+
+# Published messages treat naive datetimes as UTC
+_PUBLISH_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# Hashes of packed per-id detector snapshots (field = id)
+TRAIN_META_KEY = "trains:meta"
+SECTION_META_KEY = "sections:meta"
+
+# Id indexes of active trains and sections, each with its length kept under the key plus
+# ID_INDEX_COUNT_SUFFIX so a count is a plain GET
+ACTIVE_TRAINS_KEY = "trains:active"
+ACTIVE_SECTIONS_KEY = "sections:active"
+ID_INDEX_COUNT_SUFFIX = ":count"
+
+# Token bucket at KEYS[1]: ARGV[1] = capacity, ARGV[2] = refill rate in tokens per second.
+# Uses the server clock so all workers agree; returns {allowed, tokens left, seconds until next token}
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+local retry_after = 0
+if allowed == 0 then
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+return {allowed, math.floor(tokens), retry_after}
+"""
+
+# Channels writers publish to after committing train/section changes
+TRAIN_INVALIDATE_CHANNEL = "trains:invalidate"
+SECTION_INVALIDATE_CHANNEL = "sections:invalidate"
 
 
 class RedisClient:
@@ -33,33 +87,50 @@ class RedisClient:
     def __init__(self):
         self.redis: Optional[Redis] = None
         self.pubsub = None
+        self._next_connect_attempt = 0.0
+        self._token_bucket = None
     
     async def connect(self):
-        """Connect to Redis"""
+        """Connect to Redis; a connected client keeps its existing pool"""
+        if self.redis:
+            return
+        if time.monotonic() < self._next_connect_attempt:
+            return
+        
+        pool_options = {
+            "decode_responses": True,
+            "max_connections": REDIS_MAX_CONNECTIONS,
+            "health_check_interval": REDIS_HEALTH_CHECK_INTERVAL
+        }
+        
         try:
             if REDIS_URL:
-                self.redis = redis.from_url(REDIS_URL, decode_responses=True)
+                self.redis = redis.from_url(REDIS_URL, **pool_options)
             else:
                 self.redis = redis.Redis(
                     host=REDIS_HOST,
                     port=REDIS_PORT,
                     db=REDIS_DB,
                     password=REDIS_PASSWORD,
-                    decode_responses=True
+                    **pool_options
                 )
             
             # Test connection
             await self.redis.ping()
+            # Runs via EVALSHA, reloading the script only if the server has flushed it
+            self._token_bucket = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
             logger.info("Connected to Redis successfully")
             
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
             self.redis = None
+            self._next_connect_attempt = time.monotonic() + REDIS_RECONNECT_INTERVAL
     
     async def disconnect(self):
         """Disconnect from Redis"""
         if self.redis:
             await self.redis.close()
+            self.redis = None
             logger.info("Disconnected from Redis")
     
     async def is_connected(self) -> bool:
@@ -100,6 +171,50 @@ class RedisClient:
             logger.error(f"Redis SET error for key {key}: {e}")
             return False
     
+    # Hash methods; values are packed with orjson
+    async def hash_get_many(self, name: str, fields: List[Any]) -> List[Optional[Any]]:
+        """Get several fields of a hash in one round trip; missing fields come back as None"""
+        if not self.redis or not fields:
+            return [None] * len(fields)
+        
+        try:
+            values = await self.redis.hmget(name, fields)
+            return [orjson.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Redis HMGET error for {len(fields)} fields of {name}: {e}")
+            return [None] * len(fields)
+    
+    async def set_id_index(self, key: str, ids: List[int], ttl: int = 3600) -> bool:
+        """Cache a list of ids together with its length, in one round trip"""
+        if not self.redis:
+            return False
+        
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.setex(key, ttl, json.dumps(ids))
+            pipe.setex(key + ID_INDEX_COUNT_SUFFIX, ttl, len(ids))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis SET error for id index {key}: {e}")
+            return False
+    
+    async def hash_set_many(self, name: str, values: Dict[Any, Any], ttl: int = 3600) -> bool:
+        """Set several fields of a hash and refresh its TTL"""
+        if not self.redis:
+            return False
+        
+        try:
+            pipe = self.redis.pipeline()
+            if values:
+                pipe.hset(name, mapping={field: orjson.dumps(value) for field, value in values.items()})
+            pipe.expire(name, ttl)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis HSET error for {len(values)} fields of {name}: {e}")
+            return False
+    
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
         if not self.redis:
@@ -123,6 +238,23 @@ class RedisClient:
             logger.error(f"Redis EXISTS error for key {key}: {e}")
             return False
     
+    async def claim_many(self, keys: List[str], ttl: int) -> List[bool]:
+        """
+        SET NX each key with a TTL in one pipeline round trip.
+        True for keys claimed by this call, False for keys already held; without Redis every key counts as claimed.
+        """
+        if not self.redis or not keys:
+            return [True] * len(keys)
+        
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, 1, nx=True, ex=ttl)
+            return [bool(claimed) for claimed in await pipe.execute()]
+        except Exception as e:
+            logger.error(f"Redis pipelined SET NX error: {e}")
+            return [True] * len(keys)
+    
     # Rate limiting methods
     async def check_rate_limit(self, key: str, limit: int, window: int = 60) -> Dict[str, Any]:
         """Check rate limit for a key"""
@@ -171,6 +303,21 @@ class RedisClient:
             # Allow request on error
             return {"allowed": True, "remaining": limit, "reset_time": datetime.utcnow()}
     
+    async def take_token(self, key: str, capacity: int, refill_per_second: float) -> Dict[str, Any]:
+        """Take one token from a Redis token bucket; bursts up to capacity, refilled at a steady rate"""
+        if not self.redis:
+            return {"allowed": True, "remaining": capacity, "retry_after": 0}
+        
+        try:
+            allowed, remaining, retry_after = await self._token_bucket(
+                keys=[key], args=[capacity, refill_per_second]
+            )
+            return {"allowed": bool(allowed), "remaining": remaining, "retry_after": retry_after}
+        except Exception as e:
+            logger.error(f"Token bucket error for key {key}: {e}")
+            # Allow request on error
+            return {"allowed": True, "remaining": capacity, "retry_after": 0}
+    
     # Pub/Sub methods
     async def publish(self, channel: str, message: Dict[str, Any]) -> bool:
         """Publish message to channel"""
@@ -178,13 +325,28 @@ class RedisClient:
             return False
         
         try:
-            serialized_message = json.dumps(message, default=str)
+            serialized_message = orjson.dumps(message, default=str, option=_PUBLISH_ORJSON_OPTIONS)
             await self.redis.publish(channel, serialized_message)
             return True
         except Exception as e:
             logger.error(f"Redis PUBLISH error for channel {channel}: {e}")
             return False
     
+    async def publish_many(self, channel: str, messages: List[Dict[str, Any]]) -> bool:
+        """Publish several messages to one channel in a single pipeline round trip"""
+        if not self.redis or not messages:
+            return False
+        
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for message in messages:
+                pipe.publish(channel, orjson.dumps(message, default=str, option=_PUBLISH_ORJSON_OPTIONS))
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"Redis pipelined PUBLISH error for channel {channel}: {e}")
+            return False
+    
     async def subscribe(self, channels: List[str]):
         """Subscribe to channels"""
         if not self.redis:
@@ -230,7 +392,7 @@ class RedisClient:
         return await self.get(key)
     
     async def invalidate_train_cache(self, train_id: int) -> bool:
-        """Invalidate all cache entries for a train"""
+        """Invalidate all cache entries for a train and notify in-process caches"""
         keys = [
             f"train:position:{train_id}",
             f"train:info:{train_id}"
@@ -239,21 +401,43 @@ class RedisClient:
         try:
             if self.redis:
                 await self.redis.delete(*keys)
+                await self.redis.hdel(TRAIN_META_KEY, train_id)
+                await self.publish(TRAIN_INVALIDATE_CHANNEL, {"train_id": train_id})
             return True
         except Exception as e:
             logger.error(f"Cache invalidation error for train {train_id}: {e}")
             return False
     
+    async def invalidate_section_cache(self, section_id: int) -> bool:
+        """Invalidate the shared cache entry for a section and notify in-process caches"""
+        try:
+            if self.redis:
+                await self.redis.hdel(SECTION_META_KEY, section_id)
+                await self.publish(SECTION_INVALIDATE_CHANNEL, {"section_id": section_id})
+            return True
+        except Exception as e:
+            logger.error(f"Cache invalidation error for section {section_id}: {e}")
+            return False
+    
     async def get_active_trains(self) -> List[int]:
         """Get list of active train IDs from cache"""
-        key = "trains:active"
-        cached_data = await self.get(key)
+        cached_data = await self.get(ACTIVE_TRAINS_KEY)
         return cached_data if cached_data else []
     
+    async def count_active_trains(self) -> int:
+        """Number of cached active train IDs, read from the length stored with the list"""
+        if not self.redis:
+            return 0
+        
+        try:
+            return int(await self.redis.get(ACTIVE_TRAINS_KEY + ID_INDEX_COUNT_SUFFIX) or 0)
+        except Exception as e:
+            logger.error(f"Redis active train count error: {e}")
+            return 0
+    
     async def set_active_trains(self, train_ids: List[int]) -> bool:
         """Cache list of active train IDs"""
-        key = "trains:active"
-        return await self.set(key, train_ids, 300)  # 5 minutes TTL
+        return await self.set_id_index(ACTIVE_TRAINS_KEY, train_ids, 300)  # 5 minutes TTL
     
     # Performance metrics
     async def increment_counter(self, key: str, ttl: int = 3600) -> int:
@@ -282,6 +466,18 @@ class RedisClient:
         except Exception as e:
             logger.error(f"Counter get error for key {key}: {e}")
             return 0
+    
+    async def get_counters(self, keys: List[str]) -> List[int]:
+        """Get several counter values with one MGET round trip; missing counters read as 0"""
+        if not self.redis or not keys:
+            return [0] * len(keys)
+        
+        try:
+            values = await self.redis.mget(keys)
+            return [int(value) if value else 0 for value in values]
+        except Exception as e:
+            logger.error(f"Counter MGET error for keys {keys}: {e}")
+            return [0] * len(keys)
 
 
 # Global Redis client instance
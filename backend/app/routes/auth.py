@@ -42,7 +42,7 @@ async def login_controller(
     
     try:
         # Authenticate controller
-        controller = authenticate_controller(
+        controller = await authenticate_controller(
             db, 
             login_request.employee_id, 
             login_request.password
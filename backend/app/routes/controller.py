@@ -197,6 +197,13 @@ async def apply_ai_recommendation(
                     train.max_speed_kmh = min(train.max_speed_kmh, max_speed)
         
         db_session.commit()
+        
+        # Let conflict detectors drop their cached copies of the modified trains
+        redis_client = await get_redis()
+        for action in train_actions:
+            if action.get("action") in ("priority_change", "speed_limit") and action.get("train_id"):
+                await redis_client.invalidate_train_cache(action["train_id"])
+        
         logger.info(f"Applied AI recommendations for conflict {conflict.id}")
     
     except Exception as e:
@@ -267,6 +274,10 @@ async def execute_train_control(
         
         db_session.commit()
         
+        if command in ("priority", "stop", "speed_limit", "resume"):
+            redis_client = await get_redis()
+            await redis_client.invalidate_train_cache(train_id)
+        
         # Send WebSocket notification to train operator
         await connection_manager.broadcast_to_all({
             "type": "train_control",
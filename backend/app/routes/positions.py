@@ -29,8 +29,9 @@ def parse_wkt_coordinates(wkt_string: Optional[str]) -> Tuple[float, float]:
     except (IndexError, ValueError):
         return 0.0, 0.0
 from ..auth import get_current_active_controller
-from ..redis_client import get_redis, RedisClient
+from ..redis_client import get_redis, RedisClient, RATE_LIMIT_STORAGE_URI
 from ..websocket_manager import connection_manager
+from ..conflict_scheduler import trigger_conflict_detection
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -50,8 +51,13 @@ except ImportError as e:
 
 router = APIRouter(prefix="/api/trains", tags=["Position Tracking"])
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter, sharing its counts with the other workers through Redis
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    in_memory_fallback_enabled=True
+)
 
 
 @router.get("", response_model=List[dict])
@@ -439,6 +445,7 @@ async def update_train_position(
             train.current_section_id = position_update.section_id
             train.speed_kmh = position_update.speed_kmh
             db.commit()
+            trigger_conflict_detection()
         
         # Broadcast update in background
         position_data = {
@@ -512,6 +519,7 @@ async def bulk_update_positions(
     try:
         updated_positions = []
         errors = []
+        section_changed = False
         
         for position_update in bulk_update.positions:
             try:
@@ -526,6 +534,7 @@ async def bulk_update_positions(
                 if train.current_section_id != position_update.section_id:
                     train.current_section_id = position_update.section_id
                     train.speed_kmh = position_update.speed_kmh
+                    section_changed = True
                 
                 updated_positions.append({
                     "train_id": position.train_id,
@@ -564,6 +573,8 @@ async def bulk_update_positions(
         
         # Commit all train updates
         db.commit()
+        if section_changed:
+            trigger_conflict_detection()
         
         # Update performance counters
         await redis_client.increment_counter("bulk_position_updates_total")
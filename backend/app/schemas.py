@@ -4,7 +4,7 @@ Request/Response schemas with validation
 """
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, NamedTuple
 from decimal import Decimal
 from pydantic import BaseModel, Field, field_validator, EmailStr
 from enum import Enum
@@ -60,7 +60,8 @@ class LoginResponse(BaseModel):
     controller: "ControllerResponse"
 
 
-class TokenData(BaseModel):
+class TokenData(NamedTuple):
+    """Claims extracted from a verified JWT (internal only, so no Pydantic validation)"""
     employee_id: Optional[str] = None
     controller_id: Optional[int] = None
 
@@ -81,7 +82,7 @@ class PositionUpdate(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     distance_from_start: Optional[float] = Field(None, ge=0, description="Distance from section start in meters")
     signal_strength: Optional[int] = Field(None, ge=0, le=100, description="GPS signal strength percentage")
-    gps_accuracy: Optional[float] = Field(None, ge=0, description="GPS accuracy in meters")
+    gps_accuracy: Optional[float] = Field(None, ge=0, le=327.67, description="GPS accuracy in meters")
 
     @field_validator('timestamp')
     @classmethod
@@ -14,10 +14,10 @@ from enum import Enum
 
 import redis.asyncio as redis
 from app.redis_client import redis_client
-from app.ai_config import AIConfig
+from app.ai_config import get_ai_config
 
 # Initialize AI config
-ai_config = AIConfig()
+ai_config = get_ai_config()
 
 
 class CacheStatus(Enum):
@@ -29,7 +29,7 @@ from sqlalchemy import and_, or_
 from app.models import Conflict, Decision, Train, Section, Controller
 from app.railway_optimization import OptimizationEngine
 from app.railway_adapter import RailwayAIAdapter, DataMapper
-from app.ai_config import AIConfig
+from app.ai_config import AIConfig, get_ai_config
 
 
 class AIOptimizationService:
@@ -53,7 +53,7 @@ class AIOptimizationService:
             config: AI configuration (uses default if not provided)
         """
         self.db = db_session
-        self.config = config or AIConfig()
+        self.config = config or get_ai_config()
         
         # Initialize AI components if enabled
         if self.config.ENABLE_AI_OPTIMIZATION:
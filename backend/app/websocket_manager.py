@@ -4,6 +4,7 @@ WebSocket connection manager for real-time railway position tracking
 
 import json
 import asyncio
+import orjson
 from typing import Dict, List, Set, Optional, Any
 from datetime import datetime
 from fastapi import WebSocket, WebSocketDisconnect
@@ -13,6 +14,14 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Naive datetimes in payloads are UTC throughout the backend
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def _dumps(message: Dict[str, Any]) -> str:
+    """Serialize a message for a text frame with orjson; unknown types fall back to str()"""
+    return orjson.dumps(message, default=str, option=_ORJSON_OPTIONS).decode()
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates"""
@@ -100,7 +109,7 @@ class ConnectionManager:
         if connection_id in self.active_connections:
             try:
                 websocket = self.active_connections[connection_id]
-                await websocket.send_text(json.dumps(message, default=str))
+                await websocket.send_text(_dumps(message))
             except Exception as e:
                 logger.error(f"Error sending message to {connection_id}: {e}")
                 # Remove broken connection
@@ -111,7 +120,7 @@ class ConnectionManager:
         if not self.active_connections:
             return
         
-        message_text = json.dumps(message, default=str)
+        message_text = _dumps(message)
         
         # Send to all connections concurrently
         tasks = []
@@ -127,8 +136,10 @@ class ConnectionManager:
         if not subscribers:
             return
         
-        message_text = json.dumps(message, default=str)
-        
+        await self._broadcast_text_to_subscribers(_dumps(message), subscribers)
+    
+    async def _broadcast_text_to_subscribers(self, message_text: str, subscribers: Set[str]):
+        """Send an already serialized message to specific subscribers"""
         tasks = []
         for connection_id in list(subscribers):
             if connection_id in self.active_connections:
@@ -147,6 +158,15 @@ class ConnectionManager:
             logger.error(f"Error sending to {connection_id}: {e}")
             self.disconnect(connection_id)
     
+    async def _safe_send_many(self, websocket: WebSocket, messages: List[str], connection_id: str):
+        """Safely send several messages to one WebSocket in order"""
+        try:
+            for message in messages:
+                await websocket.send_text(message)
+        except Exception as e:
+            logger.error(f"Error sending to {connection_id}: {e}")
+            self.disconnect(connection_id)
+    
     # Subscription management
     def subscribe_to_train(self, connection_id: str, train_id: int):
         """Subscribe connection to train updates"""
@@ -223,20 +243,21 @@ class ConnectionManager:
     # Broadcasting methods
     async def broadcast_position_update(self, position_broadcast: PositionBroadcast):
         """Broadcast train position update"""
-        message = position_broadcast.dict()
+        # Serialized once for every subscriber group
+        message_text = _dumps(position_broadcast.dict())
         
         # Send to general subscribers
-        await self.broadcast_to_subscribers(message, self.general_subscribers)
+        await self._broadcast_text_to_subscribers(message_text, self.general_subscribers)
         
         # Send to train-specific subscribers
         train_id = position_broadcast.train_id
         if train_id in self.train_subscriptions:
-            await self.broadcast_to_subscribers(message, self.train_subscriptions[train_id])
+            await self._broadcast_text_to_subscribers(message_text, self.train_subscriptions[train_id])
         
         # Send to section-specific subscribers
         section_id = position_broadcast.position.section_id
         if section_id in self.section_subscriptions:
-            await self.broadcast_to_subscribers(message, self.section_subscriptions[section_id])
+            await self._broadcast_text_to_subscribers(message_text, self.section_subscriptions[section_id])
     
     async def broadcast_conflict_alert(self, conflict_data: Dict[str, Any]):
         """Broadcast conflict alert"""
@@ -247,6 +268,22 @@ class ConnectionManager:
         
         await self.broadcast_to_all(message.dict())
     
+    async def broadcast_conflict_alerts(self, alerts: List[Dict[str, Any]]):
+        """Broadcast several conflict alerts, serializing each once and using one send task per client"""
+        if not alerts or not self.active_connections:
+            return
+        
+        message_texts = [
+            _dumps(WebSocketMessage(type="conflict_alert", data=alert).dict())
+            for alert in alerts
+        ]
+        
+        tasks = [
+            asyncio.create_task(self._safe_send_many(websocket, message_texts, connection_id))
+            for connection_id, websocket in list(self.active_connections.items())
+        ]
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
     async def broadcast_ai_update(self, ai_data: Dict[str, Any]):
         """
         Phase 4: Broadcast AI optimization results
@@ -256,21 +293,22 @@ class ConnectionManager:
             type="ai_optimization",
             data=ai_data
         )
+        message_text = _dumps(message.dict())
         
         # Send to AI subscribers
-        await self.broadcast_to_subscribers(message.dict(), self.ai_subscribers)
+        await self._broadcast_text_to_subscribers(message_text, self.ai_subscribers)
         
         # Also send to general subscribers
-        await self.broadcast_to_subscribers(message.dict(), self.general_subscribers)
+        await self._broadcast_text_to_subscribers(message_text, self.general_subscribers)
         
         # Send to specific train/section subscribers if applicable
         train_id = ai_data.get("train_id")
         if train_id and train_id in self.train_subscriptions:
-            await self.broadcast_to_subscribers(message.dict(), self.train_subscriptions[train_id])
+            await self._broadcast_text_to_subscribers(message_text, self.train_subscriptions[train_id])
         
         section_id = ai_data.get("section_id")
         if section_id and section_id in self.section_subscriptions:
-            await self.broadcast_to_subscribers(message.dict(), self.section_subscriptions[section_id])
+            await self._broadcast_text_to_subscribers(message_text, self.section_subscriptions[section_id])
     
     async def broadcast_ai_training_update(self, training_data: Dict[str, Any]):
         """
@@ -281,11 +319,13 @@ class ConnectionManager:
             data=training_data
         )
         
+        message_text = _dumps(message.dict())
+        
         # Send to AI training subscribers
-        await self.broadcast_to_subscribers(message.dict(), self.ai_training_subscribers)
+        await self._broadcast_text_to_subscribers(message_text, self.ai_training_subscribers)
         
         # Also send to general subscribers
-        await self.broadcast_to_subscribers(message.dict(), self.general_subscribers)
+        await self._broadcast_text_to_subscribers(message_text, self.general_subscribers)
     
     async def broadcast_system_status(self, status_data: Dict[str, Any]):
         """Broadcast system status update"""
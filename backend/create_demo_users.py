@@ -55,7 +55,7 @@ def setup_auth():
                     conn.execute(
                         text("""
                             UPDATE controllers 
-                            SET password_hash = :pwd_hash 
+                            SET password_hash = :pwd_hash, updated_at = CURRENT_TIMESTAMP
                             WHERE employee_id = :emp_id
                         """),
                         {"pwd_hash": hashed, "emp_id": employee_id}
@@ -18,10 +18,10 @@ import redis.asyncio as redis
 
 from app.db import get_db
 from app.redis_client import redis_client
-from app.ai_config import AIConfig
+from app.ai_config import get_ai_config
 
 # Initialize AI config
-ai_config = AIConfig()
+ai_config = get_ai_config()
 
 
 logger = logging.getLogger(__name__)
@@ -20,10 +20,10 @@ from prometheus_client.core import CollectorRegistry
 
 from app.models import Conflict, Decision, Train, Section
 from app.redis_client import redis_client
-from app.ai_config import AIConfig
+from app.ai_config import get_ai_config
 
 # Initialize AI config
-ai_config = AIConfig()
+ai_config = get_ai_config()
 
 
 logger = logging.getLogger(__name__)
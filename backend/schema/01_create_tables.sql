@@ -10,6 +10,13 @@ CREATE TYPE train_type AS ENUM ('express', 'local', 'freight', 'maintenance');
 CREATE TYPE conflict_severity AS ENUM ('low', 'medium', 'high', 'critical');
 CREATE TYPE controller_auth_level AS ENUM ('operator', 'supervisor', 'manager', 'admin');
 CREATE TYPE decision_action AS ENUM ('reroute', 'delay', 'priority_change', 'emergency_stop', 'speed_limit', 'manual_override');
+CREATE TYPE section_type AS ENUM ('track', 'junction', 'station', 'yard');
+CREATE TYPE operational_status AS ENUM ('active', 'maintenance', 'out_of_service', 'emergency');
+CREATE TYPE fuel_type AS ENUM ('diesel', 'electric', 'hybrid');
+CREATE TYPE conflict_type AS ENUM (
+    'collision_risk', 'section_overload', 'speed_violation', 'signal_violation',
+    'maintenance_conflict', 'priority_conflict', 'route_conflict'
+);
 
 -- Controllers table - Railway traffic controllers
 CREATE TABLE controllers (
@@ -31,7 +38,7 @@ CREATE TABLE sections (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
     section_code VARCHAR(20) UNIQUE NOT NULL,
-    section_type VARCHAR(20) NOT NULL CHECK (section_type IN ('track', 'junction', 'station', 'yard')),
+    section_type section_type NOT NULL,
     length_meters DECIMAL(10,2) NOT NULL CHECK (length_meters > 0),
     max_speed_kmh INTEGER NOT NULL CHECK (max_speed_kmh > 0 AND max_speed_kmh <= 300),
     capacity INTEGER NOT NULL DEFAULT 1 CHECK (capacity > 0),
@@ -59,7 +66,7 @@ CREATE TABLE trains (
     train_number VARCHAR(20) UNIQUE NOT NULL,
     type train_type NOT NULL,
     current_section_id INTEGER REFERENCES sections(id),
-    speed_kmh DECIMAL(5,2) NOT NULL DEFAULT 0 CHECK (speed_kmh >= 0),
+    speed_kmh REAL NOT NULL DEFAULT 0 CHECK (speed_kmh >= 0),
     max_speed_kmh INTEGER NOT NULL CHECK (max_speed_kmh > 0 AND max_speed_kmh <= 300),
     capacity INTEGER NOT NULL CHECK (capacity > 0),
     current_load INTEGER NOT NULL DEFAULT 0 CHECK (current_load >= 0),
@@ -75,9 +82,8 @@ CREATE TABLE trains (
     length_meters DECIMAL(8,2) NOT NULL CHECK (length_meters > 0),
     weight_tons DECIMAL(10,2) NOT NULL CHECK (weight_tons > 0),
     engine_power_kw INTEGER,
-    fuel_type VARCHAR(20) CHECK (fuel_type IN ('diesel', 'electric', 'hybrid')),
-    operational_status VARCHAR(20) NOT NULL DEFAULT 'active' 
-        CHECK (operational_status IN ('active', 'maintenance', 'out_of_service', 'emergency')),
+    fuel_type fuel_type,
+    operational_status operational_status NOT NULL DEFAULT 'active',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     
@@ -95,12 +101,12 @@ CREATE TABLE positions (
     section_id INTEGER NOT NULL REFERENCES sections(id),
     timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     coordinates GEOMETRY(POINT, 4326), -- Exact GPS coordinates
-    speed_kmh DECIMAL(5,2) NOT NULL DEFAULT 0 CHECK (speed_kmh >= 0),
-    direction DECIMAL(5,2) CHECK (direction BETWEEN 0 AND 360), -- Compass bearing
+    speed_kmh REAL NOT NULL DEFAULT 0 CHECK (speed_kmh >= 0),
+    direction SMALLINT CHECK (direction BETWEEN 0 AND 3600), -- Compass bearing in tenths of a degree
     distance_from_start DECIMAL(10,2) CHECK (distance_from_start >= 0), -- Distance from section start
-    signal_strength INTEGER CHECK (signal_strength BETWEEN 0 AND 100),
-    gps_accuracy DECIMAL(5,2), -- GPS accuracy in meters
-    altitude DECIMAL(8,2), -- Altitude in meters
+    signal_strength SMALLINT CHECK (signal_strength BETWEEN 0 AND 100),
+    gps_accuracy SMALLINT, -- GPS accuracy in centimetres
+    altitude REAL, -- Altitude in meters
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     
     PRIMARY KEY (train_id, timestamp),
@@ -110,16 +116,47 @@ CREATE TABLE positions (
 -- Convert positions table to TimescaleDB hypertable
 SELECT create_hypertable('positions', 'timestamp', chunk_time_interval => INTERVAL '1 hour');
 
+-- Space-partition chunks by train (latest-per-train index lives in 02_create_indexes.sql)
+SELECT add_dimension('positions', 'train_id', number_partitions => 16);
+
+-- Native columnar compression for chunks older than a day, segmented per train
+ALTER TABLE positions SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'train_id',
+    timescaledb.compress_orderby = 'timestamp DESC'
+);
+SELECT add_compression_policy('positions', INTERVAL '1 day');
+
+-- Continuous aggregate with the latest position per train per minute for dashboard views
+CREATE MATERIALIZED VIEW positions_1min WITH (timescaledb.continuous) AS
+SELECT train_id,
+       time_bucket('1 minute', timestamp) AS bucket,
+       last(section_id, timestamp) AS section_id,
+       last(speed_kmh, timestamp) AS speed_kmh,
+       last(coordinates, timestamp) AS coordinates
+FROM positions
+GROUP BY train_id, bucket
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('positions_1min',
+    start_offset => INTERVAL '5 minutes',
+    end_offset => INTERVAL '1 minute',
+    schedule_interval => INTERVAL '30 seconds');
+
+-- Sorted copy of an id array, for order-insensitive equality
+CREATE OR REPLACE FUNCTION int_array_sort(ids INTEGER[]) RETURNS INTEGER[] AS $$
+    SELECT ARRAY(SELECT unnest(ids) ORDER BY 1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
 -- Conflicts table - Detected conflicts and their resolution
 CREATE TABLE conflicts (
     id SERIAL PRIMARY KEY,
-    conflict_type VARCHAR(50) NOT NULL CHECK (conflict_type IN (
-        'collision_risk', 'section_overload', 'speed_violation', 'signal_violation', 
-        'maintenance_conflict', 'priority_conflict', 'route_conflict'
-    )),
+    conflict_type conflict_type NOT NULL,
     severity conflict_severity NOT NULL,
     trains_involved INTEGER[] NOT NULL, -- Array of train IDs
     sections_involved INTEGER[] NOT NULL, -- Array of section IDs
+    trains_sorted INTEGER[] GENERATED ALWAYS AS (int_array_sort(trains_involved)) STORED,
+    sections_sorted INTEGER[] GENERATED ALWAYS AS (int_array_sort(sections_involved)) STORED,
     detection_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     resolution_time TIMESTAMP WITH TIME ZONE,
     estimated_impact_minutes INTEGER,
@@ -213,26 +250,178 @@ CREATE TABLE maintenance_windows (
     CONSTRAINT maintenance_time_check CHECK (end_time > start_time)
 );
 
--- Add triggers for updated_at timestamps
-CREATE OR REPLACE FUNCTION update_updated_at_column()
-RETURNS TRIGGER AS $$
-BEGIN
-    NEW.updated_at = CURRENT_TIMESTAMP;
-    RETURN NEW;
-END;
-$$ language 'plpgsql';
-
-CREATE TRIGGER update_controllers_updated_at BEFORE UPDATE ON controllers
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-
-CREATE TRIGGER update_sections_updated_at BEFORE UPDATE ON sections
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+-- Add triggers for updated_at timestamps using the C-language moddatetime contrib function.
+-- controllers and sections have no trigger: every writer sets updated_at in its own UPDATE.
+CREATE EXTENSION IF NOT EXISTS moddatetime;
 
 CREATE TRIGGER update_trains_updated_at BEFORE UPDATE ON trains
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
 
 CREATE TRIGGER update_conflicts_updated_at BEFORE UPDATE ON conflicts
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
 
 CREATE TRIGGER update_train_schedules_updated_at BEFORE UPDATE ON train_schedules
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    FOR EACH ROW EXECUTE FUNCTION moddatetime(updated_at);
+
+-- Set-based conflict detection (see alembic/versions/003_add_conflict_detection_function.sql)
+CREATE OR REPLACE FUNCTION detect_section_conflicts(window_min INTEGER, buffer_min INTEGER)
+RETURNS TABLE (
+    conflict_type TEXT,
+    section_id INTEGER,
+    train_ids INTEGER[],
+    impact_time TIMESTAMP,
+    metadata JSONB
+) AS $$
+WITH base AS (
+    SELECT now() AT TIME ZONE 'UTC' AS now_utc,
+           (now() AT TIME ZONE 'UTC') + make_interval(mins => window_min) AS end_utc
+),
+-- Latest position per moving active train, one index seek each
+latest AS (
+    SELECT t.id AS train_id, t.max_speed_kmh, p.section_id,
+           p.speed_kmh::float8 AS speed,
+           COALESCE(p.distance_from_start, 0)::float8 AS distance_from_start,
+           COALESCE(s.length_meters, 1000)::float8 AS section_length
+    FROM trains t
+    CROSS JOIN LATERAL (
+        SELECT section_id, speed_kmh, distance_from_start
+        FROM positions
+        WHERE train_id = t.id
+            AND timestamp > now() - interval '10 minutes'
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) p
+    LEFT JOIN sections s ON s.id = p.section_id
+    WHERE t.operational_status = 'active'
+        AND p.section_id IS NOT NULL
+        AND p.speed_kmh > 0
+),
+-- Time to leave the current section at current speed
+current_preds AS (
+    SELECT l.*, b.now_utc AS arrival,
+           b.now_utc + make_interval(secs => (l.section_length - l.distance_from_start) / (l.speed * 1000 / 60) * 60) AS exit_time
+    FROM latest l CROSS JOIN base b
+),
+-- First active schedule per train
+routes AS (
+    SELECT DISTINCT ON (ts.train_id) ts.train_id, ts.route_sections
+    FROM train_schedules ts
+    WHERE ts.active
+        AND cardinality(ts.route_sections) > 0
+        AND ts.train_id IN (SELECT train_id FROM latest)
+    ORDER BY ts.train_id, ts.id
+),
+-- Remaining route sections after the current one, traversed back to back
+future AS (
+    SELECT c.train_id, r.section_id, r.ord, c.exit_time,
+           LEAST(c.speed, c.max_speed_kmh)::float8 AS speed,
+           COALESCE(s.length_meters, 1000)::float8 / (LEAST(c.speed, c.max_speed_kmh) * 1000 / 60) AS traverse_min
+    FROM current_preds c
+    JOIN routes rt ON rt.train_id = c.train_id
+    CROSS JOIN LATERAL unnest(rt.route_sections) WITH ORDINALITY AS r(section_id, ord)
+    LEFT JOIN sections s ON s.id = r.section_id
+    WHERE r.ord > array_position(rt.route_sections, c.section_id)
+),
+future_preds AS (
+    SELECT f.train_id, f.section_id, f.speed,
+           f.exit_time + make_interval(secs => 60 * (SUM(f.traverse_min) OVER w - f.traverse_min)) AS arrival,
+           f.exit_time + make_interval(secs => 60 * SUM(f.traverse_min) OVER w) AS exit_time
+    FROM future f
+    WINDOW w AS (PARTITION BY f.train_id ORDER BY f.ord)
+),
+preds AS (
+    SELECT c.train_id, c.section_id, c.speed, c.arrival, c.exit_time
+    FROM current_preds c CROSS JOIN base b
+    WHERE c.exit_time <= b.end_utc
+    UNION ALL
+    SELECT f.train_id, f.section_id, f.speed, f.arrival, f.exit_time
+    FROM future_preds f CROSS JOIN base b
+    WHERE f.arrival <= b.end_utc
+),
+ordered AS (
+    SELECT p.*, ROW_NUMBER() OVER (PARTITION BY p.section_id ORDER BY p.arrival) AS rn
+    FROM preds p
+),
+-- Two trains overlapping on a single-track section
+spatial AS (
+    SELECT 'spatial_collision'::text, a.section_id, ARRAY[a.train_id, b.train_id], a.arrival,
+           jsonb_build_object(
+               'overlap_minutes', EXTRACT(EPOCH FROM LEAST(a.exit_time, b.exit_time) - b.arrival) / 60,
+               'section_capacity', s.capacity,
+               'train1_speed', a.speed,
+               'train2_speed', b.speed
+           )
+    FROM ordered a
+    JOIN sections s ON s.id = a.section_id AND s.active AND s.capacity = 1
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn > a.rn
+    WHERE LEAST(a.exit_time, b.exit_time) > b.arrival
+),
+-- Next train arriving within the safety buffer after the previous one exits
+temporal AS (
+    SELECT 'temporal_conflict'::text, a.section_id, ARRAY[a.train_id, b.train_id], a.arrival,
+           jsonb_build_object(
+               'safety_buffer', EXTRACT(EPOCH FROM b.arrival - a.exit_time) / 60,
+               'required_buffer', buffer_min
+           )
+    FROM ordered a
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn = a.rn + 1
+    WHERE b.arrival > a.exit_time
+        AND b.arrival - a.exit_time < make_interval(mins => buffer_min)
+),
+-- Express train arriving right behind a lower priority freight train
+priority AS (
+    SELECT 'priority_conflict'::text, a.section_id, ARRAY[a.train_id, b.train_id], b.arrival,
+           jsonb_build_object(
+               'blocking_train_priority', ta.priority,
+               'blocked_train_priority', tb.priority,
+               'speed_difference', tb.max_speed_kmh - ta.max_speed_kmh
+           )
+    FROM ordered a
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn = a.rn + 1
+    JOIN trains ta ON ta.id = a.train_id
+    JOIN trains tb ON tb.id = b.train_id
+    WHERE tb.priority > ta.priority
+        AND tb.type = 'express'
+        AND ta.type = 'freight'
+),
+-- A train plus every later train overlapping it exceeds junction capacity
+junction AS (
+    SELECT 'junction_conflict'::text, a.section_id, a.train_id || array_agg(b.train_id ORDER BY b.rn), a.arrival,
+           jsonb_build_object(
+               'junction_capacity', s.capacity,
+               'trains_count', COUNT(*) + 1,
+               'overflow', COUNT(*) + 1 - s.capacity
+           )
+    FROM ordered a
+    JOIN sections s ON s.id = a.section_id AND s.active AND s.section_type = 'junction'
+    JOIN ordered b ON b.section_id = a.section_id AND b.rn > a.rn
+    WHERE LEAST(a.exit_time, b.exit_time) > b.arrival
+    GROUP BY a.section_id, a.train_id, a.rn, a.arrival, s.capacity
+    HAVING COUNT(*) + 1 > s.capacity
+)
+SELECT * FROM spatial
+UNION ALL SELECT * FROM temporal
+UNION ALL SELECT * FROM priority
+UNION ALL SELECT * FROM junction
+$$ LANGUAGE sql STABLE;
+
+-- Detector cache change notifications (see alembic/versions/004_add_cache_change_notifications.sql)
+CREATE OR REPLACE FUNCTION notify_row_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify(TG_ARGV[0], OLD.id::text);
+    ELSE
+        PERFORM pg_notify(TG_ARGV[0], NEW.id::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER notify_train_changed
+    AFTER INSERT OR DELETE OR UPDATE OF priority, type, max_speed_kmh, current_load, operational_status ON trains
+    FOR EACH ROW EXECUTE FUNCTION notify_row_changed('train_changed');
+
+CREATE TRIGGER notify_section_changed
+    AFTER INSERT OR DELETE OR UPDATE OF section_type, capacity, active ON sections
+    FOR EACH ROW EXECUTE FUNCTION notify_row_changed('section_changed');
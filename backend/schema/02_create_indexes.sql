@@ -11,7 +11,7 @@ CREATE INDEX idx_sections_active ON sections(active) WHERE active = true;
 CREATE INDEX idx_sections_type ON sections(section_type);
 CREATE INDEX idx_sections_code ON sections(section_code);
 CREATE INDEX idx_sections_junction_ids ON sections USING GIN(junction_ids);
-CREATE INDEX idx_sections_coordinates ON sections USING GIST(coordinates);
+CREATE INDEX idx_sections_coordinates ON sections USING SPGIST(coordinates);
 CREATE INDEX idx_sections_max_speed ON sections(max_speed_kmh);
 CREATE INDEX idx_sections_capacity ON sections(capacity);
 
@@ -31,11 +31,15 @@ CREATE INDEX idx_trains_speed ON trains(speed_kmh);
 -- TimescaleDB automatically creates time-based indexes, but we add spatial and query-specific ones
 CREATE INDEX idx_positions_train_id ON positions(train_id);
 CREATE INDEX idx_positions_section_id ON positions(section_id);
-CREATE INDEX idx_positions_coordinates ON positions USING GIST(coordinates);
+CREATE INDEX idx_positions_coordinates ON positions USING SPGIST(coordinates);
 CREATE INDEX idx_positions_speed ON positions(speed_kmh);
 CREATE INDEX idx_positions_train_time ON positions(train_id, timestamp DESC);
 CREATE INDEX idx_positions_section_time ON positions(section_id, timestamp DESC);
 
+-- BRIN indexes for append-only time-range scans (tiny compared to B-tree)
+CREATE INDEX idx_positions_timestamp_brin ON positions USING BRIN(timestamp) WITH (pages_per_range = 32);
+CREATE INDEX idx_positions_section_time_brin ON positions USING BRIN(section_id, timestamp);
+
 -- Composite index for real-time position queries
 CREATE INDEX idx_positions_realtime ON positions(train_id, timestamp DESC, section_id);
 
@@ -48,6 +52,10 @@ CREATE INDEX idx_conflicts_sections_involved ON conflicts USING GIN(sections_inv
 CREATE INDEX idx_conflicts_type ON conflicts(conflict_type);
 CREATE INDEX idx_conflicts_resolved_by ON conflicts(resolved_by_controller_id) WHERE resolved_by_controller_id IS NOT NULL;
 
+-- One open conflict per type and set of trains/sections, in any order; target of store_conflicts' ON CONFLICT upsert
+CREATE UNIQUE INDEX conflicts_open_uq ON conflicts(conflict_type, trains_sorted, sections_sorted)
+    WHERE resolution_time IS NULL;
+
 -- Composite index for recent conflicts query
 CREATE INDEX idx_conflicts_recent ON conflicts(detection_time DESC, severity) 
     WHERE resolution_time IS NULL OR detection_time >= CURRENT_TIMESTAMP - INTERVAL '24 hours';
@@ -79,7 +79,7 @@ def create_test_users():
                 # Update password using raw SQL since model may not have the field yet
                 db.execute(text("""
                     UPDATE controllers 
-                    SET password_hash = :password_hash 
+                    SET password_hash = :password_hash, updated_at = CURRENT_TIMESTAMP
                     WHERE employee_id = :employee_id
                 """), {"password_hash": password_hash, "employee_id": user_data["employee_id"]})
                 db.commit()
@@ -125,7 +125,7 @@ def update_existing_users():
         for user in users:
             db.execute(text("""
                 UPDATE controllers 
-                SET password_hash = :password_hash 
+                SET password_hash = :password_hash, updated_at = CURRENT_TIMESTAMP
                 WHERE employee_id = :employee_id
             """), {"password_hash": password_hash, "employee_id": user[0]})
             print(f"✅ Set default password for {user[0]} ({user[1]})")
@@ -7,6 +7,8 @@ import asyncio
 import sys
 import os
 from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -21,7 +23,9 @@ from sqlalchemy.ext.declarative import declarative_base
 
 from app.main import app
 from app.db import get_session
+from app import auth
 from app.auth import create_access_token
+from app.models import Controller as ModelController, ControllerAuthLevel, section_mask
 from app.redis_client import RedisClient
 
 # Create SQLite-compatible base and models for testing
@@ -436,7 +440,111 @@ class TestAuthenticationEndpoints:
     def test_unauthorized_access(self):
         """Test unauthorized access"""
         response = client.get("/api/auth/me")
-        assert response.status_code == 403  # Changed from 401 to 403 to match actual response
+        assert response.status_code == 401
+
+
+class TestAuthCaches:
+    """Test the token, login and controller caches behind authentication"""
+    
+    @pytest.fixture(autouse=True)
+    def clear_auth_caches(self):
+        """Start each test with empty caches"""
+        for cache in (auth._token_cache, auth._auth_cache, auth._controller_cache):
+            cache.clear()
+        yield
+        for cache in (auth._token_cache, auth._auth_cache, auth._controller_cache):
+            cache.clear()
+    
+    @staticmethod
+    def make_controller(password_hash=None):
+        """Controller model instance as the database would return it"""
+        return ModelController(
+            id=7,
+            name="Cache Controller",
+            employee_id="CACHE7",
+            password_hash=password_hash,
+            section_responsibility=[1, 2, 3],
+            auth_level=ControllerAuthLevel.SUPERVISOR,
+            active=True,
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow()
+        )
+    
+    @staticmethod
+    def credentials(employee_id, controller_id):
+        token = create_access_token(data={"sub": employee_id, "controller_id": controller_id})
+        return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    
+    def test_token_cache_hit(self, monkeypatch):
+        """A verified token is served from the cache without decoding it again"""
+        token = create_access_token(data={"sub": "CACHE7", "controller_id": 7})
+        first = auth.verify_token(token)
+        
+        monkeypatch.setattr(auth._jwt, "decode", MagicMock(side_effect=AssertionError("decoded twice")))
+        assert auth.verify_token(token) == first
+        assert first.employee_id == "CACHE7"
+        assert first.controller_id == 7
+    
+    def test_expired_cached_token_rejected(self, monkeypatch):
+        """A cached token past its exp is dropped and goes back through decoding"""
+        from jwt.exceptions import ExpiredSignatureError
+        token = create_access_token(data={"sub": "CACHE7", "controller_id": 7})
+        token_data = auth.verify_token(token)
+        key = next(iter(auth._token_cache))
+        auth._token_cache[key] = (token_data, 0)
+        
+        monkeypatch.setattr(auth._jwt, "decode", MagicMock(side_effect=ExpiredSignatureError("expired")))
+        assert auth.verify_token(token) is None
+        assert key not in auth._token_cache
+    
+    @pytest.mark.asyncio
+    async def test_controller_cache_hit(self):
+        """A cached controller is rebuilt with its section mask and without the password hash"""
+        db = MagicMock()
+        db.get.return_value = self.make_controller(password_hash="secret-hash")
+        credentials = self.credentials("CACHE7", 7)
+        
+        await auth.get_current_controller(credentials, db)
+        assert "password_hash" not in auth._controller_cache[7]
+        
+        db.get.side_effect = AssertionError("cache hit should not query")
+        controller = await auth.get_current_controller(credentials, db)
+        assert controller.id == 7
+        assert controller.employee_id == "CACHE7"
+        # Never copied into the cache, so the rebuilt instance has it unloaded
+        assert "password_hash" not in controller.__dict__
+        assert controller._sections_mask == section_mask([1, 2, 3])
+        assert auth.check_controller_permissions(controller, [2], "supervisor")
+    
+    @pytest.mark.asyncio
+    async def test_controller_cache_employee_id_mismatch(self):
+        """A token whose employee_id no longer matches the controller is rejected"""
+        db = MagicMock()
+        db.get.return_value = self.make_controller()
+        await auth.get_current_controller(self.credentials("CACHE7", 7), db)
+        
+        with pytest.raises(auth.HTTPException) as exc_info:
+            await auth.get_current_controller(self.credentials("OTHER7", 7), db)
+        assert exc_info.value.status_code == 401
+    
+    @pytest.mark.asyncio
+    async def test_changed_password_hash_invalidates_cached_login(self):
+        """A login cached under the old password hash is not reused after the hash changes"""
+        import bcrypt
+        old_hash = bcrypt.hashpw(b"old-password", bcrypt.gensalt(rounds=4)).decode()
+        new_hash = bcrypt.hashpw(b"new-password", bcrypt.gensalt(rounds=4)).decode()
+        controller = self.make_controller(password_hash=old_hash)
+        
+        db = MagicMock()
+        db.get.return_value = controller
+        db.execute.return_value.first.return_value = MagicMock(id=7, password_hash=old_hash)
+        assert await auth.authenticate_controller(db, "CACHE7", "old-password") is controller
+        assert len(auth._auth_cache) == 1
+        
+        controller.password_hash = new_hash
+        db.execute.return_value.first.return_value = MagicMock(id=7, password_hash=new_hash)
+        assert await auth.authenticate_controller(db, "CACHE7", "old-password") is None
+        assert len(auth._auth_cache) == 0
 
 
 class TestPositionEndpoints:
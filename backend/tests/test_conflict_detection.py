@@ -6,14 +6,20 @@ Tests all conflict detection scenarios including mock train scenarios and edge c
 import pytest
 import asyncio
 from datetime import datetime, timedelta
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import AsyncMock, Mock, MagicMock, patch
 from decimal import Decimal
 
+import numpy as np
+
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.conflict_detector import ConflictDetector, ConflictType, DetectedConflict, TrainPrediction
+from app.conflict_detector import (
+    ConflictDetector, ConflictType, DetectedConflict, TrainPrediction,
+    _pairs_overlap, _sweep_pairs_overlap, _later_overlap_spans
+)
+from app._scan_kernel import _count_section_pairs, _fill_section_pairs
 from app.conflict_scheduler import ConflictDetectionScheduler
 from app.models import Train, Section, Position, TrainSchedule, TrainType
 
@@ -37,8 +43,7 @@ class TestConflictDetector:
     def mock_redis_client(self):
         """Mock Redis client"""
         redis_client = Mock()
-        redis_client.publish = Mock(return_value=asyncio.Future())
-        redis_client.publish.return_value.set_result(True)
+        redis_client.publish = AsyncMock(return_value=True)
         return redis_client
     
     @pytest.fixture
@@ -373,20 +378,20 @@ class TestConflictDetector:
         mock_section = Mock()
         
         # Test spatial resolutions
-        spatial_suggestions = await conflict_detector._generate_spatial_resolutions(pred1, pred2, mock_section)
+        spatial_suggestions = conflict_detector._generate_spatial_resolutions(pred1, pred2, mock_section)
         assert len(spatial_suggestions) > 0
         assert any("speed" in s.lower() for s in spatial_suggestions)
         assert any("delay" in s.lower() for s in spatial_suggestions)
         
         # Test temporal resolutions
-        temporal_suggestions = await conflict_detector._generate_temporal_resolutions(pred1, pred2, 1.0)
+        temporal_suggestions = conflict_detector._generate_temporal_resolutions(pred1, pred2, 1.0)
         assert len(temporal_suggestions) > 0
         assert any("delay" in s.lower() for s in temporal_suggestions)
         
         # Test priority resolutions
         train1_info = {'priority': 3, 'type': 'freight'}
         train2_info = {'priority': 8, 'type': 'express'}
-        priority_suggestions = await conflict_detector._generate_priority_resolutions(
+        priority_suggestions = conflict_detector._generate_priority_resolutions(
             pred1, pred2, train1_info, train2_info
         )
         assert len(priority_suggestions) > 0
@@ -436,6 +441,34 @@ class TestConflictDetectionScheduler:
         assert updated_stats['stats']['total_conflicts_detected'] == 3
         assert updated_stats['stats']['average_detection_time'] == 1.5
     
+    @pytest.mark.asyncio
+    async def test_triggered_runs_keep_periodic_schedule(self, scheduler):
+        """Test that early triggers do not push back the next periodic run"""
+        loop = asyncio.get_running_loop()
+        run_times = []
+        
+        async def record_run():
+            run_times.append(loop.time())
+            return 0
+        
+        scheduler._run_detection_cycle = record_run
+        scheduler.detection_interval = 0.5
+        scheduler.min_trigger_interval = 0
+        
+        await scheduler.start()
+        start = loop.time()
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0.1)
+                scheduler.trigger_detection()
+            await asyncio.sleep(0.45)
+        finally:
+            await scheduler.stop()
+        
+        # Initial run, three triggered runs, then the periodic run at the first deadline
+        assert len(run_times) == 5
+        assert run_times[-1] - start == pytest.approx(0.5, abs=0.1)
+    
     @pytest.mark.asyncio
     async def test_detection_interval_update(self, scheduler):
         """Test updating detection interval"""
@@ -452,6 +485,62 @@ class TestConflictDetectionScheduler:
             await scheduler.update_detection_interval(400)  # Too long
 
 
+class TestOverlapKernels:
+    """Test cases for the interval overlap kernels"""
+    
+    def test_sweep_matches_dense_kernel(self):
+        """Test sorted sweep returns the same pairs and overlaps as the dense matrix"""
+        rng = np.random.default_rng(42)
+        
+        for n in (0, 1, 2, 9, 50):
+            arrivals = np.sort(rng.integers(0, 100, n)).astype(np.int64)
+            exits = arrivals + rng.integers(-5, 30, n)
+            
+            dense_pairs, dense_overlap = _pairs_overlap(arrivals, exits)
+            sweep_pairs, sweep_overlap = _sweep_pairs_overlap(arrivals, exits)
+            
+            assert dense_pairs.tolist() == sweep_pairs.tolist()
+            assert dense_overlap.tolist() == sweep_overlap.tolist()
+    
+    def test_scan_kernels_match_dense_kernel(self):
+        """Test the section scan kernels (run uncompiled) against the dense matrix of each section"""
+        rng = np.random.default_rng(7)
+        sizes = [20, 0, 1, 12]
+        arrivals = np.concatenate([np.sort(rng.integers(0, 50, n)) for n in sizes]).astype(np.int64)
+        exits = arrivals + rng.integers(1, 40, len(arrivals))
+        ends = np.cumsum(sizes)
+        segment_end = np.repeat(ends, sizes)
+        
+        counts = np.empty(len(arrivals), dtype=np.int64)
+        _count_section_pairs(arrivals, exits, segment_end, counts)
+        size = int(counts.sum())
+        out_i, out_j, out_overlap = (np.empty(size, dtype=np.int64) for _ in range(3))
+        _fill_section_pairs(arrivals, exits, segment_end, np.cumsum(counts) - counts, out_i, out_j, out_overlap)
+        
+        expected_pairs, expected_overlap = [], []
+        for start, end in zip(ends - sizes, ends):
+            pairs, overlap = _pairs_overlap(arrivals[start:end], exits[start:end])
+            expected_pairs += (pairs + start).tolist()
+            expected_overlap += overlap.tolist()
+        
+        assert np.column_stack((out_i, out_j)).tolist() == expected_pairs
+        assert out_overlap.tolist() == expected_overlap
+    
+    def test_later_overlap_spans_match_pair_counts(self):
+        """Test prefix-sum overlap counts equal the number of pairs per first train"""
+        rng = np.random.default_rng(3)
+        
+        for n in (0, 1, 2, 30):
+            arrivals = np.sort(rng.integers(0, 60, n)).astype(np.int64)
+            exits = arrivals + rng.integers(-5, 20, n)
+            
+            pairs, _ = _pairs_overlap(arrivals, exits)
+            ends, counts = _later_overlap_spans(arrivals, exits)
+            
+            assert counts.tolist() == np.bincount(pairs[:, 0], minlength=n).tolist()
+            assert all(j < ends[i] for i, j in pairs.tolist())
+
+
 class TestScenarios:
     """Integration test scenarios for complex railway situations"""
     